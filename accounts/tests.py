@@ -1,3 +1,80 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from profiles.models import Profile
+
+LOCAL_CACHE = {
+    **settings.CACHES,
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "directory-test"},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class UserDirectoryTests(TestCase):
+    url = "/api/users/"
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.viewer = User.objects.create_user("viewer@example.com", "pw")
+        self.ann = User.objects.create_user("ann@example.com", "pw", first_name="Ann", last_name="Lee")
+        self.bob = User.objects.create_user("bob@example.com", "pw")
+        self.cara = User.objects.create_user("cara@example.com", "pw")
+        self.root = User.objects.create_superuser("root@example.com", "pw")
+        User.objects.update(is_active=True)
+        User.objects.filter(pk=self.cara.pk).update(is_active=False)
+        Profile.objects.filter(user=self.bob).update(roles=["approver"], display_name="Bobby")
+        Profile.objects.filter(user=self.cara).update(roles=["procurement"])
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def emails(self, **params) -> list[str]:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row["email"] for row in response.json()["results"]]
+
+    def test_q_matches_email_name_and_display_name(self):
+        self.assertEqual(self.emails(q="lee"), ["ann@example.com"])
+        self.assertEqual(self.emails(q="bobby"), ["bob@example.com"])
+        self.assertEqual(self.emails(q="CARA@"), ["cara@example.com"])
+
+    def test_role_filter_treats_admins_as_every_role(self):
+        self.assertEqual(self.emails(role="approver"), ["bob@example.com", "root@example.com"])
+        self.assertEqual(self.emails(role="procurement"), ["cara@example.com", "root@example.com"])
+        self.assertEqual(len(self.emails(role="employee")), 5)
+
+    def test_active_filter(self):
+        self.assertEqual(self.emails(active="0"), ["cara@example.com"])
+        self.assertNotIn("cara@example.com", self.emails(active="1"))
+
+    def test_cursor_pages_cover_everyone_once_in_email_order(self):
+        seen = []
+        response = self.client.get(self.url, {"page_size": 2})
+        while True:
+            body = response.json()
+            self.assertLessEqual(len(body["results"]), 2)
+            seen += [row["email"] for row in body["results"]]
+            if not body["next"]:
+                break
+            response = self.client.get(body["next"])
+        self.assertEqual(seen, sorted(get_user_model().objects.values_list("email", flat=True)))
+
+    def test_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"page_size": 3})
+
+    def test_unchanged_directory_answers_304(self):
+        first = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Profile.objects.get(user=self.ann).save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
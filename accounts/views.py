@@ -9,12 +9,17 @@ from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.translation import gettext_lazy as _
 from django.utils.encoding import force_bytes
-from rest_framework import permissions, status
+from django.db.models import Q
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from core.graph_mailer import GraphMailerConfigError, GraphMailerError, send_html_email
+from core.graph_mailer import GraphMailerConfigError, GraphMailerError
+from core.mail_dispatch import dispatch_html_email
+from core.pagination import StandardCursorPagination
+from core.response_cache import CachedResponseMixin
+from profiles.models import Profile
 
 from .permissions import IsAdminRole
 from .serializers import (
@@ -65,11 +70,11 @@ class RegisterView(APIView):
         <p><a href="{activation_link}">Activate account</a></p>
         """
         debug_payload: dict[str, str] = {}
-        mail_sent = True
+        mail_queued = True
         try:
-            send_html_email(to_email=user.email, subject=subject, html_body=html)
+            dispatch_html_email(to_email=user.email, subject=subject, html_body=html)
         except (GraphMailerConfigError, GraphMailerError) as exc:
-            mail_sent = False
+            mail_queued = False
             if settings.DEBUG:
                 debug_payload = {"activation_link": activation_link, "mail_error": str(exc)}
             else:
@@ -79,7 +84,7 @@ class RegisterView(APIView):
             {
                 "user": UserSerializer(user).data,
                 "detail": _("Registration successful. Check email to activate."),
-                "mail_sent": mail_sent,
+                "mail_queued": mail_queued,
                 **debug_payload,
             },
             status=status.HTTP_201_CREATED,
@@ -127,12 +132,48 @@ class MeView(APIView):
         return Response(UserSerializer(request.user).data)
 
 
-class UsersView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+class UserDirectoryPagination(StandardCursorPagination):
+    ordering = "email"
 
-    def get(self, request):
-        qs = User.objects.all().order_by("email")
-        return Response(UserListSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+
+class UsersView(CachedResponseMixin, generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = UserListSerializer
+    pagination_class = UserDirectoryPagination
+    # Everyone sees the same directory, so one cached page serves all users.
+    cache_models = (User, Profile)
+    cache_scope = "global"
+
+    def get_queryset(self):
+        qs = User.objects.select_related("profile")
+        params = self.request.query_params
+
+        q = (params.get("q") or "").strip()
+        if q:
+            qs = qs.filter(
+                Q(email__icontains=q)
+                | Q(first_name__icontains=q)
+                | Q(last_name__icontains=q)
+                | Q(profile__display_name__icontains=q)
+            )
+
+        role = (params.get("role") or "").strip().lower()
+        if role and role != "employee":
+            # Same semantics as has_role(): admin (and superuser) implies every role.
+            # Roles are stored as a JSON list, so match the quoted value.
+            qs = qs.filter(
+                Q(profile__roles__icontains=f'"{role}"')
+                | Q(profile__roles__icontains='"admin"')
+                | Q(is_superuser=True)
+            )
+
+        active = params.get("active")
+        if active in {"1", "true", "True"}:
+            qs = qs.filter(is_active=True)
+        elif active in {"0", "false", "False"}:
+            qs = qs.filter(is_active=False)
+
+        return qs.order_by("email")
 
 
 class UserAdminUpdateView(APIView):
@@ -187,7 +228,7 @@ class PasswordResetRequestView(APIView):
             <p><a href="{reset_link}">Reset password</a></p>
             """
             try:
-                send_html_email(to_email=user.email, subject=subject, html_body=html)
+                dispatch_html_email(to_email=user.email, subject=subject, html_body=html)
             except (GraphMailerConfigError, GraphMailerError) as exc:
                 if settings.DEBUG:
                     debug_payload = {"reset_link": reset_link, "mail_error": str(exc)}
@@ -195,7 +236,7 @@ class PasswordResetRequestView(APIView):
                     debug_payload = {}
 
         return Response(
-            {"detail": _("If the email exists, a reset link has been sent."), **debug_payload},
+            {"detail": _("If the email exists, a reset link will be sent to it."), **debug_payload},
             status=status.HTTP_200_OK,
         )
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import Asset
+from .models import Asset, AssetBalance, AssetLedgerEntry, AssetReservation
 
 
 @admin.register(Asset)
@@ -10,3 +10,21 @@ class AssetAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "status", "quantity", "transferred_quantity", "vendor", "created_at")
     search_fields = ("name", "vendor")
     list_filter = ("status", "category")
+
+
+@admin.register(AssetReservation)
+class AssetReservationAdmin(admin.ModelAdmin):
+    list_display = ("asset", "reserved_quantity", "updated_at")
+
+
+@admin.register(AssetLedgerEntry)
+class AssetLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "asset", "kind", "quantity", "source_type", "source_id", "created_at")
+    list_filter = ("kind",)
+    raw_id_fields = ("asset", "created_by")
+
+
+@admin.register(AssetBalance)
+class AssetBalanceAdmin(admin.ModelAdmin):
+    list_display = ("asset", "on_hand_quantity", "received_quantity", "transferred_quantity", "materialized_at")
+    raw_id_fields = ("asset",)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import csv
+import json
+from typing import Iterator
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    "id",
+    "tag",
+    "name",
+    "description",
+    "category",
+    "vendor",
+    "quantity",
+    "transferred_quantity",
+    "reserved_quantity",
+    "available_quantity",
+    "unit",
+    "status",
+    "bom_id",
+    "bom_item_id",
+    "purchase_order_id",
+    "purchase_order_item_id",
+    "created_by_email",
+    "created_at",
+    "data",
+]
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back.
+    def write(self, value: str) -> str:
+        return value
+
+
+def _asset_row(asset) -> dict:
+    bom_item = asset.source_bom_item
+    po_item = asset.source_po_item
+    return {
+        "id": asset.id,
+        "tag": asset.tag or "",
+        "name": asset.name,
+        "description": asset.description,
+        "category": asset.category,
+        "vendor": asset.vendor,
+        "quantity": str(asset.quantity),
+        "transferred_quantity": str(asset.transferred_quantity),
+        "reserved_quantity": str(asset.reserved_quantity),
+        "available_quantity": str(asset.available_quantity),
+        "unit": asset.unit,
+        "status": asset.status,
+        "bom_id": bom_item.bom_id if bom_item else None,
+        "bom_item_id": asset.source_bom_item_id,
+        "purchase_order_id": po_item.purchase_order_id if po_item else None,
+        "purchase_order_item_id": asset.source_po_item_id,
+        "created_by_email": getattr(asset.created_by, "email", ""),
+        "created_at": asset.created_at.isoformat() if asset.created_at else "",
+        "data": asset.data or {},
+    }
+
+
+def iter_assets_csv(queryset) -> Iterator[str]:
+    """
+    Yield the asset register as CSV lines, reading `queryset` in chunks.
+    """
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for asset in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = _asset_row(asset)
+        row["data"] = json.dumps(row["data"], ensure_ascii=True)
+        yield writer.writerow(row)
+
+
+def iter_assets_jsonl(queryset) -> Iterator[str]:
+    """
+    Yield the asset register as one JSON object per line, reading `queryset` in chunks.
+    """
+    for asset in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield json.dumps(_asset_row(asset), ensure_ascii=True) + "\n"
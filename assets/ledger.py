@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from .models import Asset, AssetBalance, AssetLedgerEntry
+
+MATERIALIZE_CHUNK_SIZE = 1000
+
+_ZERO = Decimal("0")
+# Ledger quantities have three decimal places, like the model fields.
+_QUANTUM = Decimal("0.001")
+Kind = AssetLedgerEntry.Kind
+
+
+@dataclass
+class LedgerBalance:
+    received: Decimal = _ZERO
+    transferred: Decimal = _ZERO
+    disposed: Decimal = _ZERO
+    adjusted: Decimal = _ZERO
+    entry_count: int = 0
+
+    @property
+    def on_hand(self) -> Decimal:
+        return self.received - self.transferred - self.disposed + self.adjusted
+
+    def add(self, other: LedgerBalance) -> None:
+        self.received += other.received
+        self.transferred += other.transferred
+        self.disposed += other.disposed
+        self.adjusted += other.adjusted
+        self.entry_count += other.entry_count
+
+    def as_dict(self) -> dict:
+        return {
+            "received_quantity": str(self.received.quantize(_QUANTUM)),
+            "transferred_quantity": str(self.transferred.quantize(_QUANTUM)),
+            "disposed_quantity": str(self.disposed.quantize(_QUANTUM)),
+            "adjusted_quantity": str(self.adjusted.quantize(_QUANTUM)),
+            "on_hand_quantity": str(self.on_hand.quantize(_QUANTUM)),
+            "entry_count": self.entry_count,
+        }
+
+
+def append_entries(entries: Iterable[AssetLedgerEntry]) -> int:
+    """
+    Insert ledger entries in one statement.
+
+    Only INSERTs, so concurrent writers never wait on each other's rows.
+    Entries carrying a source reference that is already in the ledger are
+    skipped, which makes retries of the same receipt or transfer harmless.
+    """
+    entries = [entry for entry in entries if entry.quantity]
+    AssetLedgerEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def _totals_by_asset(qs) -> dict[int, tuple[LedgerBalance, int]]:
+    # Sums are stored signed; transfers and disposals are reported as positive amounts.
+    rows = (
+        qs.values("asset_id")
+        .annotate(
+            received=Sum("quantity", filter=Q(kind=Kind.RECEIVED)),
+            transferred=Sum("quantity", filter=Q(kind=Kind.TRANSFERRED)),
+            disposed=Sum("quantity", filter=Q(kind=Kind.DISPOSED)),
+            adjusted=Sum("quantity", filter=Q(kind=Kind.ADJUSTED)),
+            entries=Count("id"),
+            last_id=Max("id"),
+        )
+        .order_by()
+    )
+    return {
+        row["asset_id"]: (
+            LedgerBalance(
+                received=row["received"] or _ZERO,
+                transferred=-(row["transferred"] or _ZERO),
+                disposed=-(row["disposed"] or _ZERO),
+                adjusted=row["adjusted"] or _ZERO,
+                entry_count=row["entries"],
+            ),
+            row["last_id"],
+        )
+        for row in rows
+    }
+
+
+def ledger_balances(asset_ids: Iterable[int], *, at: datetime | None = None) -> dict[int, LedgerBalance]:
+    """
+    Balance per asset id, now or as of `at`.
+
+    A point-in-time balance sums the asset's entries up to `at` over the
+    (asset, created_at) index. The current balance is the materialized
+    AssetBalance plus the entries created at or after its `materialized_at`
+    cutoff (the same one materialize_balances summed up to), so it costs two
+    queries however long the history is, and entries whose transaction
+    committed late are still counted exactly once.
+    """
+    asset_ids = list(asset_ids)
+    balances = {asset_id: LedgerBalance() for asset_id in asset_ids}
+    if not asset_ids:
+        return balances
+
+    entries = AssetLedgerEntry.objects.filter(asset_id__in=asset_ids)
+    if at is not None:
+        for asset_id, (totals, _) in _totals_by_asset(entries.filter(created_at__lte=at)).items():
+            balances[asset_id] = totals
+        return balances
+
+    for row in AssetBalance.objects.filter(asset_id__in=asset_ids):
+        balances[row.asset_id] = LedgerBalance(
+            received=row.received_quantity,
+            transferred=row.transferred_quantity,
+            disposed=row.disposed_quantity,
+            adjusted=row.adjusted_quantity,
+            entry_count=row.entry_count,
+        )
+    tail = entries.filter(
+        Q(asset__balance__isnull=True) | Q(created_at__gte=F("asset__balance__materialized_at"))
+    )
+    for asset_id, (totals, _) in _totals_by_asset(tail).items():
+        balances[asset_id].add(totals)
+    return balances
+
+
+def materialize_balances(*, full: bool = False) -> int:
+    """
+    Recompute AssetBalance for every asset with ledger entries since the last
+    run (all assets when `full` or on the first run). Returns the number of
+    balances written.
+
+    Balances only cover entries created before the run started minus
+    ASSET_BALANCE_LAG_SECONDS, and that cutoff is stored as `materialized_at`.
+    Entries newer than that may belong to transactions that haven't committed
+    yet; ledger_balances adds them from the ledger instead, and the next run
+    picks them up, since it starts from the previous cutoff.
+    """
+    lag = timedelta(seconds=int(getattr(settings, "ASSET_BALANCE_LAG_SECONDS", 300)))
+    cutoff = timezone.now() - lag
+    covered = AssetLedgerEntry.objects.filter(created_at__lt=cutoff)
+    entries = covered
+    if not full:
+        last_cutoff = AssetBalance.objects.aggregate(last=Max("materialized_at"))["last"]
+        if last_cutoff is not None:
+            entries = entries.filter(created_at__gte=last_cutoff)
+    asset_ids = sorted(set(entries.values_list("asset_id", flat=True).distinct().order_by()))
+
+    written = 0
+    for start in range(0, len(asset_ids), MATERIALIZE_CHUNK_SIZE):
+        chunk = asset_ids[start : start + MATERIALIZE_CHUNK_SIZE]
+        rows = [
+            AssetBalance(
+                asset_id=asset_id,
+                received_quantity=totals.received,
+                transferred_quantity=totals.transferred,
+                disposed_quantity=totals.disposed,
+                adjusted_quantity=totals.adjusted,
+                on_hand_quantity=totals.on_hand,
+                entry_count=totals.entry_count,
+                last_entry_id=last_id,
+                materialized_at=cutoff,
+            )
+            for asset_id, (totals, last_id) in _totals_by_asset(covered.filter(asset_id__in=chunk)).items()
+        ]
+        AssetBalance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["asset"],
+            update_fields=[
+                "received_quantity",
+                "transferred_quantity",
+                "disposed_quantity",
+                "adjusted_quantity",
+                "on_hand_quantity",
+                "entry_count",
+                "last_entry_id",
+                "materialized_at",
+            ],
+        )
+        written += len(rows)
+    return written
+
+
+def find_ledger_drift() -> list[dict]:
+    """
+    Assets whose counters disagree with their ledger balance.
+
+    Availability is checked against Asset.quantity / transferred_quantity under
+    row locks, so those counters stay the source of truth for transfers; the
+    ledger is written in the same transactions and should always agree. Each
+    row names the asset, the field, the recorded value and the ledger's (expected) value.
+    """
+    drift = []
+    rows = Asset.objects.order_by("id").values_list("id", "quantity", "transferred_quantity")
+    chunk: list[tuple] = []
+
+    def check(chunk: list[tuple]) -> None:
+        balances = ledger_balances([row[0] for row in chunk])
+        for asset_id, quantity, transferred in chunk:
+            balance = balances[asset_id]
+            expected = {
+                "quantity": (quantity, balance.received + balance.adjusted),
+                "transferred_quantity": (transferred, balance.transferred),
+            }
+            for name, (recorded, ledger) in expected.items():
+                if recorded != ledger:
+                    drift.append({"asset_id": asset_id, "field": name, "recorded": recorded, "expected": ledger})
+
+    for row in rows.iterator(chunk_size=MATERIALIZE_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) >= MATERIALIZE_CHUNK_SIZE:
+            check(chunk)
+            chunk = []
+    if chunk:
+        check(chunk)
+    return drift
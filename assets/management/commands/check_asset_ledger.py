@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.ledger import find_ledger_drift
+from assets.services import find_reservation_drift
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare asset quantity counters with the ledger and reservations with open transfer items. "
+        "Exits non-zero when anything disagrees; rebuild_asset_reservations repairs reservation drift."
+    )
+
+    def handle(self, *args, **options):
+        drift = find_ledger_drift() + find_reservation_drift()
+        for row in drift:
+            self.stdout.write("asset {asset_id}: {field} is {recorded}, expected {expected}".format(**row))
+        if drift:
+            raise CommandError(f"{len(drift)} asset counters disagree with the ledger or open transfers.")
+        self.stdout.write(self.style.SUCCESS("Asset counters match the ledger and open transfers."))
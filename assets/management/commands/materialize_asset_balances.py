@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from assets.ledger import materialize_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute materialized asset balances from the ledger for assets with entries since the last run. "
+        "Run it from cron; --full recomputes every asset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recompute every asset with ledger entries.")
+
+    def handle(self, *args, **options):
+        count = materialize_balances(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Asset balances materialized: {count} assets"))
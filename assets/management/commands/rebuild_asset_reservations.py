@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from assets.services import rebuild_reservations
+
+
+class Command(BaseCommand):
+    help = "Recompute reserved asset quantities from the items of open (draft/submitted/approved) transfers."
+
+    def handle(self, *args, **options):
+        count = rebuild_reservations()
+        self.stdout.write(self.style.SUCCESS(f"Asset reservations rebuilt: {count} assets reserved"))
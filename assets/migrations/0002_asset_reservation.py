@@ -0,0 +1,42 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+OPEN_TRANSFER_STATUSES = ("DRAFT", "SUBMITTED", "APPROVED")
+
+
+def backfill_reservations(apps, schema_editor):
+    AssetReservation = apps.get_model("assets", "AssetReservation")
+    TransferItem = apps.get_model("transfers", "TransferItem")
+    totals = (
+        TransferItem.objects.filter(transfer__status__in=OPEN_TRANSFER_STATUSES)
+        .values("asset_id")
+        .annotate(total=Sum("quantity"))
+        .order_by()
+    )
+    AssetReservation.objects.bulk_create(
+        [AssetReservation(asset_id=row["asset_id"], reserved_quantity=row["total"]) for row in totals],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+        ('transfers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetReservation',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reservation', serialize=False, to='assets.asset')),
+                ('reserved_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_reservations, migrations.RunPython.noop),
+    ]
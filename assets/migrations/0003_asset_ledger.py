@@ -0,0 +1,126 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_ledger(apps, schema_editor):
+    # Opening history: the receipt of each asset, one entry per completed
+    # transfer item, and adjustments for whatever those don't explain.
+    Asset = apps.get_model("assets", "Asset")
+    AssetLedgerEntry = apps.get_model("assets", "AssetLedgerEntry")
+    TransferItem = apps.get_model("transfers", "TransferItem")
+    now = django.utils.timezone.now()
+
+    entries = []
+    transferred = {}
+    for item in (
+        TransferItem.objects.filter(transfer__status="COMPLETED")
+        .select_related("transfer")
+        .order_by("id")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        transferred[item.asset_id] = transferred.get(item.asset_id, 0) + item.quantity
+        entries.append(
+            AssetLedgerEntry(
+                asset_id=item.asset_id,
+                kind="TRANSFERRED",
+                quantity=-item.quantity,
+                source_type="transfer_item",
+                source_id=item.id,
+                created_at=item.transfer.completed_at or item.transfer.updated_at,
+            )
+        )
+
+    for asset in Asset.objects.order_by("id").iterator(chunk_size=BATCH_SIZE):
+        if asset.source_bom_item_id:
+            source = ("bom_item", asset.source_bom_item_id)
+        elif asset.source_po_item_id:
+            source = ("po_item", asset.source_po_item_id)
+        else:
+            source = ("asset", asset.id)
+        entries.append(
+            AssetLedgerEntry(
+                asset_id=asset.id,
+                kind="RECEIVED",
+                quantity=asset.quantity,
+                source_type=source[0],
+                source_id=source[1],
+                created_by_id=asset.created_by_id,
+                created_at=asset.created_at,
+            )
+        )
+        difference = transferred.get(asset.id, 0) - asset.transferred_quantity
+        if difference:
+            entries.append(
+                AssetLedgerEntry(
+                    asset_id=asset.id, kind="ADJUSTED", quantity=difference, note="Opening balance", created_at=now
+                )
+            )
+        if asset.status == "DISPOSED" and asset.quantity > asset.transferred_quantity:
+            entries.append(
+                AssetLedgerEntry(
+                    asset_id=asset.id,
+                    kind="DISPOSED",
+                    quantity=asset.transferred_quantity - asset.quantity,
+                    note="Opening balance",
+                    created_at=now,
+                )
+            )
+        if len(entries) >= BATCH_SIZE:
+            AssetLedgerEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+    AssetLedgerEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_asset_reservation'),
+        ('transfers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetBalance',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='assets.asset')),
+                ('received_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('transferred_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('disposed_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('adjusted_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('on_hand_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('last_entry_id', models.BigIntegerField(default=0)),
+                ('materialized_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssetLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RECEIVED', 'Received'), ('TRANSFERRED', 'Transferred'), ('DISPOSED', 'Disposed'), ('ADJUSTED', 'Adjusted')], max_length=20)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('source_type', models.CharField(blank=True, max_length=50)),
+                ('source_id', models.BigIntegerField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, max_length=300)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='assets.asset')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['asset', 'created_at'], name='assets_asse_asset_i_e41350_idx'), models.Index(fields=['created_at'], name='assets_asse_created_dd6130_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='assetledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_id__isnull', False)), fields=('asset', 'kind', 'source_type', 'source_id'), name='uniq_asset_ledger_source'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
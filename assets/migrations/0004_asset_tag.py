@@ -0,0 +1,18 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_asset_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='tag',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
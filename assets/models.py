@@ -4,6 +4,8 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 
 class Asset(models.Model):
@@ -23,6 +25,8 @@ class Asset(models.Model):
     )
 
     name = models.CharField(max_length=300)
+    # Label / serial printed on the item; scanned at receiving and during audits.
+    tag = models.CharField(max_length=100, unique=True, null=True, blank=True)
     description = models.TextField(blank=True)
     category = models.CharField(max_length=200, blank=True)
     vendor = models.CharField(max_length=200, blank=True)
@@ -41,10 +45,103 @@ class Asset(models.Model):
         ]
 
     @property
-    def available_quantity(self) -> Decimal:
+    def reserved_quantity(self) -> Decimal:
+        try:
+            return self.reservation.reserved_quantity
+        except AssetReservation.DoesNotExist:
+            return Decimal("0")
+
+    @property
+    def on_hand_quantity(self) -> Decimal:
         return self.quantity - self.transferred_quantity
 
+    @property
+    def available_quantity(self) -> Decimal:
+        """
+        Quantity not transferred and not reserved by an open transfer.
+        """
+        return self.quantity - self.transferred_quantity - self.reserved_quantity
+
     def __str__(self) -> str:
         return self.name
 
-# Create your models here.
+
+class AssetReservation(models.Model):
+    """
+    Total quantity of an asset on open (draft / submitted / approved) transfers.
+
+    Maintained with F() increments by transfers.services as items are added,
+    removed, canceled or completed; `rebuild_asset_reservations` recomputes it.
+    """
+
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name="reservation")
+    reserved_quantity = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.asset_id}: {self.reserved_quantity}"
+
+
+class AssetLedgerEntry(models.Model):
+    """
+    One quantity movement of an asset. Rows are only ever inserted.
+
+    `quantity` is signed: receipts add, transfers and disposals subtract,
+    adjustments go either way, so an asset's on-hand quantity at any moment is
+    the sum of its entries up to then. `source_type` / `source_id` name the row
+    that caused the movement and make appends from it idempotent.
+    """
+
+    class Kind(models.TextChoices):
+        RECEIVED = "RECEIVED", "Received"
+        TRANSFERRED = "TRANSFERRED", "Transferred"
+        DISPOSED = "DISPOSED", "Disposed"
+        ADJUSTED = "ADJUSTED", "Adjusted"
+
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name="ledger_entries")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+    source_type = models.CharField(max_length=50, blank=True)
+    source_id = models.BigIntegerField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    note = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["asset", "kind", "source_type", "source_id"],
+                condition=Q(source_id__isnull=False),
+                name="uniq_asset_ledger_source",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["asset", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.asset_id} {self.kind} {self.quantity}"
+
+
+class AssetBalance(models.Model):
+    """
+    Ledger totals per asset over the entries created before `materialized_at`
+    (the run time minus ASSET_BALANCE_LAG_SECONDS), rebuilt by
+    `materialize_asset_balances` for assets with recent entries.
+    """
+
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name="balance")
+    received_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    transferred_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    disposed_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    adjusted_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    on_hand_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    last_entry_id = models.BigIntegerField(default=0)
+    materialized_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.asset_id}: {self.on_hand_quantity}"
@@ -2,10 +2,20 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from .models import Asset
+from .models import Asset, AssetLedgerEntry
+
+
+MAX_SCAN_CODES = 1000
+
+
+def _clean_tag(value):
+    # Blank tags are stored as NULL so the unique constraint only covers real labels.
+    value = (value or "").strip()
+    return value or None
 
 
 class AssetSerializer(serializers.ModelSerializer):
+    reserved_quantity = serializers.DecimalField(max_digits=12, decimal_places=3, read_only=True)
     available_quantity = serializers.DecimalField(max_digits=12, decimal_places=3, read_only=True)
 
     class Meta:
@@ -16,11 +26,13 @@ class AssetSerializer(serializers.ModelSerializer):
             "source_po_item",
             "created_by",
             "name",
+            "tag",
             "description",
             "category",
             "vendor",
             "quantity",
             "transferred_quantity",
+            "reserved_quantity",
             "available_quantity",
             "unit",
             "status",
@@ -31,12 +43,32 @@ class AssetSerializer(serializers.ModelSerializer):
             "id",
             "created_by",
             "transferred_quantity",
+            "reserved_quantity",
             "available_quantity",
             "created_at",
         )
 
+    def validate_tag(self, value):
+        return _clean_tag(value)
+
 
 class AssetUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Asset
-        fields = ("name", "description", "category", "vendor", "quantity", "unit", "status", "data")
+        fields = ("name", "tag", "description", "category", "vendor", "quantity", "unit", "status", "data")
+
+    def validate_tag(self, value):
+        return _clean_tag(value)
+
+
+class AssetScanSerializer(serializers.Serializer):
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=100, allow_blank=True), allow_empty=False, max_length=MAX_SCAN_CODES
+    )
+
+
+class AssetLedgerEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AssetLedgerEntry
+        fields = ("id", "asset", "kind", "quantity", "source_type", "source_id", "created_by", "note", "created_at")
+        read_only_fields = fields
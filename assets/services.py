@@ -2,7 +2,12 @@ from __future__ import annotations
 
 from decimal import Decimal
 
-from .models import Asset
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+from .ledger import append_entries
+from .models import Asset, AssetLedgerEntry, AssetReservation
 
 
 def _coerce_decimal(value) -> Decimal:
@@ -12,15 +17,21 @@ def _coerce_decimal(value) -> Decimal:
         return Decimal("0")
 
 
-def convert_bom_items_to_assets(*, items, actor=None) -> int:
-    created = 0
-    for item in items:
-        if not item.is_fully_received:
-            continue
-        if Asset.objects.filter(source_bom_item=item).exists():
-            continue
-        Asset.objects.create(
-            source_bom_item=item,
+def _convert_to_assets(*, items, source_field: str, actor, data_for) -> int:
+    # One query for the items that already have an asset, one bulk insert for
+    # the rest. A concurrent receipt of the same item makes the bulk insert
+    # fail; then the rows go in one savepoint each and the taken ones are skipped.
+    received = [item for item in items if item.is_fully_received]
+    if not received:
+        return 0
+    existing = set(
+        Asset.objects.filter(**{f"{source_field}__in": [item.id for item in received]}).values_list(
+            f"{source_field}_id", flat=True
+        )
+    )
+    new_assets = [
+        Asset(
+            **{source_field: item},
             created_by=actor,
             name=item.name,
             description=item.description,
@@ -28,37 +39,216 @@ def convert_bom_items_to_assets(*, items, actor=None) -> int:
             vendor=item.vendor,
             quantity=_coerce_decimal(item.quantity),
             unit=item.unit,
-            data={"bom_id": item.bom_id, "bom_item_id": item.id},
+            data=data_for(item),
+        )
+        for item in received
+        if item.id not in existing
+    ]
+    if not new_assets:
+        return 0
+    try:
+        with transaction.atomic():
+            Asset.objects.bulk_create(new_assets)
+        created = new_assets
+    except IntegrityError:
+        created = []
+        for asset in new_assets:
+            asset.pk = None
+            try:
+                with transaction.atomic():
+                    asset.save(force_insert=True)
+            except IntegrityError:
+                continue
+            created.append(asset)
+    if created and created[0].pk is None:
+        # The backend can't return ids from a bulk insert; every row under
+        # these source ids is ours, since the insert didn't conflict.
+        ids = dict(
+            Asset.objects.filter(
+                **{f"{source_field}_id__in": [getattr(asset, f"{source_field}_id") for asset in created]}
+            ).values_list(f"{source_field}_id", "id")
         )
-        created += 1
-    return created
+        for asset in created:
+            asset.pk = ids[getattr(asset, f"{source_field}_id")]
+    source_type = source_field.removeprefix("source_")
+    append_entries(
+        AssetLedgerEntry(
+            asset_id=asset.pk,
+            kind=AssetLedgerEntry.Kind.RECEIVED,
+            quantity=asset.quantity,
+            source_type=source_type,
+            source_id=getattr(asset, f"{source_field}_id"),
+            created_by=actor,
+        )
+        for asset in created
+    )
+    return len(created)
+
+
+def convert_bom_items_to_assets(*, items, actor=None) -> int:
+    return _convert_to_assets(
+        items=items,
+        source_field="source_bom_item",
+        actor=actor,
+        data_for=lambda item: {"bom_id": item.bom_id, "bom_item_id": item.id},
+    )
 
 
 def convert_po_items_to_assets(*, items, actor=None) -> int:
-    created = 0
-    for item in items:
-        if not item.is_fully_received:
-            continue
-        if Asset.objects.filter(source_po_item=item).exists():
-            continue
-        Asset.objects.create(
-            source_po_item=item,
-            created_by=actor,
-            name=item.name,
-            description=item.description,
-            category=getattr(item, "category", ""),
-            vendor=item.vendor,
-            quantity=_coerce_decimal(item.quantity),
-            unit=item.unit,
-            data={"purchase_order_id": item.purchase_order_id, "purchase_order_item_id": item.id},
+    return _convert_to_assets(
+        items=items,
+        source_field="source_po_item",
+        actor=actor,
+        data_for=lambda item: {"purchase_order_id": item.purchase_order_id, "purchase_order_item_id": item.id},
+    )
+
+
+def apply_transfer_quantities(*, quantities: dict[int, Decimal]) -> None:
+    """
+    Add transferred quantities (asset id -> quantity) in one bulk UPDATE.
+
+    Increments are F() expressions and TRANSFERRED is decided in the same
+    statement, so concurrent writers can't lose an update. Callers lock the
+    asset rows first when they need to check availability.
+    """
+    assets = []
+    for asset_id, qty in quantities.items():
+        asset = Asset(id=asset_id)
+        asset.transferred_quantity = F("transferred_quantity") + qty
+        asset.status = Case(
+            When(quantity__lte=F("transferred_quantity") + qty, then=Value(Asset.Status.TRANSFERRED)),
+            default=F("status"),
         )
-        created += 1
-    return created
+        assets.append(asset)
+    Asset.objects.bulk_update(assets, ["transferred_quantity", "status"])
+
+
+def resolve_scanned_tags(queryset, codes) -> dict:
+    """
+    Sort a batch of scanned tags into matched, already transferred, disposed
+    and unknown with one `tag IN (...)` query over `queryset`.
+
+    Codes are stripped and de-duplicated in scan order. Tags outside
+    `queryset` (e.g. assets the caller can't see) are reported as unknown.
+    """
+    unique_codes = list(dict.fromkeys(code.strip() for code in codes if code and code.strip()))
+    assets = {asset.tag: asset for asset in queryset.filter(tag__in=unique_codes)}
+    result = {"matched": [], "transferred": [], "disposed": [], "unknown": []}
+    for code in unique_codes:
+        asset = assets.get(code)
+        if asset is None:
+            result["unknown"].append(code)
+        elif asset.status == Asset.Status.TRANSFERRED or asset.on_hand_quantity <= 0:
+            result["transferred"].append(asset)
+        elif asset.status == Asset.Status.DISPOSED:
+            result["disposed"].append(asset)
+        else:
+            result["matched"].append(asset)
+    return result
+
+
+def record_asset_created(asset: Asset, *, actor=None) -> None:
+    append_entries(
+        [
+            AssetLedgerEntry(
+                asset=asset,
+                kind=AssetLedgerEntry.Kind.RECEIVED,
+                quantity=asset.quantity,
+                source_type="asset",
+                source_id=asset.pk,
+                created_by=actor,
+            )
+        ]
+    )
+
+
+def record_asset_update(asset: Asset, *, previous_quantity: Decimal, previous_status: str, actor=None) -> None:
+    """
+    Append ADJUSTED / DISPOSED entries for a manual edit of an asset.
+
+    A quantity change is an adjustment by the difference. Disposing writes off
+    what is still on hand; un-disposing puts back what earlier disposals wrote off.
+    """
+    Kind = AssetLedgerEntry.Kind
+    entries = [
+        AssetLedgerEntry(
+            asset=asset, kind=Kind.ADJUSTED, quantity=asset.quantity - previous_quantity, created_by=actor
+        )
+    ]
+    disposed = Asset.Status.DISPOSED
+    if asset.status == disposed and previous_status != disposed:
+        entries.append(
+            AssetLedgerEntry(asset=asset, kind=Kind.DISPOSED, quantity=-asset.on_hand_quantity, created_by=actor)
+        )
+    elif previous_status == disposed and asset.status != disposed:
+        written_off = AssetLedgerEntry.objects.filter(asset=asset, kind=Kind.DISPOSED).aggregate(
+            total=Sum("quantity")
+        )["total"]
+        entries.append(
+            AssetLedgerEntry(asset=asset, kind=Kind.DISPOSED, quantity=-(written_off or 0), created_by=actor)
+        )
+    append_entries(entries)
+
+
+def adjust_reservations(deltas: dict[int, Decimal]) -> None:
+    """
+    Add (or, with negative values, release) reserved quantity per asset id.
+
+    Creates missing AssetReservation rows, then applies every delta as an F()
+    increment in one bulk UPDATE.
+    """
+    deltas = {asset_id: delta for asset_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    AssetReservation.objects.bulk_create(
+        [AssetReservation(asset_id=asset_id) for asset_id in deltas], ignore_conflicts=True
+    )
+    now = timezone.now()
+    rows = []
+    for asset_id, delta in deltas.items():
+        row = AssetReservation(asset_id=asset_id)
+        row.reserved_quantity = F("reserved_quantity") + delta
+        row.updated_at = now
+        rows.append(row)
+    AssetReservation.objects.bulk_update(rows, ["reserved_quantity", "updated_at"])
+
+
+def _open_transfer_totals():
+    from transfers.models import TransferItem
+    from transfers.services import OPEN_STATUSES
+
+    return (
+        TransferItem.objects.filter(transfer__status__in=OPEN_STATUSES)
+        .values("asset_id")
+        .annotate(total=Sum("quantity"))
+        .order_by()
+    )
+
+
+def find_reservation_drift() -> list[dict]:
+    """
+    Assets whose AssetReservation differs from the items of their open transfers.
+    """
+    expected = {row["asset_id"]: row["total"] for row in _open_transfer_totals()}
+    recorded = dict(AssetReservation.objects.values_list("asset_id", "reserved_quantity"))
+    drift = []
+    for asset_id in sorted(expected.keys() | recorded.keys()):
+        reserved = recorded.get(asset_id, Decimal("0"))
+        open_items = expected.get(asset_id, Decimal("0"))
+        if reserved != open_items:
+            drift.append(
+                {"asset_id": asset_id, "field": "reserved_quantity", "recorded": reserved, "expected": open_items}
+            )
+    return drift
 
 
-def apply_transfer_quantities(*, assets_and_qty: list[tuple[Asset, Decimal]]) -> None:
-    for asset, qty in assets_and_qty:
-        asset.transferred_quantity = asset.transferred_quantity + qty
-        if asset.transferred_quantity >= asset.quantity:
-            asset.status = Asset.Status.TRANSFERRED
-        asset.save(update_fields=["transferred_quantity", "status"])
+def rebuild_reservations() -> int:
+    """
+    Recompute every AssetReservation from the items of open transfers.
+    """
+    totals = _open_transfer_totals()
+    with transaction.atomic():
+        rows = [AssetReservation(asset_id=row["asset_id"], reserved_quantity=row["total"]) for row in totals]
+        AssetReservation.objects.all().delete()
+        AssetReservation.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
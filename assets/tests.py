@@ -1,3 +1,167 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import exporters
+from .ledger import LedgerBalance, append_entries, ledger_balances, materialize_balances
+from .models import Asset, AssetBalance, AssetLedgerEntry
+
+Kind = AssetLedgerEntry.Kind
+
+
+class AssetLedgerTests(TestCase):
+    def setUp(self):
+        self.asset = Asset.objects.create(name="Scope", quantity=Decimal("10"))
+        self.entry(Kind.RECEIVED, "10", minutes_ago=60)
+
+    def entry(self, kind, quantity, *, minutes_ago=0, **kwargs):
+        append_entries(
+            [
+                AssetLedgerEntry(
+                    asset=self.asset,
+                    kind=kind,
+                    quantity=Decimal(quantity),
+                    created_at=timezone.now() - timedelta(minutes=minutes_ago),
+                    **kwargs,
+                )
+            ]
+        )
+
+    def balance(self, **kwargs) -> LedgerBalance:
+        return ledger_balances([self.asset.id], **kwargs)[self.asset.id]
+
+    def test_materialized_balance_matches_the_ledger(self):
+        self.entry(Kind.TRANSFERRED, "-3", minutes_ago=30)
+        self.entry(Kind.ADJUSTED, "1", minutes_ago=1)
+        before = self.balance()
+        self.assertEqual(materialize_balances(), 1)
+        self.assertEqual(self.balance(), before)
+        self.assertEqual(before.on_hand, Decimal("8"))
+        self.assertEqual(before.entry_count, 3)
+        # The last entry is inside the lag window, so it is read from the ledger.
+        stored = AssetBalance.objects.get(asset=self.asset)
+        self.assertEqual((stored.on_hand_quantity, stored.entry_count), (Decimal("7"), 2))
+
+    def test_late_commit_is_counted_once(self):
+        materialize_balances()
+        # Inside the lag window: the run left it to the ledger tail, the next one with no lag covers it.
+        self.entry(Kind.DISPOSED, "-2", minutes_ago=2)
+        self.assertEqual(self.balance().on_hand, Decimal("8"))
+        with override_settings(ASSET_BALANCE_LAG_SECONDS=0):
+            materialize_balances()
+        self.assertEqual(AssetBalance.objects.get(asset=self.asset).on_hand_quantity, Decimal("8"))
+        self.assertEqual(self.balance().on_hand, Decimal("8"))
+        self.assertEqual(self.balance().entry_count, 2)
+
+    def test_incremental_run_matches_full_run(self):
+        materialize_balances()
+        self.entry(Kind.TRANSFERRED, "-4", minutes_ago=2)
+        with override_settings(ASSET_BALANCE_LAG_SECONDS=0):
+            materialize_balances()
+            incremental = AssetBalance.objects.get(asset=self.asset)
+            materialize_balances(full=True)
+        full = AssetBalance.objects.get(asset=self.asset)
+        self.assertEqual(incremental.on_hand_quantity, Decimal("6"))
+        self.assertEqual((full.on_hand_quantity, full.entry_count), (Decimal("6"), 2))
+
+    def test_point_in_time_balance(self):
+        self.entry(Kind.TRANSFERRED, "-4", minutes_ago=10)
+        self.assertEqual(self.balance(at=timezone.now() - timedelta(minutes=30)).on_hand, Decimal("10"))
+
+    def test_repeated_source_is_ignored(self):
+        self.entry(Kind.TRANSFERRED, "-1", source_type="transfer_item", source_id=7)
+        self.entry(Kind.TRANSFERRED, "-1", source_type="transfer_item", source_id=7)
+        self.assertEqual(self.balance().transferred, Decimal("1"))
+
+    def test_as_dict_has_fixed_scale(self):
+        materialize_balances()
+        self.assertEqual(self.balance().as_dict()["received_quantity"], "10.000")
+        self.assertEqual(LedgerBalance(received=Decimal("10")).as_dict()["on_hand_quantity"], "10.000")
+
+
+class AssetScanTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin@example.com", "pw"))
+        Asset.objects.create(name="Scope", quantity=Decimal("1"), tag="A-1")
+
+    def test_blank_codes_are_skipped(self):
+        response = self.client.post("/api/assets/scan/", {"codes": ["A-1", "", " A-1 ", "B-2"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["counts"], {"matched": 1, "transferred": 0, "disposed": 0, "unknown": 1})
+        self.assertEqual(response.data["unknown"], ["B-2"])
+
+    def test_overlong_code_is_rejected(self):
+        response = self.client.post("/api/assets/scan/", {"codes": ["x" * 101]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class AssetExportTests(TestCase):
+    url = "/api/assets/export/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser("admin@example.com", "pw")
+        self.owner = User.objects.create_user("owner@example.com", "pw")
+        for i in range(7):
+            Asset.objects.create(
+                name=f"Scope {i}",
+                category="Lab" if i % 2 else "Office",
+                vendor="Acme",
+                quantity=Decimal("2"),
+                created_by=self.owner if i < 2 else self.admin,
+                data={"serial": f"S-{i}"},
+            )
+        Asset.objects.filter(name="Scope 6").update(status=Asset.Status.DISPOSED)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, **params) -> str:
+        with mock.patch.object(exporters, "EXPORT_CHUNK_SIZE", 2):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            body = b"".join(response.streaming_content).decode()
+        self.assertIn("attachment;", response["Content-Disposition"])
+        return body
+
+    def csv_rows(self, **params) -> list[dict]:
+        return list(csv.DictReader(io.StringIO(self.export(export_format="csv", **params))))
+
+    def jsonl_rows(self, **params) -> list[dict]:
+        return [json.loads(line) for line in self.export(export_format="jsonl", **params).splitlines()]
+
+    def test_every_row_is_streamed_across_chunks(self):
+        ids = list(Asset.objects.order_by("id").values_list("id", flat=True))
+        rows = self.csv_rows()
+        self.assertEqual([int(row["id"]) for row in rows], ids)
+        self.assertEqual(list(rows[0]), exporters.EXPORT_FIELDS)
+        self.assertEqual(json.loads(rows[0]["data"]), {"serial": "S-0"})
+        self.assertEqual(rows[0]["created_by_email"], "owner@example.com")
+
+        lines = self.jsonl_rows()
+        self.assertEqual([row["id"] for row in lines], ids)
+        self.assertEqual(lines[0]["available_quantity"], "2.000")
+
+    def test_list_filters_apply(self):
+        lab = [row["name"] for row in self.csv_rows(category="lab")]
+        self.assertEqual(lab, ["Scope 1", "Scope 3", "Scope 5"])
+        active = [row["name"] for row in self.jsonl_rows(status="active", category="office")]
+        self.assertEqual(active, ["Scope 0", "Scope 2", "Scope 4"])
+
+    def test_non_privileged_user_exports_own_assets_only(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual([row["name"] for row in self.jsonl_rows()], ["Scope 0", "Scope 1"])
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"export_format": "xlsx"}).status_code, 400)
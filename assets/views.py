@@ -1,14 +1,43 @@
 from __future__ import annotations
 
+from datetime import datetime, time
+
+from django.db import transaction
 from django.db.models import Q
-from rest_framework import permissions, viewsets
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from boms.permissions import has_role
 from core.pagination import StandardResultsSetPagination
 
-from .models import Asset
+from .exporters import iter_assets_csv, iter_assets_jsonl
+from .ledger import ledger_balances
+from .models import Asset, AssetLedgerEntry
 from .permissions import IsProcurementOrAdmin
-from .serializers import AssetSerializer, AssetUpdateSerializer
+from .serializers import AssetLedgerEntrySerializer, AssetScanSerializer, AssetSerializer, AssetUpdateSerializer
+from .services import record_asset_created, record_asset_update, resolve_scanned_tags
+
+
+def _parse_dt(value: str | None, *, end_of_day: bool = False):
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is not None:
+        if timezone.is_naive(dt):
+            dt = timezone.make_aware(dt)
+        return dt
+    d = parse_date(value)
+    if not d:
+        return None
+    t = time.max if end_of_day else time.min
+    dt = datetime.combine(d, t)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
 
 
 class AssetViewSet(viewsets.ModelViewSet):
@@ -22,7 +51,7 @@ class AssetViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        qs = Asset.objects.select_related("source_bom_item", "source_po_item", "created_by")
+        qs = Asset.objects.select_related("source_bom_item", "source_po_item", "created_by", "reservation")
         if not (has_role(user, "admin") or has_role(user, "procurement")):
             qs = qs.filter(Q(source_bom_item__bom__owner=user) | Q(created_by=user))
 
@@ -46,6 +75,10 @@ class AssetViewSet(viewsets.ModelViewSet):
             except Exception:
                 pass
 
+        tag = params.get("tag")
+        if tag:
+            qs = qs.filter(tag=tag.strip())
+
         category = params.get("category")
         if category:
             qs = qs.filter(category__icontains=category)
@@ -64,3 +97,97 @@ class AssetViewSet(viewsets.ModelViewSet):
         if self.action in {"update", "partial_update"}:
             return AssetUpdateSerializer
         return AssetSerializer
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            asset = serializer.save()
+            record_asset_created(asset, actor=self.request.user)
+
+    def perform_update(self, serializer):
+        previous_quantity = serializer.instance.quantity
+        previous_status = serializer.instance.status
+        with transaction.atomic():
+            asset = serializer.save()
+            record_asset_update(
+                asset, previous_quantity=previous_quantity, previous_status=previous_status, actor=self.request.user
+            )
+
+    @action(detail=True, methods=["get"], url_path="ledger")
+    def ledger(self, request, pk=None):
+        asset: Asset = self.get_object()
+        params = request.query_params
+        qs = AssetLedgerEntry.objects.filter(asset=asset).select_related("created_by")
+        date_from = _parse_dt(params.get("from"))
+        if date_from:
+            qs = qs.filter(created_at__gte=date_from)
+        date_to = _parse_dt(params.get("to"), end_of_day=True)
+        if date_to:
+            qs = qs.filter(created_at__lte=date_to)
+        kind = params.get("kind")
+        if kind:
+            qs = qs.filter(kind__in=[k.strip().upper() for k in kind.split(",") if k.strip()])
+        page = self.paginate_queryset(qs.order_by("-created_at", "-id"))
+        return self.get_paginated_response(AssetLedgerEntrySerializer(page, many=True).data)
+
+    def _balance_at(self, request):
+        value = request.query_params.get("at")
+        at = _parse_dt(value, end_of_day=True)
+        if value and at is None:
+            raise ValueError("at must be an ISO date or datetime.")
+        return at
+
+    @action(detail=True, methods=["get"], url_path="balance")
+    def balance(self, request, pk=None):
+        asset: Asset = self.get_object()
+        try:
+            at = self._balance_at(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        balance = ledger_balances([asset.id], at=at)[asset.id]
+        return Response({"asset_id": asset.id, "at": at.isoformat() if at else None, **balance.as_dict()})
+
+    @action(detail=False, methods=["get"], url_path="balances")
+    def balances(self, request):
+        try:
+            at = self._balance_at(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        page = self.paginate_queryset(self.get_queryset().select_related(None).only("id", "name", "unit"))
+        balances = ledger_balances([asset.id for asset in page], at=at)
+        return self.get_paginated_response(
+            [
+                {"asset_id": asset.id, "name": asset.name, "unit": asset.unit, **balances[asset.id].as_dict()}
+                for asset in page
+            ]
+        )
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        # `format` is taken by DRF's format suffix override, hence `export_format`.
+        export_format = (request.query_params.get("export_format") or "csv").lower()
+        exporters = {
+            "csv": (iter_assets_csv, "text/csv"),
+            "jsonl": (iter_assets_jsonl, "application/x-ndjson"),
+        }
+        if export_format not in exporters:
+            return Response({"detail": "Unsupported export format."}, status=status.HTTP_400_BAD_REQUEST)
+        exporter, content_type = exporters[export_format]
+        qs = self.get_queryset().order_by("id")
+        response = StreamingHttpResponse(exporter(qs), content_type=content_type)
+        filename = f"assets-{timezone.localdate().isoformat()}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="scan")
+    def scan(self, request):
+        serializer = AssetScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = resolve_scanned_tags(self.get_queryset(), serializer.validated_data["codes"])
+        data = {
+            bucket: AssetSerializer(assets, many=True).data
+            for bucket, assets in result.items()
+            if bucket != "unknown"
+        }
+        data["unknown"] = result["unknown"]
+        data["counts"] = {bucket: len(values) for bucket, values in result.items()}
+        return Response(data, status=status.HTTP_200_OK)
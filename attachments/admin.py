@@ -2,10 +2,22 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import Attachment
+from .models import Attachment, AttachmentBlob, UploadSession
 
 
 @admin.register(Attachment)
 class AttachmentAdmin(admin.ModelAdmin):
     list_display = ("id", "file_name", "owner", "bom", "purchase_order", "created_at")
     search_fields = ("file_name", "owner__email")
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "file_name", "owner", "status", "received_bytes", "size_bytes", "updated_at")
+    list_filter = ("status",)
+
+
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha256", "size_bytes", "ref_count", "updated_at")
+    search_fields = ("sha256",)
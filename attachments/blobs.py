@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from boms.permissions import has_role
+
+from .models import Attachment, AttachmentBlob
+
+BLOB_ROOT = "attachments/blobs"
+ADOPT_BATCH_SIZE = 500
+_READ_BLOCK_SIZE = 64 * 1024
+
+
+def _add_reference(blob_id: int) -> None:
+    AttachmentBlob.objects.filter(pk=blob_id).update(ref_count=F("ref_count") + 1, updated_at=timezone.now())
+
+
+def store_blob(*, sha256: str, size_bytes: int, file_name: str, content: File | None = None) -> AttachmentBlob:
+    """
+    Return the blob for `sha256` with one more reference, storing `content`
+    only when no blob has that hash yet.
+
+    The blob row is locked while the reference is added, so it can't be
+    garbage-collected underneath the caller. Call inside the transaction that
+    creates the referencing Attachment. The file is written before the row is
+    inserted; if that transaction rolls back, sweep_orphan_files removes it.
+    """
+    blob = AttachmentBlob.objects.select_for_update().filter(sha256=sha256).first()
+    if blob is not None:
+        _add_reference(blob.pk)
+        return blob
+    if content is None:
+        raise AttachmentBlob.DoesNotExist(sha256)
+
+    blob = AttachmentBlob(sha256=sha256, size_bytes=size_bytes, ref_count=1)
+    blob.file.save(file_name, content, save=False)
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # A concurrent upload of the same content stored it first; use theirs.
+        blob.file.delete(save=False)
+        blob = AttachmentBlob.objects.select_for_update().get(sha256=sha256)
+        _add_reference(blob.pk)
+    return blob
+
+
+def reusable_blob(user, *, sha256: str, size_bytes: int) -> AttachmentBlob | None:
+    """
+    The stored blob an upload of `sha256` can skip to, if the caller may use it.
+
+    Knowing a hash must not be enough to obtain someone else's file, so
+    outside procurement/admin the caller needs an attachment of their own with
+    the same content.
+    """
+    blob = AttachmentBlob.objects.filter(sha256=sha256.lower(), size_bytes=size_bytes).first()
+    if blob is None:
+        return None
+    if has_role(user, "admin") or has_role(user, "procurement"):
+        return blob
+    if Attachment.objects.filter(blob=blob, owner=user).exists():
+        return blob
+    return None
+
+
+def release_blob(blob_id: int) -> None:
+    AttachmentBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def recount_references() -> int:
+    """
+    Correct `ref_count` wherever it disagrees with the attachments pointing at
+    the blob. Returns the number of blobs fixed.
+    """
+    actual = Coalesce(
+        Subquery(
+            Attachment.objects.filter(blob=OuterRef("pk")).values("blob").annotate(n=Count("id")).values("n")[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+    drifted = AttachmentBlob.objects.annotate(actual=actual).filter(~Q(ref_count=F("actual")))
+    return AttachmentBlob.objects.filter(pk__in=drifted.values("pk")).update(ref_count=actual)
+
+
+def collect_garbage(*, grace_hours: int = 1, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Delete blobs with no attachments that haven't been referenced for
+    `grace_hours`, and their files. Returns (blobs, bytes) removed.
+
+    Each candidate is re-checked under a row lock, so a blob an upload is
+    re-using at that moment is kept.
+    """
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    orphaned = Q(ref_count=0, updated_at__lt=cutoff) & ~Exists(Attachment.objects.filter(blob=OuterRef("pk")))
+    candidates = list(AttachmentBlob.objects.filter(orphaned).values_list("pk", flat=True))
+    if dry_run:
+        size = sum(AttachmentBlob.objects.filter(pk__in=candidates).values_list("size_bytes", flat=True))
+        return len(candidates), size
+
+    removed = removed_bytes = 0
+    for pk in candidates:
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(orphaned, pk=pk).first()
+            if blob is None:
+                continue
+            blob.delete()
+        # The row is gone for good; only now drop the file.
+        blob.file.delete(save=False)
+        removed += 1
+        removed_bytes += blob.size_bytes
+    return removed, removed_bytes
+
+
+def _blob_directories():
+    # Blob paths are BLOB_ROOT/<aa>/<bb>/<sha256><ext>.
+    if not default_storage.exists(BLOB_ROOT):
+        return
+    for first in default_storage.listdir(BLOB_ROOT)[0]:
+        for second in default_storage.listdir(f"{BLOB_ROOT}/{first}")[0]:
+            yield f"{BLOB_ROOT}/{first}/{second}"
+
+
+def sweep_orphan_files(*, grace_hours: int = 1, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Delete files under BLOB_ROOT that no blob row points at and that are older
+    than `grace_hours`, e.g. written by an upload whose transaction rolled
+    back. Returns (files, bytes) removed.
+
+    Reads one directory listing and one query per hash-prefix directory; the
+    grace period keeps files whose row isn't committed yet.
+    """
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    removed = removed_bytes = 0
+    for directory in _blob_directories():
+        files = default_storage.listdir(directory)[1]
+        if not files:
+            continue
+        known = set(AttachmentBlob.objects.filter(file__startswith=f"{directory}/").values_list("file", flat=True))
+        for file_name in files:
+            name = f"{directory}/{file_name}"
+            if name in known or default_storage.get_modified_time(name) >= cutoff:
+                continue
+            removed_bytes += default_storage.size(name)
+            removed += 1
+            if not dry_run:
+                default_storage.delete(name)
+    return removed, removed_bytes
+
+
+@dataclass
+class AdoptResult:
+    adopted: int = 0
+    deduplicated: int = 0
+    missing: int = 0
+    bytes_freed: int = 0
+
+
+def _hash_stored_file(name: str) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with default_storage.open(name, "rb") as handle:
+        for block in iter(lambda: handle.read(_READ_BLOCK_SIZE), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def adopt_legacy_files(*, dry_run: bool = False) -> AdoptResult:
+    """
+    Move attachments stored before content addressing (no blob) onto blobs.
+
+    Each file is hashed and stored as (or matched to) a blob, the attachment
+    is repointed at it in its own transaction, and the old file is deleted
+    once nothing refers to it. Attachments whose file is gone are counted as
+    missing and left alone. With `dry_run` only the candidates are counted,
+    as `adopted`, without reading any file.
+    """
+    result = AdoptResult()
+    legacy = Attachment.objects.filter(blob__isnull=True).exclude(file="")
+    if dry_run:
+        result.adopted = legacy.count()
+        return result
+
+    last_pk = 0
+    while True:
+        batch = list(legacy.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "file")[:ADOPT_BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        for pk, old_name in batch:
+            if not default_storage.exists(old_name):
+                result.missing += 1
+                continue
+            sha256, size = _hash_stored_file(old_name)
+            with transaction.atomic():
+                attachment = Attachment.objects.select_for_update().filter(pk=pk, blob__isnull=True).first()
+                if attachment is None:
+                    continue
+                shared = AttachmentBlob.objects.filter(sha256=sha256).exists()
+                with default_storage.open(old_name, "rb") as handle:
+                    blob = store_blob(sha256=sha256, size_bytes=size, file_name=old_name, content=File(handle))
+                attachment.blob = blob
+                attachment.sha256 = sha256
+                attachment.size_bytes = size
+                attachment.file.name = blob.file.name
+                attachment.save(update_fields=["blob", "sha256", "size_bytes", "file"])
+            result.adopted += 1
+            result.deduplicated += int(shared)
+            if old_name != blob.file.name and not Attachment.objects.filter(file=old_name).exists():
+                default_storage.delete(old_name)
+                result.bytes_freed += size
+    return result
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from attachments.blobs import adopt_legacy_files, collect_garbage, recount_references, sweep_orphan_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Correct attachment blob reference counts, then delete blobs (and files) no attachment uses, "
+        "and blob files left without a row. Run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours", type=int, default=1, help="Keep unreferenced blobs this long after their last use."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted.")
+        parser.add_argument(
+            "--adopt",
+            action="store_true",
+            help="First hash attachments stored before content addressing into blobs (one-off after upgrading).",
+        )
+
+    def handle(self, *args, **options):
+        if options["adopt"]:
+            adopted = adopt_legacy_files(dry_run=options["dry_run"])
+            if options["dry_run"]:
+                self.stdout.write(f"Attachments without a blob: {adopted.adopted}")
+            else:
+                self.stdout.write(
+                    f"Attachments adopted: {adopted.adopted} ({adopted.deduplicated} into existing blobs, "
+                    f"{adopted.bytes_freed} bytes freed); files missing: {adopted.missing}"
+                )
+        fixed = 0 if options["dry_run"] else recount_references()
+        removed, size = collect_garbage(grace_hours=options["grace_hours"], dry_run=options["dry_run"])
+        orphans, orphan_size = sweep_orphan_files(grace_hours=options["grace_hours"], dry_run=options["dry_run"])
+        verb = "would be removed" if options["dry_run"] else "removed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Attachment blobs {verb}: {removed} ({size} bytes); orphan files {verb}: {orphans} "
+                f"({orphan_size} bytes); reference counts fixed: {fixed}"
+            )
+        )
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from attachments.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished chunked uploads (and their partial files) idle for longer than the expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=None, help="Idle hours before purging (default ATTACHMENT_UPLOAD_EXPIRY_HOURS)."
+        )
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads(hours=options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Upload sessions purged: {count}"))
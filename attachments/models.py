@@ -1,15 +1,50 @@
 from __future__ import annotations
 
+import uuid
+from pathlib import Path
+
 from django.conf import settings
 from django.db import models
 
 
+def blob_upload_to(instance: AttachmentBlob, filename: str) -> str:
+    # Content-addressed: the path is the hash (plus the first upload's extension).
+    suffix = Path(filename).suffix.lower()[:10]
+    sha = instance.sha256
+    return f"attachments/blobs/{sha[:2]}/{sha[2:4]}/{sha}{suffix}"
+
+
+class AttachmentBlob(models.Model):
+    """
+    One stored file per distinct content. Attachments with the same SHA-256
+    point at the same blob; `ref_count` counts them and `gc_attachment_blobs`
+    deletes blobs nothing refers to any more.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_upload_to, max_length=255)
+    size_bytes = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["ref_count", "updated_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.sha256} ({self.ref_count} refs)"
+
+
 class Attachment(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="attachments")
     file = models.FileField(upload_to="attachments/%Y/%m/%d")
     file_name = models.CharField(max_length=255, blank=True)
     content_type = models.CharField(max_length=100, blank=True)
     size_bytes = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    blob = models.ForeignKey(
+        AttachmentBlob, on_delete=models.PROTECT, null=True, blank=True, related_name="attachments"
+    )
 
     bom = models.ForeignKey("boms.Bom", on_delete=models.SET_NULL, null=True, blank=True, related_name="attachments")
     purchase_order = models.ForeignKey(
@@ -29,4 +64,43 @@ class Attachment(models.Model):
     def __str__(self) -> str:
         return self.file_name or f"Attachment {self.pk}"
 
-# Create your models here.
+
+class UploadSession(models.Model):
+    """
+    A chunked upload in progress. Chunks are appended to `part_path`; the
+    Attachment is created from it on finalize.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = "ACTIVE", "Active"
+        COMPLETED = "COMPLETED", "Completed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size_bytes = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
+
+    bom = models.ForeignKey("boms.Bom", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    purchase_order = models.ForeignKey(
+        "purchase_orders.PurchaseOrder", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    bill = models.ForeignKey("bills.Bill", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    attachment = models.OneToOneField(
+        Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name="upload_session"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    @property
+    def part_path(self) -> Path:
+        return Path(settings.ATTACHMENT_UPLOAD_DIR) / f"{self.id}.part"
+
+    def __str__(self) -> str:
+        return f"{self.file_name} ({self.received_bytes}/{self.size_bytes})"
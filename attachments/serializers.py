@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from .models import Attachment
+from .models import Attachment, UploadSession
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
@@ -18,12 +18,22 @@ class AttachmentSerializer(serializers.ModelSerializer):
             "file_name",
             "content_type",
             "size_bytes",
+            "sha256",
             "bom",
             "purchase_order",
             "bill",
             "created_at",
         )
-        read_only_fields = ("id", "owner", "file_url", "file_name", "content_type", "size_bytes", "created_at")
+        read_only_fields = (
+            "id",
+            "owner",
+            "file_url",
+            "file_name",
+            "content_type",
+            "size_bytes",
+            "sha256",
+            "created_at",
+        )
 
     def get_file_url(self, obj):
         request = self.context.get("request")
@@ -38,4 +48,33 @@ class AttachmentSerializer(serializers.ModelSerializer):
 class AttachmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attachment
-        fields = ("file", "bom", "purchase_order", "bill")
+        fields = ("id", "file", "bom", "purchase_order", "bill")
+        read_only_fields = ("id",)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    # Hash of the whole file; lets the upload be skipped when the content is already stored.
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", write_only=True, required=False, allow_blank=True)
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id",
+            "file_name",
+            "content_type",
+            "size_bytes",
+            "received_bytes",
+            "status",
+            "bom",
+            "purchase_order",
+            "bill",
+            "attachment",
+            "sha256",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("id", "received_bytes", "status", "attachment", "created_at", "updated_at")
+
+
+class UploadFinalizeSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True)
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .blobs import release_blob
+from .models import Attachment
+
+
+@receiver(post_delete, sender=Attachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    # Covers cascades (owner, BOM deletion) as well as the API's DELETE.
+    if instance.blob_id:
+        release_blob(instance.blob_id)
@@ -1,3 +1,234 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+import hashlib
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from .blobs import adopt_legacy_files, collect_garbage, recount_references, store_blob, sweep_orphan_files
+from .models import Attachment, AttachmentBlob, UploadSession
+from .uploads import (
+    UploadError,
+    UploadOffsetMismatch,
+    _hashers,
+    finalize_upload,
+    parse_content_range,
+    start_upload,
+    write_chunk,
+)
+
+CONTENT = b"quote for 12 valves\n"
+SHA = hashlib.sha256(CONTENT).hexdigest()
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=self.media_root, ATTACHMENT_UPLOAD_DIR=str(Path(self.media_root) / "uploads")
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw")
+
+
+class AttachmentBlobTests(MediaRootMixin, TestCase):
+    def attach(self) -> Attachment:
+        with transaction.atomic():
+            blob = store_blob(sha256=SHA, size_bytes=len(CONTENT), file_name="quote.txt", content=ContentFile(CONTENT))
+            attachment = Attachment(owner=self.user, file_name="quote.txt", size_bytes=len(CONTENT), blob=blob)
+            attachment.file.name = blob.file.name
+            attachment.save()
+        return attachment
+
+    def test_same_content_is_stored_once(self):
+        first, second = self.attach(), self.attach()
+        self.assertEqual(first.blob_id, second.blob_id)
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(len(default_storage.listdir(str(Path(blob.file.name).parent))[1]), 1)
+
+    def test_deleting_attachments_releases_the_blob(self):
+        first, second = self.attach(), self.attach()
+        first.delete()
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 1)
+        self.assertEqual(collect_garbage(grace_hours=0), (0, 0))
+        second.delete()
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual(blob.ref_count, 0)
+        self.assertEqual(collect_garbage(grace_hours=0, dry_run=True), (1, len(CONTENT)))
+        self.assertEqual(collect_garbage(grace_hours=0), (1, len(CONTENT)))
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.file.name))
+
+    def test_grace_period_keeps_recently_released_blobs(self):
+        self.attach().delete()
+        self.assertEqual(collect_garbage(grace_hours=1), (0, 0))
+
+    def test_recount_fixes_drift(self):
+        attachment = self.attach()
+        AttachmentBlob.objects.update(ref_count=5)
+        self.assertEqual(recount_references(), 1)
+        self.assertEqual(AttachmentBlob.objects.get(pk=attachment.blob_id).ref_count, 1)
+        self.assertEqual(recount_references(), 0)
+
+    def test_file_from_rolled_back_store_is_swept(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                blob = store_blob(
+                    sha256=SHA, size_bytes=len(CONTENT), file_name="quote.txt", content=ContentFile(CONTENT)
+                )
+                raise RuntimeError
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertTrue(default_storage.exists(blob.file.name))
+        self.assertEqual(sweep_orphan_files(grace_hours=1), (0, 0))
+        self.assertEqual(sweep_orphan_files(grace_hours=0, dry_run=True), (1, len(CONTENT)))
+        self.assertEqual(sweep_orphan_files(grace_hours=0), (1, len(CONTENT)))
+        self.assertFalse(default_storage.exists(blob.file.name))
+
+    def test_sweep_keeps_files_with_a_row(self):
+        attachment = self.attach()
+        self.assertEqual(sweep_orphan_files(grace_hours=0), (0, 0))
+        self.assertTrue(default_storage.exists(attachment.blob.file.name))
+
+
+class AdoptLegacyFilesTests(MediaRootMixin, TestCase):
+    def legacy(self, content: bytes | None, name: str = "quote.txt") -> Attachment:
+        attachment = Attachment(owner=self.user, file_name=name)
+        if content is None:
+            attachment.file.name = f"attachments/2024/01/01/{name}"
+            attachment.save()
+        else:
+            attachment.file.save(name, ContentFile(content))
+        return attachment
+
+    def test_legacy_files_are_hashed_into_shared_blobs(self):
+        first, second = self.legacy(CONTENT), self.legacy(CONTENT)
+        other = self.legacy(b"invoice\n", "invoice.txt")
+        gone = self.legacy(None, "gone.txt")
+        old_names = [first.file.name, second.file.name, other.file.name]
+
+        self.assertEqual(adopt_legacy_files(dry_run=True).adopted, 4)
+        result = adopt_legacy_files()
+        self.assertEqual((result.adopted, result.deduplicated, result.missing), (3, 1, 1))
+        self.assertEqual(result.bytes_freed, 2 * len(CONTENT) + len(b"invoice\n"))
+
+        self.assertEqual(
+            dict(AttachmentBlob.objects.values_list("sha256", "ref_count")),
+            {SHA: 2, hashlib.sha256(b"invoice\n").hexdigest(): 1},
+        )
+        first.refresh_from_db()
+        self.assertEqual((first.sha256, first.size_bytes, first.file.name), (SHA, len(CONTENT), first.blob.file.name))
+        self.assertFalse(any(default_storage.exists(name) for name in old_names))
+        gone.refresh_from_db()
+        self.assertIsNone(gone.blob_id)
+        # A second run finds only the attachment whose file is missing.
+        self.assertEqual((adopt_legacy_files().adopted, recount_references()), (0, 0))
+
+    def test_command_reports_adoption(self):
+        self.legacy(CONTENT)
+        out = io.StringIO()
+        call_command("gc_attachment_blobs", "--adopt", stdout=out)
+        self.assertIn("Attachments adopted: 1 (0 into existing blobs", out.getvalue())
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 1)
+
+
+class ChunkedUploadTests(MediaRootMixin, TestCase):
+    def start(self, **kwargs) -> UploadSession:
+        return start_upload(owner=self.user, file_name="quote.txt", size_bytes=len(CONTENT), **kwargs)
+
+    def send(self, session, start, end):
+        return write_chunk(
+            session_id=session.pk, stream=io.BytesIO(CONTENT[start:end]), start=start, end=end, total=len(CONTENT)
+        )
+
+    def test_parse_content_range(self):
+        self.assertEqual(parse_content_range("bytes 0-9/20"), (0, 10, 20))
+        self.assertEqual(parse_content_range("bytes 10-19/*"), (10, 20, None))
+        for value in ("bytes 5-4/20", "0-9/20", None):
+            with self.assertRaises(UploadError):
+                parse_content_range(value)
+
+    def test_chunks_must_continue_at_the_stored_offset(self):
+        session = self.start()
+        self.send(session, 0, 8)
+        with self.assertRaises(UploadOffsetMismatch) as caught:
+            self.send(session, 10, 15)
+        self.assertEqual(caught.exception.offset, 8)
+        # Resending an earlier chunk is a mismatch too; nothing is overwritten.
+        with self.assertRaises(UploadOffsetMismatch):
+            self.send(session, 0, 8)
+        self.assertEqual(session.part_path.stat().st_size, 8)
+
+    def test_short_body_leaves_the_offset_unchanged(self):
+        session = self.start()
+        with self.assertRaises(UploadError):
+            write_chunk(session_id=session.pk, stream=io.BytesIO(CONTENT[:3]), start=0, end=8, total=len(CONTENT))
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).received_bytes, 0)
+        self.assertEqual(session.part_path.stat().st_size, 0)
+
+    def test_resume_after_losing_the_hash_state(self):
+        session = self.start()
+        self.send(session, 0, 8)
+        _hashers.clear()
+        self.send(session, 8, len(CONTENT))
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment = finalize_upload(session_id=session.pk, expected_sha256=SHA)
+        self.assertEqual(attachment.sha256, SHA)
+        with attachment.file.open("rb") as fh:
+            self.assertEqual(fh.read(), CONTENT)
+        self.assertFalse(session.part_path.exists())
+        self.assertEqual(finalize_upload(session_id=session.pk).pk, attachment.pk)
+
+    def test_hash_mismatch_keeps_the_upload(self):
+        session = self.start()
+        self.send(session, 0, len(CONTENT))
+        with self.assertRaises(UploadError):
+            finalize_upload(session_id=session.pk, expected_sha256="0" * 64)
+        self.assertTrue(session.part_path.exists())
+        self.assertEqual(finalize_upload(session_id=session.pk, expected_sha256=SHA).sha256, SHA)
+
+    def test_finalize_needs_every_byte(self):
+        session = self.start()
+        self.send(session, 0, 8)
+        with self.assertRaises(UploadOffsetMismatch):
+            finalize_upload(session_id=session.pk)
+
+    def test_failed_finalize_can_be_retried(self):
+        session = self.start()
+        self.send(session, 0, len(CONTENT))
+        with mock.patch("attachments.uploads._create_attachment", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                finalize_upload(session_id=session.pk)
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSession.Status.ACTIVE)
+        self.assertEqual(session.part_path.read_bytes(), CONTENT)
+        self.assertEqual(finalize_upload(session_id=session.pk).sha256, SHA)
+
+    def test_known_content_skips_the_transfer(self):
+        session = self.start()
+        self.send(session, 0, len(CONTENT))
+        first = finalize_upload(session_id=session.pk)
+        again = self.start(sha256=SHA)
+        self.assertEqual(again.status, UploadSession.Status.COMPLETED)
+        self.assertEqual(again.attachment.blob_id, first.blob_id)
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 2)
+
+    def test_unknown_owner_cannot_claim_content_by_hash(self):
+        session = self.start()
+        self.send(session, 0, len(CONTENT))
+        finalize_upload(session_id=session.pk)
+        other = get_user_model().objects.create_user("other@example.com", "pw")
+        session = start_upload(owner=other, file_name="q.txt", size_bytes=len(CONTENT), sha256=SHA)
+        self.assertEqual(session.status, UploadSession.Status.ACTIVE)
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .blobs import reusable_blob, store_blob
+from .models import Attachment, AttachmentBlob, UploadSession
+
+READ_BLOCK_SIZE = 64 * 1024
+MAX_CACHED_HASHERS = 256
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadOffsetMismatch(UploadError):
+    """
+    The chunk doesn't start where the stored file ends; the client should
+    resume from `offset`.
+    """
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at byte {offset}.")
+        self.offset = offset
+
+
+# SHA-256 state of in-progress uploads, keyed by session id: (offset, hasher).
+# hashlib objects can't be stored, so the state only lives in this process; if
+# a chunk lands on another worker the entry is dropped and finalize re-hashes
+# the file once.
+_hashers: OrderedDict[str, tuple[int, object]] = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+def _take_hasher(session_id: str, offset: int):
+    with _hashers_lock:
+        entry = _hashers.pop(session_id, None)
+    if offset == 0:
+        return hashlib.sha256()
+    if entry is not None and entry[0] == offset:
+        return entry[1]
+    return None
+
+
+def _keep_hasher(session_id: str, offset: int, hasher) -> None:
+    with _hashers_lock:
+        _hashers[session_id] = (offset, hasher)
+        while len(_hashers) > MAX_CACHED_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _drop_hasher(session_id: str) -> None:
+    with _hashers_lock:
+        _hashers.pop(session_id, None)
+
+
+def parse_content_range(value: str | None) -> tuple[int, int, int | None]:
+    """
+    Parse `bytes <start>-<end>/<total>` into (start, end exclusive, total).
+    """
+    match = _CONTENT_RANGE.match((value or "").strip())
+    if not match:
+        raise UploadError("Content-Range header must be 'bytes <start>-<end>/<total>'.")
+    start, last = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == "*" else int(match.group(3))
+    if last < start:
+        raise UploadError("Content-Range end is before its start.")
+    return start, last + 1, total
+
+
+def _create_attachment(session: UploadSession, blob: AttachmentBlob) -> Attachment:
+    attachment = Attachment(
+        owner=session.owner,
+        file_name=session.file_name,
+        content_type=session.content_type,
+        size_bytes=session.size_bytes,
+        sha256=blob.sha256,
+        blob=blob,
+        bom=session.bom,
+        purchase_order=session.purchase_order,
+        bill=session.bill,
+    )
+    attachment.file.name = blob.file.name
+    attachment.save()
+    session.status = UploadSession.Status.COMPLETED
+    session.received_bytes = session.size_bytes
+    session.attachment = attachment
+    session.save(update_fields=["status", "received_bytes", "attachment", "updated_at"])
+    return attachment
+
+
+def start_upload(
+    *, owner, file_name: str, size_bytes: int, content_type: str = "", sha256: str = "", **links
+) -> UploadSession:
+    """
+    Open an upload session. When `sha256` names content that is already
+    stored (and the owner may reuse it), the attachment is created right away
+    and the session comes back COMPLETED, so no bytes need to be sent.
+    """
+    if size_bytes <= 0:
+        raise UploadError("size must be positive.")
+    if size_bytes > settings.ATTACHMENT_UPLOAD_MAX_BYTES:
+        raise UploadError(f"size exceeds the {settings.ATTACHMENT_UPLOAD_MAX_BYTES} byte limit.")
+    with transaction.atomic():
+        session = UploadSession.objects.create(
+            owner=owner, file_name=file_name, content_type=content_type, size_bytes=size_bytes, **links
+        )
+        blob = reusable_blob(owner, sha256=sha256, size_bytes=size_bytes) if sha256 else None
+        if blob is not None:
+            try:
+                with transaction.atomic():
+                    blob = store_blob(sha256=blob.sha256, size_bytes=size_bytes, file_name=file_name)
+                    _create_attachment(session, blob)
+                return session
+            except AttachmentBlob.DoesNotExist:
+                # Collected since the lookup; fall back to a normal upload.
+                pass
+    session.part_path.parent.mkdir(parents=True, exist_ok=True)
+    session.part_path.touch()
+    return session
+
+
+def write_chunk(*, session_id, stream, start: int, end: int, total: int | None) -> UploadSession:
+    """
+    Append bytes [start, end) read from `stream` to the session's partial file.
+
+    The body is copied in READ_BLOCK_SIZE blocks, so memory use doesn't depend
+    on the chunk size. The session row is locked for the write; a chunk must
+    start exactly at the bytes already received (UploadOffsetMismatch tells
+    the client where to resume). A short body leaves the session where it was.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        if session.status != UploadSession.Status.ACTIVE:
+            raise UploadError("Upload is already finalized.")
+        if total is not None and total != session.size_bytes:
+            raise UploadError("Content-Range total does not match the upload size.")
+        if end > session.size_bytes:
+            raise UploadError("Chunk goes past the end of the upload.")
+        if end - start > settings.ATTACHMENT_UPLOAD_CHUNK_MAX_BYTES:
+            raise UploadError(f"Chunks are limited to {settings.ATTACHMENT_UPLOAD_CHUNK_MAX_BYTES} bytes.")
+        if start != session.received_bytes:
+            raise UploadOffsetMismatch(session.received_bytes)
+
+        key = str(session.pk)
+        hasher = _take_hasher(key, start)
+        written = 0
+        with open(session.part_path, "r+b") as fh:
+            # Anything past the recorded offset is left over from an interrupted write.
+            fh.truncate(start)
+            fh.seek(start)
+            while written < end - start:
+                block = stream.read(min(READ_BLOCK_SIZE, end - start - written))
+                if not block:
+                    break
+                fh.write(block)
+                if hasher is not None:
+                    hasher.update(block)
+                written += len(block)
+            if written != end - start or stream.read(1):
+                fh.truncate(start)
+                raise UploadError(f"Expected {end - start} bytes, received a different amount.")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        if hasher is not None:
+            _keep_hasher(key, end, hasher)
+        session.received_bytes = end
+        session.save(update_fields=["received_bytes", "updated_at"])
+    return session
+
+
+def _file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class _PartialFile(File):
+    # Lets FileSystemStorage move the file into place instead of copying it.
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+
+def _store_part(session: UploadSession, digest: str) -> AttachmentBlob:
+    # The partial file itself must survive until the transaction commits, so
+    # the storage is handed a hard link to move (or a plain copy where links
+    # aren't possible); a rollback leaves the session resumable as it was.
+    link = session.part_path.with_suffix(".finalizing")
+    link.unlink(missing_ok=True)
+    try:
+        os.link(session.part_path, link)
+    except OSError:
+        link = None
+    try:
+        with open(link or session.part_path, "rb") as fh:
+            content = _PartialFile(fh, name=str(link)) if link else File(fh, name=session.file_name)
+            return store_blob(
+                sha256=digest, size_bytes=session.size_bytes, file_name=session.file_name, content=content
+            )
+    finally:
+        if link:
+            link.unlink(missing_ok=True)
+
+
+def finalize_upload(*, session_id, expected_sha256: str = "") -> Attachment:
+    """
+    Turn a fully received upload into an Attachment.
+
+    Uses the SHA-256 accumulated while chunks were written, or re-hashes the
+    file in one streaming pass when that state was lost (another worker,
+    restart). The partial file's content becomes the blob unless it is already
+    stored; the partial file is only deleted once the transaction commits. A
+    mismatch with `expected_sha256` leaves the upload in place.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        if session.status == UploadSession.Status.COMPLETED and session.attachment_id:
+            return session.attachment
+        if session.received_bytes != session.size_bytes:
+            raise UploadOffsetMismatch(session.received_bytes)
+
+        key = str(session.pk)
+        hasher = _take_hasher(key, session.size_bytes)
+        digest = hasher.hexdigest() if hasher is not None else _file_sha256(session.part_path)
+        if expected_sha256 and expected_sha256.strip().lower() != digest:
+            if hasher is not None:
+                _keep_hasher(key, session.size_bytes, hasher)
+            raise UploadError("SHA-256 does not match the uploaded bytes.")
+
+        blob = _store_part(session, digest)
+        attachment = _create_attachment(session, blob)
+        part_path = session.part_path
+        transaction.on_commit(lambda: part_path.unlink(missing_ok=True))
+    return attachment
+
+
+def abort_upload(session: UploadSession) -> None:
+    _drop_hasher(str(session.pk))
+    session.part_path.unlink(missing_ok=True)
+    session.delete()
+
+
+def purge_stale_uploads(*, hours: int | None = None) -> int:
+    """
+    Delete unfinished uploads not written to for `hours`
+    (ATTACHMENT_UPLOAD_EXPIRY_HOURS by default), and their partial files.
+    """
+    hours = settings.ATTACHMENT_UPLOAD_EXPIRY_HOURS if hours is None else hours
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stale = list(UploadSession.objects.filter(status=UploadSession.Status.ACTIVE, updated_at__lt=cutoff))
+    for session in stale:
+        abort_upload(session)
+    return len(stale)
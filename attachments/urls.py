@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from rest_framework.routers import DefaultRouter
 
-from .views import AttachmentViewSet
+from .views import AttachmentViewSet, UploadSessionViewSet
 
 
 router = DefaultRouter()
+# Before "attachments" so "uploads" isn't read as an attachment id.
+router.register(r"attachments/uploads", UploadSessionViewSet, basename="attachment-uploads")
 router.register(r"attachments", AttachmentViewSet, basename="attachments")
 
 urlpatterns = router.urls
@@ -1,15 +1,34 @@
 from __future__ import annotations
 
+import hashlib
+
+from django.db import transaction
 from rest_framework import permissions, status, viewsets
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
 from boms.permissions import has_role
 from core.pagination import StandardResultsSetPagination
 
-from .models import Attachment
+from .blobs import store_blob
+from .models import Attachment, UploadSession
 from .permissions import CanAccessAttachment
-from .serializers import AttachmentCreateSerializer, AttachmentSerializer
+from .serializers import (
+    AttachmentCreateSerializer,
+    AttachmentSerializer,
+    UploadFinalizeSerializer,
+    UploadSessionSerializer,
+)
+from .uploads import (
+    UploadError,
+    UploadOffsetMismatch,
+    abort_upload,
+    finalize_upload,
+    parse_content_range,
+    start_upload,
+    write_chunk,
+)
 
 
 class AttachmentViewSet(viewsets.ModelViewSet):
@@ -42,20 +61,29 @@ class AttachmentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         file_obj = serializer.validated_data.get("file")
-        content_type = ""
-        size_bytes = 0
-        file_name = ""
-        if file_obj is not None:
-            content_type = getattr(file_obj, "content_type", "") or ""
-            size_bytes = getattr(file_obj, "size", 0) or 0
-            file_name = getattr(file_obj, "name", "") or ""
-
-        serializer.save(
-            owner=self.request.user,
-            content_type=content_type,
-            size_bytes=size_bytes,
-            file_name=file_name,
-        )
+        if file_obj is None:
+            serializer.save(owner=self.request.user)
+            return
+
+        hasher = hashlib.sha256()
+        for chunk in file_obj.chunks():
+            hasher.update(chunk)
+        file_obj.seek(0)
+        sha256 = hasher.hexdigest()
+        size_bytes = getattr(file_obj, "size", 0) or 0
+        file_name = getattr(file_obj, "name", "") or ""
+        with transaction.atomic():
+            # Content already stored under this hash isn't written again.
+            blob = store_blob(sha256=sha256, size_bytes=size_bytes, file_name=file_name, content=file_obj)
+            serializer.save(
+                owner=self.request.user,
+                file=blob.file.name,
+                blob=blob,
+                content_type=getattr(file_obj, "content_type", "") or "",
+                size_bytes=size_bytes,
+                file_name=file_name,
+                sha256=sha256,
+            )
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
@@ -64,3 +92,77 @@ class AttachmentViewSet(viewsets.ModelViewSet):
             if attachment:
                 response.data = AttachmentSerializer(attachment, context={"request": request}).data
         return response
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    Chunked, resumable uploads: POST to start, PUT byte ranges (Content-Range),
+    POST finalize to create the Attachment. GET shows how far an upload got.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser]
+    serializer_class = UploadSessionSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            session = start_upload(
+                owner=request.user,
+                file_name=data["file_name"],
+                size_bytes=data["size_bytes"],
+                content_type=data.get("content_type", ""),
+                sha256=(data.get("sha256") or "").lower(),
+                bom=data.get("bom"),
+                purchase_order=data.get("purchase_order"),
+                bill=data.get("bill"),
+            )
+        except UploadError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data, status=status.HTTP_200_OK)
+
+    def update(self, request, pk=None):
+        session: UploadSession = self.get_object()
+        try:
+            start, end, total = parse_content_range(request.headers.get("Content-Range"))
+            if int(request.headers.get("Content-Length") or 0) != end - start:
+                raise UploadError("Content-Length must match the Content-Range.")
+            session = write_chunk(session_id=session.pk, stream=request.stream, start=start, end=end, total=total)
+        except UploadOffsetMismatch as exc:
+            return Response(
+                {"detail": str(exc), "received_bytes": exc.offset}, status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(session).data, status=status.HTTP_200_OK)
+
+    def destroy(self, request, pk=None):
+        abort_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"], url_path="finalize")
+    def finalize(self, request, pk=None):
+        session: UploadSession = self.get_object()
+        serializer = UploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            attachment = finalize_upload(
+                session_id=session.pk, expected_sha256=serializer.validated_data.get("sha256", "")
+            )
+        except UploadOffsetMismatch as exc:
+            return Response(
+                {"detail": "Upload is incomplete.", "received_bytes": exc.offset}, status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            AttachmentSerializer(attachment, context={"request": request}).data, status=status.HTTP_201_CREATED
+        )
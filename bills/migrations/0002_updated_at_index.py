@@ -0,0 +1,21 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bills', '0001_initial'),
+        ('boms', '0005_updated_at_index'),
+        ('purchase_orders', '0004_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['updated_at'], name='bills_bill_updated_5eb892_idx'),
+        ),
+    ]
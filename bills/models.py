@@ -42,6 +42,7 @@ class Bill(models.Model):
         indexes = [
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["vendor_name"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     def __str__(self) -> str:
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Least
+
+from purchase_orders.models import PurchaseOrder, PurchaseOrderItem
+
+from .models import Bill
+
+_MONEY = DecimalField(max_digits=20, decimal_places=4)
+_ZERO = Decimal("0")
+_PLACES = Decimal("0.01")
+
+# Bills that no longer claim money from the PO.
+INACTIVE_BILL_STATUSES = (Bill.Status.REJECTED, Bill.Status.CANCELED)
+
+
+class MatchStatus:
+    MATCHED = "MATCHED"
+    MISMATCH = "MISMATCH"
+    NO_PO = "NO_PO"
+
+
+@dataclass
+class PurchaseOrderTotals:
+    po_number: str = ""
+    status: str = ""
+    currency: str = ""
+    ordered: Decimal = _ZERO
+    received: Decimal = _ZERO
+    billed: Decimal = _ZERO
+    bill_count: int = 0
+    unpriced_lines: int = 0
+
+
+@dataclass
+class BillMatch:
+    bill_id: int
+    purchase_order_id: int | None
+    amount: Decimal | None
+    currency: str
+    totals: PurchaseOrderTotals | None = None
+    status: str = MatchStatus.MATCHED
+    issues: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        totals = self.totals
+        return {
+            "bill_id": self.bill_id,
+            "purchase_order_id": self.purchase_order_id,
+            "po_number": totals.po_number if totals else None,
+            "po_status": totals.status if totals else None,
+            "bill_amount": str(self.amount) if self.amount is not None else None,
+            "currency": self.currency,
+            "ordered_total": str(totals.ordered.quantize(_PLACES)) if totals else None,
+            "received_total": str(totals.received.quantize(_PLACES)) if totals else None,
+            "billed_total": str(totals.billed.quantize(_PLACES)) if totals else None,
+            "bill_count": totals.bill_count if totals else 0,
+            "status": self.status,
+            "issues": self.issues,
+        }
+
+
+def purchase_order_totals(po_ids: Iterable[int]) -> dict[int, PurchaseOrderTotals]:
+    """
+    Ordered, received and billed value (tax included) per PO in three grouped queries.
+
+    Received value counts each line up to its ordered quantity. Billed value is
+    every active (not rejected / canceled) bill on the PO.
+    """
+    po_ids = set(po_ids)
+    totals = {
+        row["id"]: PurchaseOrderTotals(po_number=row["po_number"], status=row["status"], currency=row["currency"])
+        for row in PurchaseOrder.objects.filter(id__in=po_ids).values("id", "po_number", "status", "currency")
+    }
+    if not totals:
+        return totals
+
+    gross_price = ExpressionWrapper(
+        F("unit_price") * (Value(Decimal("100")) + Coalesce("tax_percent", Value(_ZERO))) / Value(Decimal("100")),
+        output_field=_MONEY,
+    )
+    lines = (
+        PurchaseOrderItem.objects.filter(purchase_order_id__in=totals)
+        .values("purchase_order_id")
+        .annotate(
+            ordered=Sum(ExpressionWrapper(F("quantity") * gross_price, output_field=_MONEY)),
+            received=Sum(
+                ExpressionWrapper(Least("received_quantity", "quantity") * gross_price, output_field=_MONEY)
+            ),
+            unpriced=Count("id", filter=Q(unit_price__isnull=True)),
+        )
+        .order_by()
+    )
+    for row in lines:
+        entry = totals[row["purchase_order_id"]]
+        entry.ordered = row["ordered"] or _ZERO
+        entry.received = row["received"] or _ZERO
+        entry.unpriced_lines = row["unpriced"]
+
+    bills = (
+        Bill.objects.filter(purchase_order_id__in=totals)
+        .exclude(status__in=INACTIVE_BILL_STATUSES)
+        .values("purchase_order_id")
+        .annotate(billed=Sum("amount"), bills=Count("id"))
+        .order_by()
+    )
+    for row in bills:
+        entry = totals[row["purchase_order_id"]]
+        entry.billed = row["billed"] or _ZERO
+        entry.bill_count = row["bills"]
+    return totals
+
+
+def _tolerance(reference: Decimal, *, percent: Decimal, amount: Decimal) -> Decimal:
+    return max(amount, abs(reference) * percent / 100)
+
+
+def match_bills(
+    bills: Iterable[Bill], *, tolerance_percent: Decimal | None = None, tolerance_amount: Decimal | None = None
+) -> list[BillMatch]:
+    """
+    Three-way match: compare what was billed on each bill's PO with what was
+    ordered and received on it.
+
+    A bill is MISMATCH when the PO's billed total exceeds its received value
+    (or ordered value) by more than the tolerance, or when currencies differ;
+    NO_PO when it isn't linked to a PO. Partial billing of received goods is
+    reported as an `under_billed` issue but still MATCHED. Costs three queries
+    for the whole batch.
+    """
+    if tolerance_percent is None:
+        tolerance_percent = Decimal(str(settings.BILL_MATCH_TOLERANCE_PERCENT))
+    if tolerance_amount is None:
+        tolerance_amount = Decimal(str(settings.BILL_MATCH_TOLERANCE_AMOUNT))
+
+    bills = list(bills)
+    totals = purchase_order_totals(bill.purchase_order_id for bill in bills if bill.purchase_order_id)
+    results = []
+    for bill in bills:
+        match = BillMatch(
+            bill_id=bill.id, purchase_order_id=bill.purchase_order_id, amount=bill.amount, currency=bill.currency
+        )
+        results.append(match)
+        po = totals.get(bill.purchase_order_id) if bill.purchase_order_id else None
+        if po is None:
+            match.status = MatchStatus.NO_PO
+            continue
+        match.totals = po
+
+        if bill.amount is None:
+            match.issues.append("missing_amount")
+        if bill.currency and po.currency and bill.currency.upper() != po.currency.upper():
+            match.issues.append("currency_mismatch")
+        if po.status == PurchaseOrder.Status.CANCELED:
+            match.issues.append("po_canceled")
+        if po.billed > po.ordered + _tolerance(po.ordered, percent=tolerance_percent, amount=tolerance_amount):
+            match.issues.append("over_ordered")
+        if po.billed > po.received + _tolerance(po.received, percent=tolerance_percent, amount=tolerance_amount):
+            match.issues.append("over_received")
+        elif po.billed < po.received - _tolerance(po.received, percent=tolerance_percent, amount=tolerance_amount):
+            match.issues.append("under_billed")
+        if po.unpriced_lines:
+            match.issues.append("unpriced_lines")
+
+        blocking = {"missing_amount", "currency_mismatch", "po_canceled", "over_ordered", "over_received"}
+        match.status = MatchStatus.MISMATCH if blocking.intersection(match.issues) else MatchStatus.MATCHED
+    return results
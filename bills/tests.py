@@ -1,3 +1,24 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+
+class BillMatchToleranceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin@example.com", "pw"))
+
+    def test_non_finite_tolerance_is_rejected(self):
+        for value in ("nan", "NaN", "inf", "-Infinity", "sNaN"):
+            response = self.client.get("/api/bills/match/", {"tolerance_percent": value})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_negative_tolerance_is_rejected(self):
+        response = self.client.get("/api/bills/match/", {"tolerance_amount": "-1"})
+        self.assertEqual(response.status_code, 400)
 
-# Create your tests here.
+    def test_valid_tolerance_is_accepted(self):
+        response = self.client.get("/api/bills/match/", {"tolerance_percent": "2.5"})
+        self.assertEqual(response.status_code, 200)
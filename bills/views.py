@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
 
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from boms.permissions import has_role
@@ -13,6 +15,7 @@ from core.pagination import StandardResultsSetPagination
 
 from .models import Bill
 from .serializers import BillCreateSerializer, BillSerializer
+from .services import match_bills
 
 
 def _parse_dt(value: str | None, *, end_of_day: bool = False):
@@ -90,3 +93,23 @@ class BillViewSet(viewsets.ModelViewSet):
         if bill.status not in {Bill.Status.DRAFT, Bill.Status.REJECTED}:
             return Response({"detail": "Bill is not editable."}, status=status.HTTP_400_BAD_REQUEST)
         return super().update(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"], url_path="match")
+    def match(self, request):
+        tolerances = {}
+        for name in ("tolerance_percent", "tolerance_amount"):
+            value = request.query_params.get(name)
+            if value in (None, ""):
+                continue
+            try:
+                tolerances[name] = Decimal(value)
+            except InvalidOperation:
+                return Response({"detail": f"{name} must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+            if not tolerances[name].is_finite():
+                return Response({"detail": f"{name} must be a finite number."}, status=status.HTTP_400_BAD_REQUEST)
+            if tolerances[name] < 0:
+                return Response({"detail": f"{name} must not be negative."}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(self.get_queryset())
+        results = [match.as_dict() for match in match_bills(page, **tolerances)]
+        return self.get_paginated_response(results)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boms', '0003_bomcollaborator_bom_collaborators'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bomitem',
+            index=models.Index(fields=['eta_date'], name='boms_bomite_eta_dat_ae94e0_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boms', '0004_bomitem_eta_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bomitem',
+            index=models.Index(fields=['updated_at'], name='boms_bomite_updated_8b032b_idx'),
+        ),
+    ]
@@ -120,6 +120,8 @@ class BomItem(models.Model):
         indexes = [
             models.Index(fields=["bom", "name"]),
             models.Index(fields=["signoff_assignee", "signoff_status"]),
+            models.Index(fields=["eta_date"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     @property
@@ -155,6 +155,23 @@ class CreateBomItemSerializer(serializers.ModelSerializer):
         return value
 
 
+class CatalogLineSerializer(serializers.Serializer):
+    catalog_item_id = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=Decimal("0.001"), default=Decimal("1"))
+    unit = serializers.CharField(required=False, allow_blank=True, max_length=50, default="")
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class AddItemsFromCatalogSerializer(serializers.Serializer):
+    items = CatalogLineSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class GeneratePurchaseOrdersSerializer(serializers.Serializer):
+    item_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    eta_date = serializers.DateField(required=False, allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+
 class RequestSignoffSerializer(serializers.Serializer):
     assignee_id = serializers.IntegerField()
     item_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
@@ -1,3 +1,87 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from catalog.models import CatalogItem
+
+from .models import Bom, BomEvent, BomItem
+
+
+class AddItemsFromCatalogTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw")
+        self.other = User.objects.create_user("other@example.com", "pw")
+        self.bom = Bom.objects.create(owner=self.owner, title="Rig")
+        self.url = f"/api/boms/{self.bom.id}/items/from-catalog/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def catalog_items(self, count: int, owner=None) -> list[CatalogItem]:
+        return [
+            CatalogItem.objects.create(
+                owner=owner or self.owner,
+                name=f"Part {i}",
+                description="Steel",
+                category="Fasteners",
+                vendor_name="Acme",
+                vendor_url="https://acme.example.com/p",
+                currency="EUR",
+                unit_price=Decimal("2.5") + i,
+                tax_percent=Decimal("19"),
+                data={"sku": f"A-{i}"},
+            )
+            for i in range(count)
+        ]
+
+    def post(self, lines):
+        return self.client.post(self.url, {"items": lines}, format="json")
+
+    def test_items_are_snapshotted_from_the_catalog(self):
+        part = self.catalog_items(1)[0]
+        response = self.post([{"catalog_item_id": part.id, "quantity": "3", "unit": "pcs", "notes": "spare"}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 1)
+
+        item = BomItem.objects.get(bom=self.bom)
+        self.assertEqual((item.name, item.vendor, item.category, item.link), (part.name, "Acme", "Fasteners", part.vendor_url))
+        self.assertEqual((item.quantity, item.unit, item.notes), (Decimal("3"), "pcs", "spare"))
+        self.assertEqual((item.unit_price, item.currency, item.tax_percent), (part.unit_price, "EUR", Decimal("19")))
+        self.assertEqual(item.data["sku"], "A-0")
+        self.assertEqual(item.data["catalog_item_id"], part.id)
+        self.assertIn("catalog_snapshot_at", item.data)
+        self.assertEqual(BomEvent.objects.get(event_type="bom.items_added_from_catalog").data["count"], 1)
+
+        # Later catalog edits do not reach the snapshot.
+        part.unit_price = Decimal("100")
+        part.save()
+        item.refresh_from_db()
+        self.assertEqual(item.unit_price, Decimal("2.5"))
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        parts = self.catalog_items(30)
+        with self.assertNumQueries(6):
+            response = self.post([{"catalog_item_id": parts[0].id}])
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(6):
+            response = self.post([{"catalog_item_id": part.id} for part in parts])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(BomItem.objects.filter(bom=self.bom).count(), 31)
+
+    def test_unknown_or_foreign_catalog_items_add_nothing(self):
+        mine = self.catalog_items(1)[0]
+        theirs = self.catalog_items(1, owner=self.other)[0]
+        response = self.post([{"catalog_item_id": mine.id}, {"catalog_item_id": theirs.id}, {"catalog_item_id": 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["missing_ids"], [0, theirs.id])
+        self.assertFalse(BomItem.objects.exists())
 
-# Create your tests here.
+    def test_locked_bom_rejects_the_batch(self):
+        part = self.catalog_items(1)[0]
+        Bom.objects.filter(pk=self.bom.pk).update(status=Bom.Status.APPROVED)
+        self.assertEqual(self.post([{"catalog_item_id": part.id}]).status_code, 400)
+        self.assertFalse(BomItem.objects.exists())
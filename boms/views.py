@@ -6,7 +6,7 @@ from decimal import Decimal
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.http import HttpResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
@@ -17,7 +17,13 @@ from rest_framework.response import Response
 
 from boms.exporters import export_bom_csv, export_bom_pdf
 from boms.permissions import has_role, has_role_strict
+from catalog.models import CatalogItem
+from catalog.prices import autofill_price
 from core.pagination import StandardResultsSetPagination
+from core.response_cache import CachedResponseMixin, bump_generation
+from purchase_orders.models import PurchaseOrder, PurchaseOrderItem
+from purchase_orders.serializers import PurchaseOrderSerializer
+from purchase_orders.services import generate_purchase_orders
 from boms.services import (
     log_event,
     notify_bom_approved,
@@ -29,6 +35,7 @@ from boms.services import (
 
 from .models import Bom, BomCollaborator, BomEvent, BomItem, BomTemplate, ProcurementApproval, ProcurementApprovalRequest
 from .serializers import (
+    AddItemsFromCatalogSerializer,
     BomEventSerializer,
     BomItemSerializer,
     BomSerializer,
@@ -39,6 +46,7 @@ from .serializers import (
     CreateBomSerializer,
     DecideProcurementApprovalSerializer,
     DecideSignoffSerializer,
+    GeneratePurchaseOrdersSerializer,
     ProcurementApprovalRequestSerializer,
     ProcurementApprovalSerializer,
     ReceiveItemsSerializer,
@@ -92,10 +100,11 @@ def _can_edit_bom(user, bom: Bom) -> bool:
     return bom.owner_id == user.id or _is_bom_collaborator(user, bom) or has_role(user, "admin")
 
 
-class BomTemplateViewSet(viewsets.ModelViewSet):
+class BomTemplateViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BomTemplateSerializer
     pagination_class = StandardResultsSetPagination
+    cache_models = (BomTemplate,)
 
     def get_queryset(self):
         user = self.request.user
@@ -227,11 +236,108 @@ class BomViewSet(viewsets.ModelViewSet):
             print("Invalid data:", serializer.errors)
         
         serializer.is_valid(raise_exception=True)
-        item = BomItem.objects.create(bom=bom, **serializer.validated_data)
+        values = autofill_price(dict(serializer.validated_data))
+        item = BomItem.objects.create(bom=bom, **values)
         log_event(bom=bom, actor=request.user, event_type="bom.item_added", data={"item_id": item.id})
         recompute_bom_status(bom)
         return Response(BomItemSerializer(item).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["post"], url_path="items/from-catalog")
+    def add_items_from_catalog(self, request, pk=None):
+        bom: Bom = self.get_object()
+        if bom.status not in {Bom.Status.DRAFT, Bom.Status.NEEDS_CHANGES} and not has_role(request.user, "admin"):
+            return Response({"detail": "Cannot add items in this state."}, status=status.HTTP_400_BAD_REQUEST)
+        if (
+            bom.owner_id != request.user.id
+            and not _is_bom_collaborator(request.user, bom)
+            and not has_role(request.user, "admin")
+        ):
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        serializer = AddItemsFromCatalogSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lines = serializer.validated_data["items"]
+
+        catalog = CatalogItem.objects.all()
+        if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
+            catalog = catalog.filter(owner=request.user)
+        found = catalog.in_bulk({line["catalog_item_id"] for line in lines})
+        missing = sorted({line["catalog_item_id"] for line in lines} - set(found))
+        if missing:
+            return Response(
+                {"detail": "Catalog items not found.", "missing_ids": missing}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        snapshot_at = timezone.now().isoformat()
+        new_items = []
+        for line in lines:
+            source = found[line["catalog_item_id"]]
+            new_items.append(
+                BomItem(
+                    bom=bom,
+                    name=source.name,
+                    description=source.description,
+                    quantity=line["quantity"],
+                    unit=line["unit"],
+                    currency=source.currency,
+                    unit_price=source.unit_price,
+                    tax_percent=source.tax_percent,
+                    vendor=source.vendor_name,
+                    category=source.category,
+                    link=source.vendor_url,
+                    notes=line["notes"],
+                    data={
+                        **(source.data or {}),
+                        "catalog_item_id": source.id,
+                        "catalog_snapshot_at": snapshot_at,
+                    },
+                )
+            )
+        with transaction.atomic():
+            created = BomItem.objects.bulk_create(new_items)
+            log_event(
+                bom=bom,
+                actor=request.user,
+                event_type="bom.items_added_from_catalog",
+                data={"catalog_item_ids": [line["catalog_item_id"] for line in lines], "count": len(created)},
+            )
+        # New unsigned, unreceived items can't change the BOM status, so no
+        # recompute_bom_status here. bulk_create sends no post_save, so bump the
+        # BomItem generation the type-ahead index (searches.suggest) watches for
+        # new item names; no cached response is built from BomItem.
+        bump_generation(BomItem)
+        return Response(BomItemSerializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"], url_path="generate-purchase-orders")
+    def generate_purchase_orders(self, request, pk=None):
+        bom: Bom = self.get_object()
+        if not has_role_strict(request.user, "procurement"):
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        if bom.status not in {Bom.Status.APPROVED, Bom.Status.ORDERED, Bom.Status.RECEIVING}:
+            return Response({"detail": "BOM is not approved for ordering."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = GeneratePurchaseOrdersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = generate_purchase_orders(
+            bom=bom,
+            actor=request.user,
+            item_ids=serializer.validated_data.get("item_ids"),
+            eta_date=serializer.validated_data.get("eta_date"),
+            notes=serializer.validated_data["notes"],
+        )
+        if not result.purchase_orders:
+            return Response(
+                {"detail": "No unordered items to generate purchase orders from."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        orders = (
+            PurchaseOrder.objects.filter(id__in=[po.id for po in result.purchase_orders])
+            .prefetch_related(Prefetch("items", queryset=PurchaseOrderItem.objects.order_by("id")))
+            .order_by("id")
+        )
+        return Response(
+            {"item_count": result.item_count, "purchase_orders": PurchaseOrderSerializer(orders, many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=True, methods=["post"], url_path="cancel")
     def cancel_flow(self, request, pk=None):
         bom: Bom = self.get_object()
@@ -676,7 +782,7 @@ class ProcurementActionsViewSet(viewsets.ViewSet):
                 item.ordered_at = now
                 if eta_date:
                     item.eta_date = eta_date
-                item.save(update_fields=["ordered_at", "eta_date"])
+                item.save(update_fields=["ordered_at", "eta_date", "updated_at"])
                 updated += 1
 
         log_event(
@@ -6,3 +6,11 @@ from django.apps import AppConfig
 class CatalogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "catalog"
+
+    def ready(self) -> None:
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .search import restore_sqlite_triggers
+
+        post_migrate.connect(restore_sqlite_triggers, sender=self, dispatch_uid="catalog-restore-fts-triggers")
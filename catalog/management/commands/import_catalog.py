@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.services import IMPORT_CHUNK_SIZE, import_catalog_items, iter_import_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert catalog items for a user from a CSV or JSON-lines price list, keyed by (name, vendor_name)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (header row) or .jsonl file")
+        parser.add_argument("--owner", required=True, help="Email of the catalog owner")
+        parser.add_argument("--file-format", choices=["csv", "jsonl"], default=None, help="Defaults from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Report counts without writing")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"File not found: {path}")
+        owner = get_user_model().objects.filter(email__iexact=options["owner"].strip()).first()
+        if owner is None:
+            raise CommandError(f"User not found: {options['owner']}")
+        fmt = options["file_format"] or ("jsonl" if path.suffix.lower() in {".jsonl", ".ndjson"} else "csv")
+
+        started = time.monotonic()
+        with path.open("rb") as fh:
+            result = import_catalog_items(
+                owner=owner,
+                rows=iter_import_rows(fh, fmt=fmt),
+                chunk_size=max(1, options["chunk_size"]),
+                dry_run=options["dry_run"],
+            )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f"rows={result.rows} created={result.created} updated={result.updated} "
+            f"unchanged={result.unchanged} duplicates={result.duplicates} failed={result.failed} in {elapsed:.2f}s"
+            + (" (dry run)" if options["dry_run"] else "")
+        )
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f"row {error['row']}: {error['detail']}"))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from boms.models import BomItem
+from catalog.models import CatalogItem, PriceObservation
+from catalog.prices import price_key, rebuild_latest_prices
+from purchase_orders.models import PurchaseOrderItem
+
+_BATCH = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the LatestPrice table from PriceObservation. With --backfill, first record one "
+        "observation for every priced catalog item, BOM item and PO item not yet in the history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backfill", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            sources = [
+                (PriceObservation.Source.CATALOG, CatalogItem.objects.all(), "vendor_name", "updated_at"),
+                (PriceObservation.Source.BOM, BomItem.objects.all(), "vendor", "created_at"),
+                (PriceObservation.Source.PO, PurchaseOrderItem.objects.all(), "vendor", "created_at"),
+            ]
+            for source, qs, vendor_field, time_field in sources:
+                written = self._backfill(source, qs, vendor_field, time_field)
+                self.stdout.write(f"{source}: {written} observations added")
+        total = rebuild_latest_prices()
+        self.stdout.write(self.style.SUCCESS(f"LatestPrice rebuilt: {total} part/vendor rows"))
+
+    def _backfill(self, source, qs, vendor_field: str, time_field: str) -> int:
+        seen = set(PriceObservation.objects.filter(source=source).values_list("source_id", flat=True))
+        rows = qs.filter(unit_price__isnull=False).values_list(
+            "id", "name", vendor_field, "currency", "unit_price", "tax_percent", time_field
+        )
+        batch: list[PriceObservation] = []
+        written = 0
+        for item_id, name, vendor, currency, unit_price, tax_percent, observed_at in rows.iterator(chunk_size=_BATCH):
+            if item_id in seen or not price_key(name):
+                continue
+            batch.append(
+                PriceObservation(
+                    part_key=price_key(name)[:300],
+                    vendor_key=price_key(vendor)[:200],
+                    vendor_name=(vendor or "")[:200],
+                    currency=currency or "",
+                    unit_price=unit_price,
+                    tax_percent=tax_percent,
+                    source=source,
+                    source_id=item_id,
+                    observed_at=observed_at,
+                )
+            )
+            if len(batch) >= _BATCH:
+                written += len(PriceObservation.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            written += len(PriceObservation.objects.bulk_create(batch))
+        return written
@@ -0,0 +1,86 @@
+# Full-text search index for catalog items (see catalog/search.py).
+#
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+# PostgreSQL: a GIN index over the same tsvector expression the search uses.
+# Other backends: no-op (search falls back to icontains).
+
+from django.db import DatabaseError, migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS catalog_catalogitem_fts USING fts5(
+        name, vendor_name, category, description,
+        content='catalog_catalogitem', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_catalogitem_fts_ai AFTER INSERT ON catalog_catalogitem BEGIN
+        INSERT INTO catalog_catalogitem_fts(rowid, name, vendor_name, category, description)
+        VALUES (new.id, new.name, new.vendor_name, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_catalogitem_fts_ad AFTER DELETE ON catalog_catalogitem BEGIN
+        INSERT INTO catalog_catalogitem_fts(catalog_catalogitem_fts, rowid, name, vendor_name, category, description)
+        VALUES ('delete', old.id, old.name, old.vendor_name, old.category, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS catalog_catalogitem_fts_au AFTER UPDATE ON catalog_catalogitem BEGIN
+        INSERT INTO catalog_catalogitem_fts(catalog_catalogitem_fts, rowid, name, vendor_name, category, description)
+        VALUES ('delete', old.id, old.name, old.vendor_name, old.category, old.description);
+        INSERT INTO catalog_catalogitem_fts(rowid, name, vendor_name, category, description)
+        VALUES (new.id, new.name, new.vendor_name, new.category, new.description);
+    END
+    """,
+    "INSERT INTO catalog_catalogitem_fts(catalog_catalogitem_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS catalog_catalogitem_fts_ai",
+    "DROP TRIGGER IF EXISTS catalog_catalogitem_fts_ad",
+    "DROP TRIGGER IF EXISTS catalog_catalogitem_fts_au",
+    "DROP TABLE IF EXISTS catalog_catalogitem_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS catalog_item_search_gin ON catalog_catalogitem USING GIN (
+        to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(vendor_name, '') || ' '
+            || coalesce(category, '') || ' ' || coalesce(description, ''))
+    )
+    """,
+]
+
+POSTGRES_REVERSE = ["DROP INDEX IF EXISTS catalog_item_search_gin"]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        if not statements:
+            return
+        try:
+            schema_editor.execute(statements[0])
+        except DatabaseError:
+            # e.g. SQLite built without FTS5; search falls back to icontains.
+            return
+        for sql in statements[1:]:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:30
+
+import logging
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+
+def merge_duplicates(apps, schema_editor):
+    # The importer upserts by (owner, name, vendor_name). Of any existing
+    # duplicate group keep the most recently updated row, point BOM items
+    # prefilled from the others at it, and delete the others. Every merged row
+    # is logged with its values so it can be restored by hand.
+    CatalogItem = apps.get_model("catalog", "CatalogItem")
+    BomItem = apps.get_model("boms", "BomItem")
+    groups = (
+        CatalogItem.objects.values("owner_id", "name", "vendor_name")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+    )
+    for group in groups:
+        keep, *merged = CatalogItem.objects.filter(
+            owner_id=group["owner_id"], name=group["name"], vendor_name=group["vendor_name"]
+        ).order_by("-updated_at", "-id")
+        merged_ids = [item.id for item in merged]
+        for item in merged:
+            logger.warning(
+                "Merging duplicate catalog item %s into %s: owner=%s name=%r vendor=%r category=%r "
+                "currency=%r unit_price=%s tax_percent=%s vendor_url=%r description=%r data=%r",
+                item.id,
+                keep.id,
+                item.owner_id,
+                item.name,
+                item.vendor_name,
+                item.category,
+                item.currency,
+                item.unit_price,
+                item.tax_percent,
+                item.vendor_url,
+                item.description,
+                item.data,
+            )
+        for bom_item in BomItem.objects.filter(data__catalog_item_id__in=merged_ids):
+            bom_item.data["catalog_item_id"] = keep.id
+            BomItem.objects.filter(pk=bom_item.pk).update(data=bom_item.data)
+        CatalogItem.objects.filter(pk__in=merged_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boms', '0001_initial'),
+        ('catalog', '0002_catalogitem_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogitem',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='catalogitem',
+            constraint=models.UniqueConstraint(fields=('owner', 'name', 'vendor_name'), name='uniq_catalog_item_owner_name_vendor'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_catalogitem_content_hash_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_key', models.CharField(max_length=300)),
+                ('vendor_key', models.CharField(blank=True, max_length=200)),
+                ('vendor_name', models.CharField(blank=True, max_length=200)),
+                ('currency', models.CharField(blank=True, max_length=20)),
+                ('unit_price', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('tax_percent', models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True)),
+                ('source', models.CharField(choices=[('CATALOG', 'Catalog item'), ('BOM', 'BOM item'), ('PO', 'Purchase order item')], max_length=10)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('observed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LatestPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_key', models.CharField(max_length=300)),
+                ('vendor_key', models.CharField(blank=True, max_length=200)),
+                ('vendor_name', models.CharField(blank=True, max_length=200)),
+                ('currency', models.CharField(blank=True, max_length=20)),
+                ('unit_price', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('tax_percent', models.DecimalField(blank=True, decimal_places=3, max_digits=6, null=True)),
+                ('source', models.CharField(choices=[('CATALOG', 'Catalog item'), ('BOM', 'BOM item'), ('PO', 'Purchase order item')], max_length=10)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('observed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['part_key', 'observed_at'], name='catalog_lat_part_ke_7ac393_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='latestprice',
+            constraint=models.UniqueConstraint(fields=('part_key', 'vendor_key'), name='uniq_latest_price_part_vendor'),
+        ),
+        migrations.AddIndex(
+            model_name='priceobservation',
+            index=models.Index(fields=['part_key', 'vendor_key', 'observed_at'], name='catalog_pri_part_ke_86367f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceobservation',
+            index=models.Index(fields=['source', 'source_id'], name='catalog_pri_source_10878d_idx'),
+        ),
+    ]
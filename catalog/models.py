@@ -1,8 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import json
+from decimal import Decimal
+
 from django.conf import settings
 from django.db import models
 
+# Fields compared by the bulk importer; the upsert key is (owner, name, vendor_name).
+CONTENT_HASH_FIELDS = ("description", "category", "vendor_url", "currency", "unit_price", "tax_percent", "data")
+
+
+def catalog_content_hash(values: dict) -> str:
+    payload = []
+    for field in CONTENT_HASH_FIELDS:
+        value = values.get(field)
+        if field in {"unit_price", "tax_percent"}:
+            value = None if value in (None, "") else format(Decimal(str(value)).normalize(), "f")
+        payload.append(value)
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
 
 class CatalogItem(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="catalog_items")
@@ -15,6 +33,7 @@ class CatalogItem(models.Model):
     unit_price = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
     tax_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
     data = models.JSONField(default=dict, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -24,8 +43,76 @@ class CatalogItem(models.Model):
             models.Index(fields=["vendor_name"]),
             models.Index(fields=["category"]),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "name", "vendor_name"], name="uniq_catalog_item_owner_name_vendor"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.content_hash = catalog_content_hash({f: getattr(self, f) for f in CONTENT_HASH_FIELDS})
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "content_hash"}
+        return super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return self.name
 
-# Create your models here.
+
+class PriceObservation(models.Model):
+    """
+    Append-only price history. A row is only written when the price, currency or
+    tax for a (part, vendor) differs from the latest one, so the table stays small.
+    """
+
+    class Source(models.TextChoices):
+        CATALOG = "CATALOG", "Catalog item"
+        BOM = "BOM", "BOM item"
+        PO = "PO", "Purchase order item"
+
+    # Normalised (lower-cased, whitespace-collapsed) part name and vendor.
+    part_key = models.CharField(max_length=300)
+    vendor_key = models.CharField(max_length=200, blank=True)
+    vendor_name = models.CharField(max_length=200, blank=True)
+    currency = models.CharField(max_length=20, blank=True)
+    unit_price = models.DecimalField(max_digits=14, decimal_places=4)
+    tax_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    source = models.CharField(max_length=10, choices=Source.choices)
+    source_id = models.PositiveBigIntegerField()
+    observed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["part_key", "vendor_key", "observed_at"]),
+            models.Index(fields=["source", "source_id"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.part_key}@{self.vendor_key}: {self.unit_price} {self.currency}"
+
+
+class LatestPrice(models.Model):
+    """
+    Materialised latest observation per (part, vendor), maintained alongside
+    PriceObservation inserts. Rebuild with `manage.py rebuild_latest_prices`.
+    """
+
+    part_key = models.CharField(max_length=300)
+    vendor_key = models.CharField(max_length=200, blank=True)
+    vendor_name = models.CharField(max_length=200, blank=True)
+    currency = models.CharField(max_length=20, blank=True)
+    unit_price = models.DecimalField(max_digits=14, decimal_places=4)
+    tax_percent = models.DecimalField(max_digits=6, decimal_places=3, null=True, blank=True)
+    source = models.CharField(max_length=10, choices=PriceObservation.Source.choices)
+    source_id = models.PositiveBigIntegerField()
+    observed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["part_key", "vendor_key"], name="uniq_latest_price_part_vendor"),
+        ]
+        indexes = [
+            models.Index(fields=["part_key", "observed_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.part_key}@{self.vendor_key}: {self.unit_price} {self.currency}"
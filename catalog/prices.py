@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LatestPrice, PriceObservation
+
+_LATEST_UPDATE_FIELDS = ["vendor_name", "currency", "unit_price", "tax_percent", "source", "source_id", "observed_at"]
+
+
+def price_key(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def _decimal(value) -> Decimal | None:
+    if value in (None, ""):
+        return None
+    return Decimal(str(value))
+
+
+def record_prices(observations: Iterable[dict]) -> int:
+    """
+    Append price observations and refresh LatestPrice; returns rows written.
+
+    Each observation is a dict with `name`, `vendor`, `currency`, `unit_price`,
+    `tax_percent`, `source` (PriceObservation.Source), `source_id` and optionally
+    `observed_at`. Observations without a price, or identical to the current
+    latest price for their (part, vendor), are dropped. Costs one read plus one
+    insert and one upsert per call, whatever the batch size.
+    """
+    now = timezone.now()
+    pending: dict[tuple[str, str], dict] = {}
+    for obs in observations:
+        unit_price = _decimal(obs.get("unit_price"))
+        part_key = price_key(obs.get("name"))
+        if unit_price is None or not part_key:
+            continue
+        vendor = str(obs.get("vendor") or "").strip()
+        pending[(part_key, price_key(vendor))] = {
+            "part_key": part_key[:300],
+            "vendor_key": price_key(vendor)[:200],
+            "vendor_name": vendor[:200],
+            "currency": str(obs.get("currency") or "").strip()[:20],
+            "unit_price": unit_price,
+            "tax_percent": _decimal(obs.get("tax_percent")),
+            "source": obs["source"],
+            "source_id": obs.get("source_id") or 0,
+            "observed_at": obs.get("observed_at") or now,
+        }
+    if not pending:
+        return 0
+
+    current = {
+        (row["part_key"], row["vendor_key"]): (row["currency"], row["unit_price"], row["tax_percent"])
+        for row in LatestPrice.objects.filter(part_key__in={k for k, _ in pending}).values(
+            "part_key", "vendor_key", "currency", "unit_price", "tax_percent"
+        )
+    }
+    changed = [
+        values
+        for key, values in pending.items()
+        if current.get(key) != (values["currency"], values["unit_price"], values["tax_percent"])
+    ]
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        PriceObservation.objects.bulk_create([PriceObservation(**values) for values in changed])
+        LatestPrice.objects.bulk_create(
+            [LatestPrice(**values) for values in changed],
+            update_conflicts=True,
+            unique_fields=["part_key", "vendor_key"],
+            update_fields=_LATEST_UPDATE_FIELDS,
+        )
+    return len(changed)
+
+
+def latest_prices(names: Iterable[str], *, vendor: str | None = None) -> dict[str, list[LatestPrice]]:
+    """
+    Latest price per vendor for each name (keyed by normalised name), newest first.
+    """
+    keys = {price_key(name) for name in names if price_key(name)}
+    qs = LatestPrice.objects.filter(part_key__in=keys)
+    if vendor:
+        qs = qs.filter(vendor_key=price_key(vendor))
+    result: dict[str, list[LatestPrice]] = {key: [] for key in keys}
+    for row in qs.order_by("part_key", "-observed_at"):
+        result[row.part_key].append(row)
+    return result
+
+
+def best_latest_price(name: str, vendor: str = "") -> LatestPrice | None:
+    """
+    The vendor's latest price for the part, or the most recent price from any
+    vendor when no vendor is given.
+    """
+    qs = LatestPrice.objects.filter(part_key=price_key(name))
+    if vendor:
+        return qs.filter(vendor_key=price_key(vendor)).first()
+    return qs.order_by("-observed_at").first()
+
+
+def price_history(name: str, *, vendor: str | None = None, since=None, limit: int = 500):
+    qs = PriceObservation.objects.filter(part_key=price_key(name))
+    if vendor is not None:
+        qs = qs.filter(vendor_key=price_key(vendor))
+    if since is not None:
+        qs = qs.filter(observed_at__gte=since)
+    return qs.order_by("-observed_at")[:limit]
+
+
+def autofill_price(values: dict) -> dict:
+    """
+    Fill a missing unit price (and blank currency / tax / vendor) on new item
+    values from the latest observed price. Returns `values`, updated in place.
+    """
+    if values.get("unit_price") is not None or not values.get("name"):
+        return values
+    latest = best_latest_price(values["name"], values.get("vendor") or "")
+    if latest is None:
+        return values
+    values["unit_price"] = latest.unit_price
+    if not values.get("currency"):
+        values["currency"] = latest.currency
+    if values.get("tax_percent") is None:
+        values["tax_percent"] = latest.tax_percent
+    if not values.get("vendor"):
+        values["vendor"] = latest.vendor_name
+    data = dict(values.get("data") or {})
+    data["price_autofill"] = {
+        "source": latest.source,
+        "source_id": latest.source_id,
+        "vendor": latest.vendor_name,
+        "observed_at": latest.observed_at.isoformat(),
+    }
+    values["data"] = data
+    return values
+
+
+def rebuild_latest_prices() -> int:
+    """
+    Recompute LatestPrice from PriceObservation (newest row per part/vendor).
+    """
+    rows: list[LatestPrice] = []
+    last_key = None
+    observations = PriceObservation.objects.order_by("part_key", "vendor_key", "-observed_at", "-id")
+    with transaction.atomic():
+        LatestPrice.objects.all().delete()
+        for obs in observations.iterator(chunk_size=5000):
+            key = (obs.part_key, obs.vendor_key)
+            if key == last_key:
+                continue
+            last_key = key
+            rows.append(
+                LatestPrice(
+                    part_key=obs.part_key,
+                    vendor_key=obs.vendor_key,
+                    vendor_name=obs.vendor_name,
+                    currency=obs.currency,
+                    unit_price=obs.unit_price,
+                    tax_percent=obs.tax_percent,
+                    source=obs.source,
+                    source_id=obs.source_id,
+                    observed_at=obs.observed_at,
+                )
+            )
+            if len(rows) >= 5000:
+                LatestPrice.objects.bulk_create(rows)
+                rows = []
+        if rows:
+            LatestPrice.objects.bulk_create(rows)
+    return LatestPrice.objects.count()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import base64
+import json
+import re
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Case, Count, F, FloatField, IntegerField, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+
+from core.response_cache import get_generations
+
+from .models import CatalogItem
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_FTS_TABLE = "catalog_catalogitem_fts"
+_PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(catalog_catalogitem.name, '') || ' ' || coalesce(catalog_catalogitem.vendor_name, '')"
+    " || ' ' || coalesce(catalog_catalogitem.category, '') || ' ' || coalesce(catalog_catalogitem.description, ''))"
+)
+FACET_LIMIT = 20
+FACET_CACHE_SECONDS = 300
+
+_fts_available: bool | None = None
+
+# Same triggers as migration catalog.0002. SQLite drops triggers whenever a
+# migration rebuilds catalog_catalogitem, so they are re-created after migrate.
+_SQLITE_TRIGGERS = {
+    "catalog_catalogitem_fts_ai": """
+        CREATE TRIGGER IF NOT EXISTS catalog_catalogitem_fts_ai AFTER INSERT ON catalog_catalogitem BEGIN
+            INSERT INTO catalog_catalogitem_fts(rowid, name, vendor_name, category, description)
+            VALUES (new.id, new.name, new.vendor_name, new.category, new.description);
+        END
+    """,
+    "catalog_catalogitem_fts_ad": """
+        CREATE TRIGGER IF NOT EXISTS catalog_catalogitem_fts_ad AFTER DELETE ON catalog_catalogitem BEGIN
+            INSERT INTO catalog_catalogitem_fts(catalog_catalogitem_fts, rowid, name, vendor_name, category, description)
+            VALUES ('delete', old.id, old.name, old.vendor_name, old.category, old.description);
+        END
+    """,
+    "catalog_catalogitem_fts_au": """
+        CREATE TRIGGER IF NOT EXISTS catalog_catalogitem_fts_au AFTER UPDATE ON catalog_catalogitem BEGIN
+            INSERT INTO catalog_catalogitem_fts(catalog_catalogitem_fts, rowid, name, vendor_name, category, description)
+            VALUES ('delete', old.id, old.name, old.vendor_name, old.category, old.description);
+            INSERT INTO catalog_catalogitem_fts(rowid, name, vendor_name, category, description)
+            VALUES (new.id, new.name, new.vendor_name, new.category, new.description);
+        END
+    """,
+}
+
+
+def restore_sqlite_triggers(sender=None, using: str = "default", **kwargs) -> None:
+    """
+    post_migrate hook: re-create missing FTS sync triggers and rebuild the index.
+    """
+    db = connections[using]
+    if db.vendor != "sqlite":
+        return
+    with db.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [_FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'catalog_catalogitem'"
+        )
+        present = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in _SQLITE_TRIGGERS if name not in present]
+        if not missing:
+            return
+        for name in missing:
+            cursor.execute(_SQLITE_TRIGGERS[name])
+        # Rows written while the triggers were gone are not indexed.
+        cursor.execute(f"INSERT INTO {_FTS_TABLE}({_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _terms(query: str) -> list[str]:
+    return [t.lower() for t in _TERM_RE.findall(query or "")][:12]
+
+
+def _sqlite_fts_available() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [_FTS_TABLE])
+            _fts_available = cursor.fetchone() is not None
+    return _fts_available
+
+
+def rank_matches(qs: QuerySet, query: str) -> QuerySet:
+    """
+    Restrict `qs` to items matching every term of `query` (word prefix match) and
+    annotate `rank` (higher is better).
+
+    Uses the FTS5 table on SQLite and the tsvector GIN index on PostgreSQL (both
+    created by migration catalog.0002); anything else falls back to icontains.
+    Ranks must not depend on other rows (no bm25): page_after's keyset cursors
+    rely on a row's rank staying put while the catalog changes.
+    """
+    terms = _terms(query)
+    if not terms:
+        return qs.annotate(rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == "sqlite" and _sqlite_fts_available():
+        # FTS5 finds the rows; the rank is not bm25, whose corpus statistics
+        # shift every score on each write and would break keyset cursors.
+        match = " ".join(f'"{term}"*' for term in terms)
+        return qs.extra(
+            tables=[_FTS_TABLE],
+            where=[f"{_FTS_TABLE}.rowid = catalog_catalogitem.id", f"{_FTS_TABLE} MATCH %s"],
+            params=[match],
+        ).annotate(rank=_field_rank(terms[0]))
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return qs.extra(
+            where=[f"{_PG_DOCUMENT} @@ to_tsquery('simple', %s)"],
+            params=[tsquery],
+        ).annotate(
+            rank=RawSQL(f"ts_rank({_PG_DOCUMENT}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField())
+        )
+
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term)
+            | Q(description__icontains=term)
+            | Q(vendor_name__icontains=term)
+            | Q(category__icontains=term)
+        )
+    return qs.filter(condition).annotate(rank=_field_rank(terms[0]))
+
+
+def _field_rank(term: str) -> Case:
+    # Depends only on the row and the query, so a row keeps its rank between
+    # pages. Name matches weigh most, then vendor, category and description.
+    return Case(
+        When(name__istartswith=term, then=Value(4.0)),
+        When(name__icontains=term, then=Value(3.0)),
+        When(vendor_name__icontains=term, then=Value(2.0)),
+        When(category__icontains=term, then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def encode_cursor(rank: float, item_id: int) -> str:
+    raw = json.dumps({"r": rank, "id": item_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> tuple[float, int] | None:
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(data["r"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def page_after(qs: QuerySet, cursor: tuple[float, int] | None, page_size: int) -> tuple[list, str | None]:
+    """
+    Keyset page over (rank desc, id asc); returns (items, next cursor or None).
+    """
+    qs = qs.order_by(F("rank").desc(), "id")
+    if cursor is not None:
+        rank, item_id = cursor
+        qs = qs.filter(Q(rank__lt=rank) | Q(rank=rank, id__gt=item_id))
+    rows = list(qs[: page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.rank, last.id)
+    return rows, next_cursor
+
+
+def _facet_counts(qs: QuerySet, *, category: str, vendor: str) -> dict:
+    # One grouped query over (category, vendor); each facet ignores its own
+    # selection so the UI can show alternatives.
+    rows = qs.order_by().values_list("category", "vendor_name").annotate(n=Count("id", output_field=IntegerField()))
+    categories: Counter[str] = Counter()
+    vendors: Counter[str] = Counter()
+    for row_category, row_vendor, n in rows:
+        if not vendor or row_vendor == vendor:
+            categories[row_category] += n
+        if not category or row_category == category:
+            vendors[row_vendor] += n
+
+    def top(counter: Counter[str]) -> list[dict]:
+        return [{"value": value, "count": count} for value, count in counter.most_common(FACET_LIMIT) if value]
+
+    return {"category": top(categories), "vendor_name": top(vendors)}
+
+
+def facets(qs: QuerySet, *, scope: str, query: str, category: str, vendor: str) -> dict:
+    """
+    Facet counts for the matched set. Unfiltered views (no query, no selection)
+    are cached per scope until a catalog write bumps the generation.
+    """
+    if query or category or vendor:
+        return _facet_counts(qs, category=category, vendor=vendor)
+    generation = get_generations([CatalogItem])[CatalogItem._meta.label_lower]
+    key = f"catalog:facets:{scope}:{generation}"
+    cached = cache.get(key)
+    if cached is None:
+        cached = _facet_counts(qs, category="", vendor="")
+        cache.set(key, cached, timeout=FACET_CACHE_SECONDS)
+    return cached
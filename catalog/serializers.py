@@ -41,3 +41,16 @@ class CatalogItemCreateSerializer(serializers.ModelSerializer):
             "data",
         )
 
+
+    def validate(self, attrs):
+        request = self.context.get("request")
+        owner = self.instance.owner if self.instance is not None else getattr(request, "user", None)
+        name = attrs.get("name", getattr(self.instance, "name", ""))
+        vendor_name = attrs.get("vendor_name", getattr(self.instance, "vendor_name", ""))
+        if owner is not None:
+            duplicates = CatalogItem.objects.filter(owner=owner, name=name, vendor_name=vendor_name)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError({"name": "You already have a catalog item with this name and vendor."})
+        return attrs
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+
+from core.response_cache import bump_generation
+
+from .models import CONTENT_HASH_FIELDS, CatalogItem, PriceObservation, catalog_content_hash
+from .prices import record_prices
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+_url_validator = URLValidator()
+
+
+@dataclass
+class CatalogImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Rows superseded by a later row for the same (name, vendor_name) key.
+    duplicates: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, row: int, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "detail": detail})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def iter_import_rows(fileobj, *, fmt: str) -> Iterator[dict]:
+    """
+    Yield rows from a binary file object without reading it into memory.
+
+    `fmt` is "csv" (header row, `data` column as JSON text) or "jsonl" (one object per line).
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "jsonl":
+            for line in text:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield {"__error__": f"Invalid JSON: {exc.msg}"}
+                    continue
+                yield row if isinstance(row, dict) else {"__error__": "Each line must be a JSON object."}
+        else:
+            yield from csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def _text(row: dict, key: str, max_length: int, *aliases: str) -> str:
+    value = row.get(key)
+    for alias in aliases:
+        if value in (None, ""):
+            value = row.get(alias)
+    value = "" if value is None else str(value).strip()
+    if len(value) > max_length:
+        raise ValueError(f"{key} is longer than {max_length} characters.")
+    return value
+
+
+def _decimal(row: dict, key: str, *, max_digits: int, places: int) -> Decimal | None:
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        number = Decimal(str(value).strip()).quantize(Decimal(1).scaleb(-places))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"{key} is not a number.")
+    if len(number.as_tuple().digits) > max_digits:
+        raise ValueError(f"{key} is too large.")
+    return number
+
+
+def _clean_row(row: dict) -> dict:
+    if "__error__" in row:
+        raise ValueError(row["__error__"])
+    name = _text(row, "name", 300)
+    if not name:
+        raise ValueError("name is required.")
+    vendor_url = _text(row, "vendor_url", 200)
+    if vendor_url:
+        try:
+            _url_validator(vendor_url)
+        except ValidationError:
+            raise ValueError("vendor_url is not a valid URL.")
+    data = row.get("data") or {}
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except json.JSONDecodeError:
+            raise ValueError("data is not valid JSON.")
+    if not isinstance(data, dict):
+        raise ValueError("data must be a JSON object.")
+    return {
+        "name": name,
+        "vendor_name": _text(row, "vendor_name", 200, "vendor"),
+        "description": _text(row, "description", 100000),
+        "category": _text(row, "category", 200),
+        "vendor_url": vendor_url,
+        "currency": _text(row, "currency", 20),
+        "unit_price": _decimal(row, "unit_price", max_digits=14, places=4),
+        "tax_percent": _decimal(row, "tax_percent", max_digits=6, places=3),
+        "data": data,
+    }
+
+
+def _write_chunk(owner, chunk: dict[tuple[str, str], dict], result: CatalogImportResult, *, dry_run: bool) -> None:
+    names = {name for name, _ in chunk}
+    existing = {
+        (name, vendor): content_hash
+        for name, vendor, content_hash in CatalogItem.objects.filter(owner=owner, name__in=names).values_list(
+            "name", "vendor_name", "content_hash"
+        )
+    }
+    to_write: list[CatalogItem] = []
+    for key, values in chunk.items():
+        content_hash = catalog_content_hash(values)
+        if key not in existing:
+            result.created += 1
+        elif existing[key] == content_hash:
+            result.unchanged += 1
+            continue
+        else:
+            result.updated += 1
+        to_write.append(CatalogItem(owner=owner, content_hash=content_hash, **values))
+
+    if to_write and not dry_run:
+        with transaction.atomic():
+            CatalogItem.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=["owner", "name", "vendor_name"],
+                update_fields=[*CONTENT_HASH_FIELDS, "content_hash", "updated_at"],
+            )
+            # bulk_create skips post_save, so feed price history here.
+            record_prices(
+                {
+                    "name": item.name,
+                    "vendor": item.vendor_name,
+                    "currency": item.currency,
+                    "unit_price": item.unit_price,
+                    "tax_percent": item.tax_percent,
+                    "source": PriceObservation.Source.CATALOG,
+                    "source_id": item.pk,
+                }
+                for item in to_write
+            )
+
+
+def import_catalog_items(
+    *, owner, rows: Iterable[dict], chunk_size: int = IMPORT_CHUNK_SIZE, dry_run: bool = False
+) -> CatalogImportResult:
+    """
+    Upsert catalog rows for `owner` by (name, vendor_name) in chunks.
+
+    Rows whose content hash matches the stored item are skipped, so re-importing
+    a mostly unchanged price list writes almost nothing. Within one import the
+    last row for a key wins and the earlier ones are counted as `duplicates`,
+    so every row lands in exactly one of the result's counts.
+    """
+    result = CatalogImportResult()
+    chunk: dict[tuple[str, str], dict] = {}
+    for line_no, row in enumerate(rows, start=1):
+        result.rows += 1
+        try:
+            values = _clean_row(row)
+        except ValueError as exc:
+            result.add_error(line_no, str(exc))
+            continue
+        key = (values["name"], values["vendor_name"])
+        if key in chunk:
+            result.duplicates += 1
+        chunk[key] = values
+        if len(chunk) >= chunk_size:
+            _write_chunk(owner, chunk, result, dry_run=dry_run)
+            chunk = {}
+    if chunk:
+        _write_chunk(owner, chunk, result, dry_run=dry_run)
+
+    if not dry_run and (result.created or result.updated):
+        # bulk_create sends no post_save; invalidate cached catalog reads explicitly.
+        bump_generation(CatalogItem)
+    return result
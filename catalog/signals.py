@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from boms.models import BomItem
+from purchase_orders.models import PurchaseOrderItem
+
+from .models import CatalogItem, PriceObservation
+from .prices import record_prices
+
+
+def _price_touched(created: bool, update_fields) -> bool:
+    if created or update_fields is None:
+        return True
+    return bool({"unit_price", "currency", "tax_percent", "vendor", "vendor_name", "name"} & set(update_fields))
+
+
+@receiver(post_save, sender=CatalogItem)
+def record_catalog_price(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or instance.unit_price is None or not _price_touched(created, update_fields):
+        return
+    record_prices(
+        [
+            {
+                "name": instance.name,
+                "vendor": instance.vendor_name,
+                "currency": instance.currency,
+                "unit_price": instance.unit_price,
+                "tax_percent": instance.tax_percent,
+                "source": PriceObservation.Source.CATALOG,
+                "source_id": instance.id,
+            }
+        ]
+    )
+
+
+@receiver(post_save, sender=BomItem)
+def record_bom_item_price(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or instance.unit_price is None or not _price_touched(created, update_fields):
+        return
+    record_prices(
+        [
+            {
+                "name": instance.name,
+                "vendor": instance.vendor,
+                "currency": instance.currency,
+                "unit_price": instance.unit_price,
+                "tax_percent": instance.tax_percent,
+                "source": PriceObservation.Source.BOM,
+                "source_id": instance.id,
+            }
+        ]
+    )
+
+
+@receiver(post_save, sender=PurchaseOrderItem)
+def record_po_item_price(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or instance.unit_price is None or not _price_touched(created, update_fields):
+        return
+    record_prices(
+        [
+            {
+                "name": instance.name,
+                "vendor": instance.vendor,
+                "currency": instance.currency,
+                "unit_price": instance.unit_price,
+                "tax_percent": instance.tax_percent,
+                "source": PriceObservation.Source.PO,
+                "source_id": instance.id,
+            }
+        ]
+    )
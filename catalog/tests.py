@@ -1,3 +1,197 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from boms.models import Bom, BomItem
+
+from .models import CatalogItem, LatestPrice, PriceObservation
+from .services import import_catalog_items
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user("owner@example.com", "pw")
+
+    def counts(self, result) -> int:
+        return result.created + result.updated + result.unchanged + result.duplicates + result.failed
+
+    def test_repeated_key_is_counted_as_duplicate(self):
+        rows = [
+            {"name": "Valve", "vendor_name": "Acme", "unit_price": "10"},
+            {"name": "Valve", "vendor_name": "Acme", "unit_price": "12"},
+            {"name": "Pump", "vendor_name": "Acme", "unit_price": "99"},
+            {"name": "", "vendor_name": "Acme"},
+        ]
+        result = import_catalog_items(owner=self.owner, rows=rows)
+        self.assertEqual((result.created, result.duplicates, result.failed), (2, 1, 1))
+        self.assertEqual(self.counts(result), result.rows)
+        self.assertEqual(CatalogItem.objects.get(name="Valve").unit_price, Decimal("12"))
+
+    def test_reimport_reports_unchanged_and_updated(self):
+        import_catalog_items(owner=self.owner, rows=[{"name": "Valve", "vendor_name": "Acme", "unit_price": "10"}])
+        rows = [
+            {"name": "Valve", "vendor_name": "Acme", "unit_price": "10"},
+            {"name": "Pump", "vendor_name": "Acme", "unit_price": "99"},
+        ]
+        result = import_catalog_items(owner=self.owner, rows=rows, chunk_size=1)
+        self.assertEqual((result.created, result.unchanged), (1, 1))
+        result = import_catalog_items(
+            owner=self.owner, rows=[{"name": "Pump", "vendor_name": "Acme", "unit_price": "90"}]
+        )
+        self.assertEqual(result.updated, 1)
+        self.assertEqual(self.counts(result), result.rows)
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "catalog-search-test"},
+    }
+)
+class CatalogSearchTests(TestCase):
+    url = "/api/catalog-items/search/"
+
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw")
+        self.stranger = User.objects.create_user("stranger@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def item(self, name, *, owner=None, **fields) -> CatalogItem:
+        return CatalogItem.objects.create(owner=owner or self.owner, name=name, **fields)
+
+    def search(self, **params) -> dict:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_name_matches_rank_above_other_fields(self):
+        self.item("Pump", description="spare valve seals")
+        self.item("Brass valve")
+        self.item("Gauge", vendor_name="Valvetech")
+        self.item("Valve", owner=self.stranger)
+        names = [row["name"] for row in self.search(q="valve")["results"]]
+        self.assertEqual(names[0], "Brass valve")
+        self.assertEqual(sorted(names), ["Brass valve", "Gauge", "Pump"])
+
+    def test_every_term_must_match_as_a_word_prefix(self):
+        self.item("Ball valve", vendor_name="Acme")
+        self.item("Ball bearing", vendor_name="Acme")
+        self.assertEqual([row["name"] for row in self.search(q="bal val")["results"]], ["Ball valve"])
+
+    def test_cursor_pages_are_stable_while_items_are_added(self):
+        for i in range(7):
+            self.item(f"Valve {i}")
+        first = self.search(q="valve", page_size=3)
+        seen = [row["id"] for row in first["results"]]
+        self.item("Valve")  # ranks at least as high as the ones already returned
+        cursor = first["next_cursor"]
+        while cursor:
+            page = self.search(q="valve", page_size=3, cursor=cursor)
+            self.assertNotIn("facets", page)
+            seen += [row["id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertLessEqual(
+            set(CatalogItem.objects.filter(name__startswith="Valve ").values_list("id", flat=True)), set(seen)
+        )
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {"q": "valve", "cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facets_count_matches_and_ignore_their_own_selection(self):
+        self.item("Valve A", category="Fittings", vendor_name="Acme")
+        self.item("Valve B", category="Fittings", vendor_name="Bolt Co")
+        self.item("Valve C", category="Tools", vendor_name="Acme")
+        self.item("Hammer", category="Tools", vendor_name="Acme")
+
+        facets = self.search(q="valve")["facets"]
+        self.assertEqual(facets["category"], [{"value": "Fittings", "count": 2}, {"value": "Tools", "count": 1}])
+        self.assertEqual(facets["vendor_name"], [{"value": "Acme", "count": 2}, {"value": "Bolt Co", "count": 1}])
+
+        body = self.search(q="valve", category="Fittings")
+        self.assertEqual(len(body["results"]), 2)
+        self.assertEqual(body["facets"]["category"], facets["category"])
+        self.assertEqual(
+            body["facets"]["vendor_name"], [{"value": "Acme", "count": 1}, {"value": "Bolt Co", "count": 1}]
+        )
+
+        unfiltered = self.search()["facets"]
+        self.assertEqual(
+            sorted((row["value"], row["count"]) for row in unfiltered["category"]), [("Fittings", 2), ("Tools", 2)]
+        )
+
+
+class PriceHistoryTests(TestCase):
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user("owner@example.com", "pw")
+        self.bom = Bom.objects.create(owner=self.owner, title="Rig")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def catalog_item(self, **fields) -> CatalogItem:
+        values = {"owner": self.owner, "name": "Valve", "vendor_name": "Acme", "currency": "EUR", "unit_price": "10"}
+        return CatalogItem.objects.create(**{**values, **fields})
+
+    def test_price_change_refreshes_latest_and_appends_history(self):
+        item = self.catalog_item()
+        item.description = "Brass"
+        item.save()
+        self.assertEqual(PriceObservation.objects.count(), 1)
+
+        item.unit_price = Decimal("12")
+        item.save()
+        latest = LatestPrice.objects.get(part_key="valve", vendor_key="acme")
+        self.assertEqual((latest.unit_price, latest.source_id), (Decimal("12"), item.id))
+        self.assertEqual(PriceObservation.objects.count(), 2)
+
+    def test_new_bom_item_without_price_is_autofilled(self):
+        self.catalog_item(tax_percent="19")
+        response = self.client.post(f"/api/boms/{self.bom.id}/items/", {"name": " valve ", "quantity": "2"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        item = BomItem.objects.get(pk=response.json()["id"])
+        self.assertEqual((item.unit_price, item.currency, item.vendor), (Decimal("10"), "EUR", "Acme"))
+        self.assertEqual(item.tax_percent, Decimal("19"))
+        self.assertEqual(item.data["price_autofill"]["source"], PriceObservation.Source.CATALOG)
+        # The autofilled price matches the latest one, so no new observation.
+        self.assertEqual(PriceObservation.objects.count(), 1)
+
+    def test_explicit_price_and_unknown_vendor_are_left_alone(self):
+        self.catalog_item()
+        url = f"/api/boms/{self.bom.id}/items/"
+        priced = self.client.post(url, {"name": "Valve", "unit_price": "8"}, format="json").json()
+        self.assertEqual(Decimal(priced["unit_price"]), Decimal("8"))
+        self.assertNotIn("price_autofill", priced["data"])
+
+        other = self.client.post(url, {"name": "Valve", "vendor": "Globex"}, format="json").json()
+        self.assertIsNone(other["unit_price"])
+        self.assertEqual(LatestPrice.objects.get(vendor_key="acme").unit_price, Decimal("10"))
+        self.assertEqual(LatestPrice.objects.get(vendor_key="").unit_price, Decimal("8"))
+
+    def test_backfill_records_unseen_items_and_rebuilds_latest(self):
+        item = self.catalog_item()
+        BomItem.objects.create(bom=self.bom, name="Pump", vendor="Acme", unit_price=Decimal("99"))
+        BomItem.objects.create(bom=self.bom, name="Hose")
+        PriceObservation.objects.all().delete()
+        LatestPrice.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_latest_prices", "--backfill", stdout=out)
+        self.assertIn("CATALOG: 1 observations added", out.getvalue())
+        self.assertIn("BOM: 1 observations added", out.getvalue())
+        self.assertIn("LatestPrice rebuilt: 2 part/vendor rows", out.getvalue())
+        self.assertEqual(LatestPrice.objects.get(part_key="valve").source_id, item.id)
+
+        out = StringIO()
+        call_command("rebuild_latest_prices", "--backfill", stdout=out)
+        self.assertIn("CATALOG: 0 observations added", out.getvalue())
+        self.assertEqual(PriceObservation.objects.count(), 2)
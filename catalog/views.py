@@ -1,25 +1,71 @@
 from __future__ import annotations
 
+from datetime import datetime, time
+
 from django.db.models import Q
-from rest_framework import permissions, viewsets
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
 
 from boms.permissions import has_role
 from core.pagination import StandardResultsSetPagination
+from core.response_cache import CachedResponseMixin
 
+from . import prices, search
 from .models import CatalogItem
+from .services import import_catalog_items, iter_import_rows
 from .serializers import CatalogItemCreateSerializer, CatalogItemSerializer
 
 
-class CatalogItemViewSet(viewsets.ModelViewSet):
+def _parse_dt(value: str | None):
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if not d:
+            return None
+        dt = datetime.combine(d, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _price_row(row) -> dict:
+    return {
+        "part": row.part_key,
+        "vendor_name": row.vendor_name,
+        "currency": row.currency,
+        "unit_price": str(row.unit_price),
+        "tax_percent": None if row.tax_percent is None else str(row.tax_percent),
+        "source": row.source,
+        "source_id": row.source_id,
+        "observed_at": row.observed_at,
+    }
+
+
+class CatalogItemViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = StandardResultsSetPagination
+    cache_models = (CatalogItem,)
 
-    def get_queryset(self):
+    def get_cache_scope(self) -> str:
         user = self.request.user
         if has_role(user, "admin") or has_role(user, "procurement"):
-            qs = CatalogItem.objects.all()
-        else:
-            qs = CatalogItem.objects.filter(owner=user)
+            return "all"
+        return super().get_cache_scope()
+
+    def _visible_items(self):
+        user = self.request.user
+        if has_role(user, "admin") or has_role(user, "procurement"):
+            return CatalogItem.objects.all()
+        return CatalogItem.objects.filter(owner=user)
+
+    def get_queryset(self):
+        qs = self._visible_items()
 
         params = self.request.query_params
         search_term = params.get("search") or params.get("q")
@@ -41,6 +87,96 @@ class CatalogItemViewSet(viewsets.ModelViewSet):
 
         return qs.order_by("-updated_at")
 
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        Relevance-ranked search with facet counts and keyset paging.
+        """
+        params = request.query_params
+        query = (params.get("q") or params.get("search") or "").strip()
+        category = (params.get("category") or "").strip()
+        vendor = (params.get("vendor") or "").strip()
+        try:
+            page_size = min(max(int(params.get("page_size", 25)), 1), 200)
+        except (TypeError, ValueError):
+            page_size = 25
+        cursor = search.decode_cursor(params.get("cursor") or "")
+        if params.get("cursor") and cursor is None:
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        matched = search.rank_matches(self._visible_items(), query)
+        selected = matched
+        if category:
+            selected = selected.filter(category=category)
+        if vendor:
+            selected = selected.filter(vendor_name=vendor)
+
+        items, next_cursor = search.page_after(selected, cursor, page_size)
+        payload = {
+            "results": [
+                {**row, "rank": item.rank}
+                for item, row in zip(items, CatalogItemSerializer(items, many=True).data)
+            ],
+            "next_cursor": next_cursor,
+        }
+        if cursor is None:
+            # Facets only on the first page; they don't change while paging.
+            payload["facets"] = search.facets(
+                matched, scope=self.get_cache_scope(), query=query, category=category, vendor=vendor
+            )
+        return Response(payload, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser, FormParser])
+    def import_items(self, request):
+        """
+        Upsert the caller's catalog from an uploaded CSV or JSON-lines file.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = (request.data.get("file_format") or "").strip().lower()
+        if not fmt:
+            fmt = "jsonl" if upload.name.lower().endswith((".jsonl", ".ndjson")) else "csv"
+        if fmt not in {"csv", "jsonl"}:
+            return Response({"detail": "file_format must be csv or jsonl."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get("dry_run", "")).lower() in {"1", "true"}
+
+        result = import_catalog_items(owner=request.user, rows=iter_import_rows(upload, fmt=fmt), dry_run=dry_run)
+        return Response({**result.as_dict(), "dry_run": dry_run}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="prices/latest")
+    def latest_prices(self, request):
+        """
+        Latest price per vendor for up to 1000 part names (`?name=a&name=b`).
+        """
+        if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        names = [n for n in request.query_params.getlist("name") if n.strip()][:1000]
+        if not names:
+            return Response({"detail": "name is required."}, status=status.HTTP_400_BAD_REQUEST)
+        latest = prices.latest_prices(names, vendor=request.query_params.get("vendor") or None)
+        return Response(
+            {"results": {part: [_price_row(row) for row in rows] for part, rows in latest.items()}},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="prices/history")
+    def price_history(self, request):
+        """
+        Price observations for one part (newest first), optionally for one vendor.
+        """
+        if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        name = (request.query_params.get("name") or "").strip()
+        if not name:
+            return Response({"detail": "name is required."}, status=status.HTTP_400_BAD_REQUEST)
+        rows = prices.price_history(
+            name,
+            vendor=request.query_params.get("vendor"),
+            since=_parse_dt(request.query_params.get("since")),
+        )
+        return Response({"results": [_price_row(row) for row in rows]}, status=status.HTTP_200_OK)
+
     def get_serializer_class(self):
         if self.action in {"create", "update", "partial_update"}:
             return CatalogItemCreateSerializer
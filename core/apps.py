@@ -8,6 +8,13 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self) -> None:
+        from django.conf import settings
+
+        from core import checks  # noqa: F401
+        from core.response_cache import track_models
+
+        track_models(getattr(settings, "RESPONSE_CACHE_MODELS", []))
+
         # Work around Python 3.14 behavior changes around copying super()
         # objects which can break Django's template context copying and thus
         # the admin UI. Safe on older versions too.
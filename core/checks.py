@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+_NON_ATOMIC_BACKENDS = ("django.core.cache.backends.filebased.FileBasedCache",)
+
+
+@register()
+def check_graph_cache(app_configs, **kwargs):
+    """
+    core.graph_mailer's cross-process locks need a cache with an atomic `add`.
+    """
+    alias = getattr(settings, "GRAPH_CACHE_ALIAS", "graph")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if backend not in _NON_ATOMIC_BACKENDS:
+        return []
+    return [
+        Warning(
+            f"The '{alias}' cache uses {backend.rsplit('.', 1)[-1]}, whose add() is not atomic.",
+            hint=(
+                "Graph token refresh and send throttling are only single-flight with one worker process. "
+                "Set GRAPH_CACHE_BACKEND=db or redis."
+            ),
+            id="core.W001",
+        )
+    ]
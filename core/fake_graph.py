@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class FakeGraphConfig:
+    """
+    Behaviour of the stand-in Graph server.
+
+    Rates are probabilities per sendMail call (or per `$batch` entry).
+    """
+
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    token_expires_in: int = 3599
+
+
+@dataclass
+class FakeGraphStats:
+    token_requests: int = 0
+    send_requests: int = 0
+    batch_requests: int = 0
+    accepted: int = 0
+    throttled: int = 0
+    errors: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts: int) -> None:
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                "token_requests": self.token_requests,
+                "send_requests": self.send_requests,
+                "batch_requests": self.batch_requests,
+                "accepted": self.accepted,
+                "throttled": self.throttled,
+                "errors": self.errors,
+            }
+
+
+_TOKEN_PATH = re.compile(r"^/[^/]+/oauth2/v2\.0/token$")
+_SEND_PATH = re.compile(r"^(/v1\.0)?/users/[^/]+/sendMail$")
+_BATCH_PATH = re.compile(r"^/v1\.0/\$batch$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeGraphServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from BaseHTTPRequestHandler
+        return
+
+    def _send_json(self, status: int, payload: dict | None = None, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _sleep(self) -> None:
+        config = self.server.config
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _outcome(self) -> tuple[int, dict | None, dict]:
+        """
+        Status, error body and headers for one simulated sendMail.
+        """
+
+        config = self.server.config
+        roll = random.random()
+        if roll < config.throttle_rate:
+            self.server.stats.add(throttled=1)
+            return (
+                429,
+                {"error": {"code": "ApplicationThrottled", "message": "Too many requests"}},
+                {"Retry-After": f"{config.retry_after_seconds:g}"},
+            )
+        if roll < config.throttle_rate + config.error_rate:
+            self.server.stats.add(errors=1)
+            return 503, {"error": {"code": "ServiceUnavailable", "message": "Injected failure"}}, {}
+        self.server.stats.add(accepted=1)
+        return 202, None, {}
+
+    def do_POST(self):  # noqa: N802 - http.server naming
+        path = self.path.split("?", 1)[0]
+        body = self._read_body()
+        self._sleep()
+
+        if _TOKEN_PATH.match(path):
+            self.server.stats.add(token_requests=1)
+            self._send_json(
+                200,
+                {
+                    "token_type": "Bearer",
+                    "expires_in": self.server.config.token_expires_in,
+                    "access_token": uuid.uuid4().hex,
+                },
+            )
+            return
+
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            self._send_json(401, {"error": {"code": "InvalidAuthenticationToken", "message": "Missing token"}})
+            return
+
+        if _SEND_PATH.match(path):
+            self.server.stats.add(send_requests=1)
+            status, payload, headers = self._outcome()
+            self._send_json(status, payload, headers)
+            return
+
+        if _BATCH_PATH.match(path):
+            self.server.stats.add(batch_requests=1)
+            try:
+                requests_ = json.loads(body or b"{}").get("requests", [])
+            except ValueError:
+                self._send_json(400, {"error": {"code": "BadRequest", "message": "Invalid JSON"}})
+                return
+            if len(requests_) > 20:
+                self._send_json(400, {"error": {"code": "BadRequest", "message": "Too many requests in batch"}})
+                return
+            responses = []
+            for item in requests_:
+                if not _SEND_PATH.match(str(item.get("url", ""))):
+                    responses.append({"id": item.get("id"), "status": 404, "body": {"error": {"message": "Not found"}}})
+                    continue
+                status, payload, headers = self._outcome()
+                entry = {"id": item.get("id"), "status": status, "headers": headers}
+                if payload is not None:
+                    entry["body"] = payload
+                responses.append(entry)
+            self._send_json(200, {"responses": responses})
+            return
+
+        self._send_json(404, {"error": {"code": "NotFound", "message": path}})
+
+
+class FakeGraphServer(ThreadingHTTPServer):
+    """
+    In-process stand-in for login.microsoftonline.com and Graph mail endpoints.
+
+    Serves `/{tenant}/oauth2/v2.0/token`, `/v1.0/users/{id}/sendMail` and
+    `/v1.0/$batch`. Point `GRAPH_LOGIN_BASE_URL` at `base_url` and
+    `GRAPH_API_BASE_URL` at `base_url + "/v1.0"`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: FakeGraphConfig | None = None) -> None:
+        super().__init__((host, port), _Handler)
+        self.config = config or FakeGraphConfig()
+        self.stats = FakeGraphStats()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGraphServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-graph", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
 import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import InvalidCacheBackendError, cache, caches
 
 
 class GraphMailerConfigError(RuntimeError):
@@ -29,6 +31,12 @@ class GraphMailerHttpError(GraphMailerError):
         return f"HTTP {self.status_code}: {self.message}"
 
 
+class GraphMailerCircuitOpenError(GraphMailerError):
+    def __init__(self, retry_in: float) -> None:
+        super().__init__(f"Microsoft Graph circuit is open; retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
 @dataclass(frozen=True)
 class _Token:
     access_token: str
@@ -37,8 +45,58 @@ class _Token:
 
 _RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
 
+_TOKEN_CACHE_KEY = "graph:access_token"
+_TOKEN_LOCK_KEY = "graph:access_token:lock"
+_PAUSE_CACHE_KEY = "graph:pause_until"
+_BUCKET_CACHE_KEY = "graph:send_bucket"
+_BUCKET_LOCK_KEY = "graph:send_bucket:lock"
+_BREAKER_CACHE_KEY = "graph:breaker"
+_BREAKER_LOCK_KEY = "graph:breaker:lock"
+_BREAKER_SUCCESSES_KEY = "graph:breaker:successes"
+# A token closer than this to expiry is never handed out.
+_TOKEN_MIN_VALIDITY_SECONDS = 30
+
+# Graph JSON batching accepts at most 20 requests per `$batch` call.
+_BATCH_MAX_REQUESTS = 20
+
 logger = logging.getLogger("core.graph_mailer")
 
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "retries": 0, "token_fetches": 0}
+
+# Process-local copy of the shared token, so the hot path does not touch the
+# shared cache on every send.
+_local_token: _Token | None = None
+_refresh_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def request_stats() -> dict:
+    """
+    HTTP attempts, retries and token fetches made by this process.
+    """
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_request_stats() -> None:
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def _login_base_url() -> str:
+    return str(getattr(settings, "GRAPH_LOGIN_BASE_URL", "https://login.microsoftonline.com")).rstrip("/")
+
+
+def _api_base_url() -> str:
+    return str(getattr(settings, "GRAPH_API_BASE_URL", "https://graph.microsoft.com/v1.0")).rstrip("/")
+
 
 def _session() -> requests.Session:
     sess = getattr(_session, "_sess", None)
@@ -70,7 +128,25 @@ def _parse_error_text(resp: requests.Response) -> str:
     return text[:500] or f"HTTP {resp.status_code}"
 
 
-def _request_with_retry(method: str, url: str, **kwargs) -> requests.Response:
+def _retry_after_seconds(resp: requests.Response) -> float | None:
+    retry_after = resp.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except Exception:
+        return None
+
+
+def _request_with_retry(method: str, url: str, *, throttled: bool = False, **kwargs) -> requests.Response:
+    """
+    Issue a Graph request, retrying transient failures.
+
+    `throttled=True` makes every attempt wait for the shared send rate limiter
+    and any deployment-wide pause first. A 429/503 carrying `Retry-After` pauses
+    sending for every worker, not just this one.
+    """
+
     max_retries = int(getattr(settings, "GRAPH_MAX_RETRIES", 3))
     backoff = float(getattr(settings, "GRAPH_RETRY_BACKOFF_SECONDS", 1.0))
     timeout = int(getattr(settings, "GRAPH_TIMEOUT_SECONDS", 30))
@@ -78,28 +154,33 @@ def _request_with_retry(method: str, url: str, **kwargs) -> requests.Response:
 
     last_exc: Exception | None = None
     for attempt in range(max_retries):
+        if throttled:
+            _wait_for_send_permit()
         try:
             logger.debug("HTTP %s %s attempt=%s timeout=%ss", method, url, attempt + 1, timeout)
+            _count("requests")
+            if attempt:
+                _count("retries")
             resp = _session().request(method, url, **kwargs)
-            if resp.status_code in _RETRYABLE_STATUS_CODES and attempt < max_retries - 1:
-                retry_after = resp.headers.get("Retry-After")
-                sleep_for = None
-                if retry_after:
-                    try:
-                        sleep_for = float(retry_after)
-                    except Exception:
-                        sleep_for = None
-                logger.warning(
-                    "HTTP %s %s retryable status=%s retry_after=%s attempt=%s/%s",
-                    method,
-                    url,
-                    resp.status_code,
-                    retry_after,
-                    attempt + 1,
-                    max_retries,
-                )
-                time.sleep(sleep_for if sleep_for is not None else backoff * (2**attempt))
-                continue
+            if resp.status_code in _RETRYABLE_STATUS_CODES:
+                sleep_for = _retry_after_seconds(resp)
+                if sleep_for is not None and resp.status_code in {429, 503}:
+                    pause_sending(sleep_for)
+                if attempt < max_retries - 1:
+                    logger.warning(
+                        "HTTP %s %s retryable status=%s retry_after=%s attempt=%s/%s",
+                        method,
+                        url,
+                        resp.status_code,
+                        resp.headers.get("Retry-After"),
+                        attempt + 1,
+                        max_retries,
+                    )
+                    if throttled and sleep_for is not None:
+                        # The permit wait at the top of the loop honors the shared pause.
+                        continue
+                    time.sleep(sleep_for if sleep_for is not None else backoff * (2**attempt))
+                    continue
             return resp
         except requests.RequestException as exc:
             last_exc = exc
@@ -129,19 +210,295 @@ def _require_settings() -> None:
         raise GraphMailerConfigError(f"Missing Microsoft Graph settings: {', '.join(missing)}")
 
 
-def _get_access_token() -> str:
-    cached: _Token | None = cache.get("graph:access_token")
-    if cached and cached.expires_at > time.time() + 30:
-        logger.debug("Using cached Graph access token (expires_at=%s)", cached.expires_at)
-        return cached.access_token
+def _shared_cache():
+    """
+    Cache shared by every worker process and management command (see
+    `GRAPH_CACHE_ALIAS`); falls back to the default cache if not configured.
+    """
+    try:
+        return caches[getattr(settings, "GRAPH_CACHE_ALIAS", "graph")]
+    except InvalidCacheBackendError:
+        return cache
 
+
+@contextmanager
+def _shared_lock(key: str, *, ttl: float, wait: float, ready=None):
+    """
+    Cross-process mutex on top of `cache.add`.
+
+    Only as good as the backend's `add`: it is atomic on Redis, Memcached and
+    the database cache, so the `graph` cache alias (GRAPH_CACHE_BACKEND) must
+    use one of those when several worker processes send mail. The file
+    backend checks and writes in two steps, so two processes can both get the
+    lock; it is only safe with a single worker.
+
+    Yields True when the lock is held. Yields False if `ready()` becomes truthy
+    while waiting (someone else did the work) or if `wait` seconds pass, in which
+    case the caller proceeds without the lock rather than failing.
+    """
+
+    shared = _shared_cache()
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    acquired = False
+    while True:
+        if shared.add(key, owner, timeout=max(1, int(ttl))):
+            acquired = True
+            break
+        if ready is not None and ready():
+            break
+        if time.monotonic() >= deadline:
+            logger.warning("Timed out waiting for shared lock %s; proceeding without it", key)
+            break
+        time.sleep(0.05)
+    try:
+        yield acquired
+    finally:
+        if acquired and shared.get(key) == owner:
+            shared.delete(key)
+
+
+def pause_remaining() -> float:
+    """
+    Seconds left on the deployment-wide sending pause (0 when not paused).
+    """
+
+    pause_until = _shared_cache().get(_PAUSE_CACHE_KEY) or 0.0
+    return max(0.0, float(pause_until) - time.time())
+
+
+def pause_sending(seconds: float) -> None:
+    """
+    Pause Graph sends in every worker for `seconds` (never shortens a pause).
+    """
+
+    seconds = min(float(seconds), float(getattr(settings, "GRAPH_MAX_PAUSE_SECONDS", 300)))
+    if seconds <= 0:
+        return
+    shared = _shared_cache()
+    pause_until = time.time() + seconds
+    if pause_until > float(shared.get(_PAUSE_CACHE_KEY) or 0.0):
+        shared.set(_PAUSE_CACHE_KEY, pause_until, timeout=int(seconds) + 1)
+        logger.warning("Graph sending paused for %.1fs (Retry-After)", seconds)
+
+
+def _take_send_permit() -> float:
+    """
+    Take one token from the shared send bucket.
+
+    Returns 0 when a token was taken, otherwise the seconds until one is due.
+    """
+
+    rate = float(getattr(settings, "GRAPH_SEND_RATE_PER_SECOND", 0.5))
+    burst = float(getattr(settings, "GRAPH_SEND_BURST", 10))
+    if rate <= 0:
+        return 0.0
+    with _shared_lock(_BUCKET_LOCK_KEY, ttl=5, wait=5) as acquired:
+        if not acquired:
+            return 0.1
+        shared = _shared_cache()
+        now = time.time()
+        tokens, updated_at = shared.get(_BUCKET_CACHE_KEY) or (burst, now)
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            shared.set(_BUCKET_CACHE_KEY, (tokens - 1, now), timeout=None)
+            return 0.0
+        shared.set(_BUCKET_CACHE_KEY, (tokens, now), timeout=None)
+        return (1 - tokens) / rate
+
+
+def _wait_for_send_permit() -> None:
+    while True:
+        paused = pause_remaining()
+        if paused > 0:
+            time.sleep(min(paused, 5.0))
+            continue
+        wait = _take_send_permit()
+        if wait <= 0:
+            return
+        time.sleep(min(wait, 5.0))
+
+
+class _CircuitBreaker:
+    """
+    Circuit breaker around Graph sends, shared by every worker via the Graph cache.
+
+    CLOSED counts consecutive outage failures and trips to OPEN at
+    `GRAPH_BREAKER_FAILURE_THRESHOLD`. OPEN rejects calls for
+    `GRAPH_BREAKER_RESET_SECONDS`, then HALF_OPEN lets one probe through at a
+    time; `GRAPH_BREAKER_HALF_OPEN_SUCCESSES` successful probes close it again
+    and any failed probe reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def _settings(self) -> tuple[int, float, int]:
+        return (
+            max(1, int(getattr(settings, "GRAPH_BREAKER_FAILURE_THRESHOLD", 5))),
+            float(getattr(settings, "GRAPH_BREAKER_RESET_SECONDS", 30)),
+            max(1, int(getattr(settings, "GRAPH_BREAKER_HALF_OPEN_SUCCESSES", 2))),
+        )
+
+    def _load(self) -> dict:
+        state = _shared_cache().get(_BREAKER_CACHE_KEY)
+        if state is None:
+            state = {
+                "state": self.CLOSED,
+                "consecutive_failures": 0,
+                "half_open_successes": 0,
+                "opened_at": None,
+                "probe_started_at": None,
+                "failures": 0,
+                "rejected": 0,
+                "trips": 0,
+            }
+        return state
+
+    @contextmanager
+    def _update(self):
+        with _shared_lock(_BREAKER_LOCK_KEY, ttl=5, wait=5):
+            state = self._load()
+            try:
+                yield state
+            finally:
+                # Also on GraphMailerCircuitOpenError, so rejections are counted.
+                _shared_cache().set(_BREAKER_CACHE_KEY, state, timeout=None)
+
+    def _probe_timeout(self) -> float:
+        return float(getattr(settings, "GRAPH_TIMEOUT_SECONDS", 30)) * max(1, int(getattr(settings, "GRAPH_MAX_RETRIES", 3)))
+
+    def before_call(self) -> None:
+        """
+        Raise GraphMailerCircuitOpenError instead of letting a call through.
+        """
+
+        if self._load()["state"] == self.CLOSED:
+            return
+        _, reset_seconds, _ = self._settings()
+        now = time.time()
+        with self._update() as state:
+            if state["state"] == self.OPEN:
+                retry_in = state["opened_at"] + reset_seconds - now
+                if retry_in > 0:
+                    state["rejected"] += 1
+                    raise GraphMailerCircuitOpenError(retry_in)
+                state["state"] = self.HALF_OPEN
+                state["half_open_successes"] = 0
+                state["probe_started_at"] = None
+                logger.info("Graph circuit half-open; probing")
+            if state["state"] == self.HALF_OPEN:
+                probe_started_at = state["probe_started_at"]
+                if probe_started_at is not None and now - probe_started_at < self._probe_timeout():
+                    state["rejected"] += 1
+                    raise GraphMailerCircuitOpenError(max(1.0, reset_seconds / 2))
+                state["probe_started_at"] = now
+
+    def record_success(self) -> None:
+        self._count_success()
+        # The common case: nothing to reset, so don't serialise every send on the lock.
+        current = self._load()
+        if current["state"] == self.CLOSED and current["consecutive_failures"] == 0:
+            return
+        _, _, needed = self._settings()
+        with self._update() as state:
+            state["consecutive_failures"] = 0
+            if state["state"] == self.HALF_OPEN:
+                state["probe_started_at"] = None
+                state["half_open_successes"] += 1
+                if state["half_open_successes"] >= needed:
+                    state["state"] = self.CLOSED
+                    state["opened_at"] = None
+                    logger.info("Graph circuit closed")
+
+    def record_failure(self) -> None:
+        threshold, _, _ = self._settings()
+        with self._update() as state:
+            state["failures"] += 1
+            state["consecutive_failures"] += 1
+            tripped = state["state"] == self.HALF_OPEN or (
+                state["state"] == self.CLOSED and state["consecutive_failures"] >= threshold
+            )
+            if tripped:
+                state["state"] = self.OPEN
+                state["opened_at"] = time.time()
+                state["probe_started_at"] = None
+                state["trips"] += 1
+                logger.error("Graph circuit opened after %s consecutive failures", state["consecutive_failures"])
+
+    def _count_success(self) -> None:
+        # Kept outside the breaker state so counting doesn't need the lock.
+        cache = _shared_cache()
+        try:
+            cache.incr(_BREAKER_SUCCESSES_KEY)
+        except ValueError:
+            if not cache.add(_BREAKER_SUCCESSES_KEY, 1, timeout=None):
+                cache.incr(_BREAKER_SUCCESSES_KEY)
+
+    def retry_in(self) -> float:
+        state = self._load()
+        if state["state"] != self.OPEN:
+            return 0.0
+        _, reset_seconds, _ = self._settings()
+        return max(0.0, state["opened_at"] + reset_seconds - time.time())
+
+    def snapshot(self) -> dict:
+        state = dict(self._load())
+        state["successes"] = _shared_cache().get(_BREAKER_SUCCESSES_KEY, 0)
+        state["retry_in"] = round(self.retry_in(), 1)
+        return state
+
+    def reset(self) -> None:
+        _shared_cache().delete_many([_BREAKER_CACHE_KEY, _BREAKER_SUCCESSES_KEY])
+
+
+_breaker = _CircuitBreaker()
+
+
+def breaker_snapshot() -> dict:
+    """
+    Current circuit breaker state and counters, plus the sending pause.
+    """
+
+    snapshot = _breaker.snapshot()
+    snapshot["pause_remaining"] = round(pause_remaining(), 1)
+    return snapshot
+
+
+def _is_outage(exc: GraphMailerHttpError) -> bool:
+    return exc.status_code is None or exc.status_code == 429 or exc.status_code >= 500
+
+
+def _refresh_margin() -> float:
+    return float(getattr(settings, "GRAPH_TOKEN_REFRESH_MARGIN_SECONDS", 300))
+
+
+def _load_token() -> _Token | None:
+    global _local_token
+    token = _local_token
+    if token and token.expires_at - time.time() > _refresh_margin():
+        return token
+    token = _shared_cache().get(_TOKEN_CACHE_KEY)
+    if token is not None:
+        _local_token = token
+    return token
+
+
+def _is_usable(token: _Token | None, *, margin: float = _TOKEN_MIN_VALIDITY_SECONDS) -> bool:
+    return bool(token and token.expires_at - time.time() > margin)
+
+
+def _fetch_access_token() -> _Token:
+    global _local_token
     _require_settings()
     logger.info(
         "Requesting Graph access token tenant=%s client_id=%s",
         settings.GRAPH_TENANT_ID,
         settings.GRAPH_CLIENT_ID,
     )
-    url = f"https://login.microsoftonline.com/{settings.GRAPH_TENANT_ID}/oauth2/v2.0/token"
+    _count("token_fetches")
+    url = f"{_login_base_url()}/{settings.GRAPH_TENANT_ID}/oauth2/v2.0/token"
     data = {
         "client_id": settings.GRAPH_CLIENT_ID,
         "client_secret": settings.GRAPH_CLIENT_SECRET,
@@ -159,20 +516,65 @@ def _get_access_token() -> str:
         logger.error("Token request exception status=%s error=%s", status, (body[:500] or str(exc)))
         raise GraphMailerHttpError(status, (body[:500] or str(exc))) from exc
     payload = resp.json()
-    token = _Token(
-        access_token=payload["access_token"],
-        expires_at=time.time() + int(payload.get("expires_in", 3599)),
-    )
-    cache.set("graph:access_token", token, timeout=max(1, int(payload.get("expires_in", 3599)) - 30))
-    logger.info("Graph access token obtained expires_in=%ss", int(payload.get("expires_in", 3599)))
-    return token.access_token
+    expires_in = int(payload.get("expires_in", 3599))
+    token = _Token(access_token=payload["access_token"], expires_at=time.time() + expires_in)
+    _shared_cache().set(_TOKEN_CACHE_KEY, token, timeout=max(1, expires_in - _TOKEN_MIN_VALIDITY_SECONDS))
+    _local_token = token
+    logger.info("Graph access token obtained expires_in=%ss", expires_in)
+    return token
 
 
-def send_html_email(*, to_email: str, subject: str, html_body: str) -> None:
-    token = _get_access_token()
-    url = f"https://graph.microsoft.com/v1.0/users/{settings.GRAPH_SENDER}/sendMail"
-    client_request_id = str(uuid.uuid4())
-    payload = {
+def _get_access_token() -> str:
+    """
+    Return a Graph token, refreshing it at most once per deployment.
+
+    The token lives in the shared Graph cache. Inside the refresh margin the
+    current token keeps being served while a single caller (across threads and
+    processes) fetches the next one; only an expired token makes callers wait.
+    """
+
+    token = _load_token()
+    if _is_usable(token, margin=_refresh_margin()):
+        return token.access_token
+
+    lock_ttl = float(getattr(settings, "GRAPH_TIMEOUT_SECONDS", 30)) * 2
+    if _is_usable(token):
+        # Proactive refresh: whoever loses the race keeps the current token.
+        if not _refresh_lock.acquire(blocking=False):
+            return token.access_token
+        try:
+            with _shared_lock(_TOKEN_LOCK_KEY, ttl=lock_ttl, wait=0) as acquired:
+                if not acquired:
+                    return token.access_token
+                fresh = _shared_cache().get(_TOKEN_CACHE_KEY)
+                if _is_usable(fresh, margin=_refresh_margin()):
+                    return fresh.access_token
+                try:
+                    return _fetch_access_token().access_token
+                except GraphMailerError as exc:
+                    logger.warning("Proactive Graph token refresh failed; using current token: %s", exc)
+                    return token.access_token
+        finally:
+            _refresh_lock.release()
+
+    with _refresh_lock:
+        token = _load_token()
+        if _is_usable(token):
+            return token.access_token
+
+        def _refreshed_elsewhere() -> bool:
+            return _is_usable(_shared_cache().get(_TOKEN_CACHE_KEY))
+
+        with _shared_lock(_TOKEN_LOCK_KEY, ttl=lock_ttl, wait=lock_ttl, ready=_refreshed_elsewhere) as acquired:
+            token = _load_token()
+            if _is_usable(token):
+                logger.debug("Using Graph access token refreshed by another worker (lock=%s)", acquired)
+                return token.access_token
+            return _fetch_access_token().access_token
+
+
+def _mail_payload(*, to_email: str, subject: str, html_body: str) -> dict:
+    return {
         "message": {
             "subject": subject,
             "body": {"contentType": "HTML", "content": html_body},
@@ -180,6 +582,35 @@ def send_html_email(*, to_email: str, subject: str, html_body: str) -> None:
         },
         "saveToSentItems": bool(getattr(settings, "GRAPH_SAVE_TO_SENT_ITEMS", False)),
     }
+
+
+def send_html_email(*, to_email: str, subject: str, html_body: str) -> None:
+    """
+    Send one email through Graph, failing fast while the circuit is open.
+    """
+
+    _require_settings()
+    _breaker.before_call()
+    try:
+        _send_html_email(to_email=to_email, subject=subject, html_body=html_body)
+    except GraphMailerHttpError as exc:
+        if _is_outage(exc):
+            _breaker.record_failure()
+        else:
+            # Graph answered (e.g. a rejected recipient); the service itself is up.
+            _breaker.record_success()
+        raise
+    except Exception:
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+
+
+def _send_html_email(*, to_email: str, subject: str, html_body: str) -> None:
+    token = _get_access_token()
+    url = f"{_api_base_url()}/users/{settings.GRAPH_SENDER}/sendMail"
+    client_request_id = str(uuid.uuid4())
+    payload = _mail_payload(to_email=to_email, subject=subject, html_body=html_body)
     logger.info(
         "Sending Graph email sender=%s to=%s subject=%s client_request_id=%s",
         settings.GRAPH_SENDER,
@@ -191,6 +622,7 @@ def send_html_email(*, to_email: str, subject: str, html_body: str) -> None:
         resp = _request_with_retry(
             "POST",
             url,
+            throttled=True,
             json=payload,
             headers={
                 "Authorization": f"Bearer {token}",
@@ -224,3 +656,117 @@ def send_html_email(*, to_email: str, subject: str, html_body: str) -> None:
             (body[:500] or str(exc)),
         )
         raise GraphMailerHttpError(status, (body[:500] or str(exc))) from exc
+
+
+def send_html_email_batch(messages: list[dict]) -> list[GraphMailerError | None]:
+    """
+    Send many emails through Graph JSON batching (`$batch`, 20 per request).
+
+    Each message takes the keyword arguments of send_html_email. Returns one
+    entry per message: None when Graph accepted it, otherwise its error.
+    Throttled or failed entries are retried in the next batch attempt. A
+    request that fails as a whole (or is refused by the open circuit) marks
+    its own messages with that error; later requests are still attempted and
+    earlier outcomes are kept.
+    """
+
+    _require_settings()
+    results: list[GraphMailerError | None] = [None] * len(messages)
+    for start in range(0, len(messages), _BATCH_MAX_REQUESTS):
+        chunk = list(range(start, min(start + _BATCH_MAX_REQUESTS, len(messages))))
+        try:
+            _breaker.before_call()
+            errors = _send_batch(messages, chunk)
+        except GraphMailerCircuitOpenError as exc:
+            errors = dict.fromkeys(chunk, exc)
+        except GraphMailerHttpError as exc:
+            if _is_outage(exc):
+                _breaker.record_failure()
+            else:
+                _breaker.record_success()
+            errors = dict.fromkeys(chunk, exc)
+        except GraphMailerError as exc:
+            _breaker.record_failure()
+            errors = dict.fromkeys(chunk, exc)
+        except Exception:
+            _breaker.record_failure()
+            raise
+        else:
+            _breaker.record_success()
+        for index, error in errors.items():
+            results[index] = error
+    return results
+
+
+def _send_batch(messages: list[dict], indexes: list[int]) -> dict[int, GraphMailerHttpError]:
+    max_retries = int(getattr(settings, "GRAPH_MAX_RETRIES", 3))
+    url = f"{_api_base_url()}/$batch"
+    sender = settings.GRAPH_SENDER
+    pending = list(indexes)
+    # Every message counts as failed until Graph reports it accepted.
+    errors: dict[int, GraphMailerHttpError] = {
+        index: GraphMailerHttpError(None, "No response for this message in $batch.") for index in indexes
+    }
+    for attempt in range(max_retries):
+        token = _get_access_token()
+        for _ in pending:
+            _wait_for_send_permit()
+        body = {
+            "requests": [
+                {
+                    "id": str(index),
+                    "method": "POST",
+                    "url": f"/users/{sender}/sendMail",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": _mail_payload(**messages[index]),
+                }
+                for index in pending
+            ]
+        }
+        logger.info("Sending Graph $batch size=%s attempt=%s/%s", len(pending), attempt + 1, max_retries)
+        try:
+            resp = _request_with_retry(
+                "POST",
+                url,
+                json=body,
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+            )
+        except requests.RequestException as exc:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+            raise GraphMailerHttpError(status, str(exc)) from exc
+        if resp.status_code >= 400:
+            logger.error("$batch failed status=%s body=%s", resp.status_code, _parse_error_text(resp))
+            raise GraphMailerHttpError(resp.status_code, _parse_error_text(resp))
+
+        retry: list[int] = []
+        responses = resp.json().get("responses", [])
+        answered = {int(item.get("id")) for item in responses}
+        # Messages Graph left out of the response are sent again.
+        retry.extend(index for index in pending if index not in answered)
+        for item in responses:
+            index = int(item.get("id"))
+            status = int(item.get("status") or 0)
+            if status < 400:
+                errors.pop(index, None)
+                continue
+            error_body = item.get("body") or {}
+            message = str((error_body.get("error") or {}).get("message") or f"HTTP {status}")
+            errors[index] = GraphMailerHttpError(status, message)
+            if status in _RETRYABLE_STATUS_CODES:
+                retry_after = (item.get("headers") or {}).get("Retry-After")
+                if retry_after and status in {429, 503}:
+                    try:
+                        pause_sending(float(retry_after))
+                    except ValueError:
+                        pass
+                retry.append(index)
+        if not retry:
+            break
+        if attempt < max_retries - 1:
+            _count("retries", len(retry))
+            if pause_remaining() <= 0:
+                backoff = float(getattr(settings, "GRAPH_RETRY_BACKOFF_SECONDS", 1.0))
+                time.sleep(backoff * (2**attempt))
+        pending = retry
+    return errors
+
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+from core.graph_mailer import GraphMailerCircuitOpenError, GraphMailerError, _require_settings, send_html_email
+
+
+logger = logging.getLogger("core.graph_mailer")
+
+
+class MailQueueFullError(GraphMailerError):
+    pass
+
+
+# Bounds for how long a message waits before the next try while the circuit is open.
+_MIN_DEFER_SECONDS = 1.0
+_MAX_DEFER_SECONDS = 30.0
+
+
+@dataclass(eq=False)
+class _Job:
+    to_email: str
+    subject: str
+    html_body: str
+    deadline: float
+    future: Future = field(default_factory=Future)
+
+
+class MailDispatcher:
+    """
+    Deliver Graph mail from a bounded pool of background threads.
+
+    Callers get a Future back immediately; waiting on the shared rate limiter,
+    `Retry-After` pauses and retry backoff all happens on the pool threads.
+    While the Graph circuit is open, queued mail is held (up to
+    `GRAPH_DISPATCH_MAX_DEFER_SECONDS`) instead of failing. Held messages wait
+    on a timer, not on a pool thread, so mail behind them keeps moving.
+    `shutdown()` gives held messages one last try instead of dropping them.
+    """
+
+    def __init__(self, *, max_workers: int, max_queue: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="graph-mail")
+        self.max_queue = max(1, max_queue)
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+        # Messages waiting for the circuit to close -> their retry timer.
+        self._deferred: dict[_Job, threading.Timer] = {}
+        self._closed = False
+
+    def queued(self) -> int:
+        return self._queued
+
+    def deferred(self) -> int:
+        return len(self._deferred)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        with self._queued_lock:
+            self._closed = True
+            deferred = list(self._deferred.items())
+            self._deferred.clear()
+        for job, timer in deferred:
+            timer.cancel()
+            self._schedule(job)
+        self._executor.shutdown(wait=wait)
+
+    def submit(self, *, to_email: str, subject: str, html_body: str) -> Future:
+        _require_settings()
+        if not self._slots.acquire(blocking=False):
+            raise MailQueueFullError("Mail queue is full; message not accepted.")
+        with self._queued_lock:
+            self._queued += 1
+        max_defer = float(getattr(settings, "GRAPH_DISPATCH_MAX_DEFER_SECONDS", 900))
+        job = _Job(to_email=to_email, subject=subject, html_body=html_body, deadline=time.monotonic() + max_defer)
+        try:
+            self._executor.submit(self._deliver, job)
+        except Exception:
+            self._release()
+            raise
+        job.future.add_done_callback(lambda f: self._done(f, to_email=to_email, subject=subject))
+        return job.future
+
+    def _schedule(self, job: _Job) -> None:
+        try:
+            self._executor.submit(self._deliver, job)
+        except RuntimeError as exc:
+            # Shut down while the message was held.
+            self._finish(job, exc)
+
+    def _deliver(self, job: _Job) -> None:
+        if job.future.done():
+            return
+        try:
+            send_html_email(to_email=job.to_email, subject=job.subject, html_body=job.html_body)
+        except GraphMailerCircuitOpenError as exc:
+            if not self._defer(job, exc):
+                self._finish(job, exc)
+        except BaseException as exc:
+            self._finish(job, exc)
+        else:
+            self._finish(job)
+        finally:
+            # The shared Graph cache may be database-backed; don't leak this thread's connection.
+            connections.close_all()
+
+    def _defer(self, job: _Job, exc: GraphMailerCircuitOpenError) -> bool:
+        remaining = job.deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        delay = min(max(exc.retry_in, _MIN_DEFER_SECONDS), remaining, _MAX_DEFER_SECONDS)
+        timer = threading.Timer(delay, self._resume, args=(job,))
+        timer.daemon = True
+        with self._queued_lock:
+            if self._closed:
+                return False
+            self._deferred[job] = timer
+        logger.info("Holding email to=%s for %.0fs while Graph circuit is open (%s)", job.to_email, delay, exc)
+        timer.start()
+        return True
+
+    def _resume(self, job: _Job) -> None:
+        with self._queued_lock:
+            if self._deferred.pop(job, None) is None:
+                # shutdown() already took it over.
+                return
+        self._schedule(job)
+
+    def _finish(self, job: _Job, exc: BaseException | None = None) -> None:
+        try:
+            if exc is None:
+                job.future.set_result(None)
+            else:
+                job.future.set_exception(exc)
+        except InvalidStateError:
+            # Cancelled by the caller in the meantime.
+            pass
+
+    def _release(self) -> None:
+        with self._queued_lock:
+            self._queued -= 1
+        self._slots.release()
+
+    def _done(self, future: Future, *, to_email: str, subject: str) -> None:
+        self._release()
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.error("Queued email to=%s subject=%s failed: %s", to_email, subject, exc)
+
+
+_dispatcher: MailDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> MailDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = MailDispatcher(
+                    max_workers=int(getattr(settings, "GRAPH_DISPATCH_WORKERS", 4)),
+                    max_queue=int(getattr(settings, "GRAPH_DISPATCH_QUEUE_SIZE", 1000)),
+                )
+    return _dispatcher
+
+
+def dispatcher_stats() -> dict:
+    """
+    Queue usage of this process' dispatcher (empty before first use).
+    """
+
+    if _dispatcher is None:
+        return {}
+    return {"queued": _dispatcher.queued(), "deferred": _dispatcher.deferred(), "max_queue": _dispatcher.max_queue}
+
+
+def dispatch_html_email(*, to_email: str, subject: str, html_body: str) -> Future:
+    """
+    Queue an email for background delivery and return without blocking.
+
+    Raises GraphMailerConfigError when Graph is not configured and
+    MailQueueFullError when the queue is saturated; delivery failures are
+    logged and reported on the returned Future.
+    """
+
+    return get_dispatcher().submit(to_email=to_email, subject=subject, html_body=html_body)
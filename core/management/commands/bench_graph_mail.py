@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core import graph_mailer
+from core.fake_graph import FakeGraphServer
+from core.mail_dispatch import MailDispatcher
+
+from .fake_graph_server import add_fake_graph_arguments, fake_graph_config
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark core.graph_mailer against the local fake Graph server (or --url) and report "
+        "throughput, p50/p99 latency and retries. Never talks to Microsoft unless --url says so."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200, help="Messages to send")
+        parser.add_argument("--concurrency", type=int, default=4, help="Sender threads / dispatcher workers")
+        parser.add_argument(
+            "--mode",
+            choices=["send", "batch", "dispatch"],
+            default="send",
+            help="send: send_html_email from N threads; batch: $batch of 20; dispatch: MailDispatcher",
+        )
+        parser.add_argument("--rate", type=float, default=0.0, help="GRAPH_SEND_RATE_PER_SECOND (0 = unlimited)")
+        parser.add_argument("--burst", type=int, default=10, help="GRAPH_SEND_BURST")
+        parser.add_argument("--timeout", type=int, default=None, help="GRAPH_TIMEOUT_SECONDS")
+        parser.add_argument("--max-retries", type=int, default=None, help="GRAPH_MAX_RETRIES")
+        parser.add_argument("--backoff", type=float, default=None, help="GRAPH_RETRY_BACKOFF_SECONDS")
+        parser.add_argument("--url", default="", help="Use an already running fake server instead of starting one")
+        add_fake_graph_arguments(parser)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        if count <= 0:
+            raise CommandError("--count must be positive.")
+
+        server = None
+        base_url = options["url"].rstrip("/")
+        if not base_url:
+            server = FakeGraphServer(config=fake_graph_config(options)).start()
+            base_url = server.base_url
+
+        overrides = {
+            "GRAPH_TENANT_ID": "bench-tenant",
+            "GRAPH_CLIENT_ID": "bench-client",
+            "GRAPH_CLIENT_SECRET": "bench-secret",
+            "GRAPH_SENDER": "bench@example.com",
+            "GRAPH_LOGIN_BASE_URL": base_url,
+            "GRAPH_API_BASE_URL": f"{base_url}/v1.0",
+            "GRAPH_SEND_RATE_PER_SECOND": options["rate"],
+            "GRAPH_SEND_BURST": options["burst"],
+            # Keep benchmark throttle/breaker state away from the real shared cache.
+            "CACHES": {
+                **settings.CACHES,
+                "graph-bench": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "graph-bench"},
+            },
+            "GRAPH_CACHE_ALIAS": "graph-bench",
+        }
+        for option, setting in (
+            ("timeout", "GRAPH_TIMEOUT_SECONDS"),
+            ("max_retries", "GRAPH_MAX_RETRIES"),
+            ("backoff", "GRAPH_RETRY_BACKOFF_SECONDS"),
+        ):
+            if options[option] is not None:
+                overrides[setting] = options[option]
+
+        try:
+            with override_settings(**overrides):
+                graph_mailer._local_token = None
+                graph_mailer.reset_request_stats()
+                latencies, failures, elapsed = self._run(options["mode"], count, options["concurrency"])
+                stats = graph_mailer.request_stats()
+                breaker = graph_mailer.breaker_snapshot()
+        finally:
+            graph_mailer._local_token = None
+            if server is not None:
+                server.stop()
+
+        sent = count - failures
+        self.stdout.write(f"mode={options['mode']} count={count} concurrency={options['concurrency']} target={base_url}")
+        self.stdout.write(f"elapsed: {elapsed:.2f}s")
+        self.stdout.write(f"throughput: {sent / elapsed if elapsed else 0:.1f} msg/s ({sent} sent, {failures} failed)")
+        self.stdout.write(
+            f"latency: p50={_percentile(latencies, 50) * 1000:.1f}ms p99={_percentile(latencies, 99) * 1000:.1f}ms "
+            f"mean={statistics.fmean(latencies) * 1000 if latencies else 0:.1f}ms"
+        )
+        self.stdout.write(
+            f"http: requests={stats['requests']} retries={stats['retries']} token_fetches={stats['token_fetches']}"
+        )
+        self.stdout.write(f"circuit: state={breaker['state']} trips={breaker['trips']} rejected={breaker['rejected']}")
+        if server is not None:
+            self.stdout.write(f"server: {server.stats.as_dict()}")
+
+    def _message(self, index: int) -> dict:
+        return {"to_email": f"user{index}@example.com", "subject": f"Benchmark {index}", "html_body": "<p>bench</p>"}
+
+    def _run(self, mode: str, count: int, concurrency: int) -> tuple[list[float], int, float]:
+        latencies: list[float] = []
+        failures = 0
+        lock = threading.Lock()
+
+        def record(started: float, ok: bool) -> None:
+            nonlocal failures
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    failures += 1
+
+        started_all = time.perf_counter()
+        if mode == "batch":
+            messages = [self._message(i) for i in range(count)]
+            chunks = [messages[i : i + 20] for i in range(0, count, 20)]
+
+            def send_chunk(chunk: list[dict]) -> None:
+                started = time.perf_counter()
+                # One outcome per message: None when accepted, else its error.
+                results = graph_mailer.send_html_email_batch(chunk)
+                for error in results:
+                    record(started, error is None)
+
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                list(pool.map(send_chunk, chunks))
+        elif mode == "dispatch":
+            dispatcher = MailDispatcher(max_workers=concurrency, max_queue=count)
+            futures = []
+            for i in range(count):
+                started = time.perf_counter()
+                future = dispatcher.submit(**self._message(i))
+                future.add_done_callback(lambda f, started=started: record(started, f.exception() is None))
+                futures.append(future)
+            wait(futures)
+            dispatcher.shutdown()
+        else:
+
+            def send_one(index: int) -> None:
+                started = time.perf_counter()
+                try:
+                    graph_mailer.send_html_email(**self._message(index))
+                except graph_mailer.GraphMailerError:
+                    record(started, False)
+                    return
+                record(started, True)
+
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                list(pool.map(send_one, range(count)))
+        return latencies, failures, time.perf_counter() - started_all
@@ -7,6 +7,8 @@ from pathlib import Path
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from core.graph_mailer import breaker_snapshot
+
 
 def _hash_secret(value: str) -> str:
     return hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
@@ -43,3 +45,4 @@ class Command(BaseCommand):
         self.stdout.write(f"GRAPH_TIMEOUT_SECONDS: {getattr(settings, 'GRAPH_TIMEOUT_SECONDS', None)}")
         self.stdout.write(f"GRAPH_MAX_RETRIES: {getattr(settings, 'GRAPH_MAX_RETRIES', None)}")
         self.stdout.write(f"GRAPH_RETRY_BACKOFF_SECONDS: {getattr(settings, 'GRAPH_RETRY_BACKOFF_SECONDS', None)}")
+        self.stdout.write(f"Graph circuit: {breaker_snapshot()}")
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from core.fake_graph import FakeGraphConfig, FakeGraphServer
+
+
+def add_fake_graph_arguments(parser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Base latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency (0..N ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 503 per message")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of a 429 per message")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+
+
+def fake_graph_config(options) -> FakeGraphConfig:
+    return FakeGraphConfig(
+        latency_ms=options["latency_ms"],
+        jitter_ms=options["jitter_ms"],
+        error_rate=options["error_rate"],
+        throttle_rate=options["throttle_rate"],
+        retry_after_seconds=options["retry_after"],
+    )
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the Microsoft Graph token, sendMail and $batch endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        add_fake_graph_arguments(parser)
+
+    def handle(self, *args, **options):
+        server = FakeGraphServer(options["host"], options["port"], fake_graph_config(options))
+        self.stdout.write(f"Fake Graph listening on {server.base_url}")
+        self.stdout.write(f"  GRAPH_LOGIN_BASE_URL={server.base_url}")
+        self.stdout.write(f"  GRAPH_API_BASE_URL={server.base_url}/v1.0")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Stats: {server.stats.as_dict()}")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -8,3 +8,13 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = "page_size"
     max_page_size = 200
 
+
+
+class StandardCursorPagination(CursorPagination):
+    """
+    Keyset pagination for large lists; subclasses set `ordering` to a unique field.
+    """
+
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 200
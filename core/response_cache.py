@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from typing import Iterable
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.roles import user_roles
+
+logger = logging.getLogger(__name__)
+
+_GENERATION_PREFIX = "gen"
+_RESPONSE_PREFIX = "resp"
+
+
+def _generation_key(model) -> str:
+    return f"{_GENERATION_PREFIX}:{model._meta.label_lower}"
+
+
+def _initial_generation() -> int:
+    # Seeded from the clock so a generation key lost to eviction can never
+    # come back with a value that old response entries were stored under.
+    return int(time.time() * 1000)
+
+
+def get_generations(models: Iterable) -> dict[str, int]:
+    """
+    Current generation for each model (label -> counter), creating missing counters.
+    """
+    keys = {_generation_key(model): model for model in models}
+    if not keys:
+        return {}
+    found = cache.get_many(list(keys))
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_generation(), timeout=None)
+            found[key] = cache.get(key, _initial_generation())
+    return {keys[key]._meta.label_lower: int(found[key]) for key in keys}
+
+
+def bump_generation(*models) -> None:
+    """
+    Invalidate cached responses built from these models.
+
+    Called automatically on post_save/post_delete for RESPONSE_CACHE_MODELS;
+    call it directly after queryset.update(), bulk_create() or bulk_update(),
+    which don't send those signals. Inside a transaction the bump waits for the
+    commit: bumping earlier would let a concurrent read cache the pre-commit rows
+    under the new generation, where they'd stay until they expire.
+    """
+    transaction.on_commit(lambda: _increment_generations(models))
+
+
+def _increment_generations(models) -> None:
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), timeout=None)
+
+
+# Saves that only touch these fields don't change anything a cached response shows.
+_IGNORED_UPDATE_FIELDS = frozenset({"last_login"})
+
+
+def _on_model_change(sender, **kwargs) -> None:
+    if kwargs.get("raw"):
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= _IGNORED_UPDATE_FIELDS:
+        return
+    bump_generation(sender)
+
+
+def track_models(labels: Iterable[str]) -> None:
+    """
+    Connect generation bumps for models given as "app_label.ModelName".
+    """
+    for label in labels:
+        model = apps.get_model(label)
+        uid = f"response-cache:{model._meta.label_lower}"
+        post_save.connect(_on_model_change, sender=model, dispatch_uid=f"{uid}:save", weak=False)
+        post_delete.connect(_on_model_change, sender=model, dispatch_uid=f"{uid}:delete", weak=False)
+
+
+def _query_fingerprint(request) -> str:
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    raw = f"{request.path}?{params!r}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class CachedResponseMixin:
+    """
+    Cache GET list/retrieve responses in the shared cache.
+
+    Keys combine the view, the caller's scope, the generation of every model in
+    `cache_models` and the request path + query params. Writes to those models
+    bump their generation, so stale entries are simply never read again and age
+    out after RESPONSE_CACHE_TIMEOUT_SECONDS. The key also serves as the ETag;
+    a matching `If-None-Match` gets a 304 without touching the database.
+
+    `cache_scope` decides who may share an entry:
+    - "global": everyone sees the same data
+    - "role": users with the same set of roles share entries
+    - "user": per user (default)
+    Override `get_cache_scope()` for anything more specific.
+    """
+
+    cache_models: tuple = ()
+    cache_scope = "user"
+
+    def get_cache_scope(self) -> str:
+        user = self.request.user
+        if self.cache_scope == "global":
+            return "global"
+        if self.cache_scope == "role":
+            return "role:" + (",".join(sorted(user_roles(user))) or "employee")
+        return f"user:{user.pk}"
+
+    def _response_cache_key(self, request) -> str | None:
+        if not getattr(settings, "RESPONSE_CACHE_ENABLED", True) or not self.cache_models:
+            return None
+        generations = get_generations(self.cache_models)
+        gen = ".".join(str(generations[label]) for label in sorted(generations))
+        action = getattr(self, "action", None) or request.method.lower()
+        view = f"{self.__class__.__module__}.{self.__class__.__name__}.{action}"
+        return f"{_RESPONSE_PREFIX}:{view}:{self.get_cache_scope()}:{gen}:{_query_fingerprint(request)}"
+
+    def _cached_response(self, request, render) -> Response:
+        try:
+            key = self._response_cache_key(request)
+        except Exception:
+            # The cache is an optimisation; never fail a read because of it.
+            logger.exception("Response cache unavailable")
+            key = None
+        if key is None:
+            return render()
+
+        etag = '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in {tag.strip() for tag in if_none_match.split(",")}:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response["ETag"] = etag
+            return response
+
+        hit = cache.get(key)
+        if hit is not None:
+            response = Response(hit)
+            response["X-Cache"] = "HIT"
+            response["ETag"] = etag
+            return response
+
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=getattr(settings, "RESPONSE_CACHE_TIMEOUT_SECONDS", 300))
+            response["ETag"] = etag
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -1,3 +1,351 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from catalog.models import CatalogItem
+from core import graph_mailer, mail_dispatch
+from core.response_cache import get_generations
+
+GRAPH_SETTINGS = {
+    "GRAPH_TENANT_ID": "test-tenant",
+    "GRAPH_CLIENT_ID": "test-client",
+    "GRAPH_CLIENT_SECRET": "test-secret",
+    "GRAPH_SENDER": "sender@example.com",
+    "CACHES": {
+        **settings.CACHES,
+        "graph-test": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "graph-test"},
+    },
+    "GRAPH_CACHE_ALIAS": "graph-test",
+}
+
+
+@override_settings(**GRAPH_SETTINGS)
+class SendHtmlEmailBatchTests(SimpleTestCase):
+    def setUp(self):
+        graph_mailer._shared_cache().clear()
+        self.messages = [
+            {"to_email": f"user{i}@example.com", "subject": "Hi", "html_body": "<p>hi</p>"} for i in range(45)
+        ]
+
+    def test_failed_request_keeps_earlier_outcomes(self):
+        rejected = graph_mailer.GraphMailerHttpError(400, "Bad request")
+        outage = graph_mailer.GraphMailerHttpError(503, "Unavailable")
+
+        def send_batch(messages, indexes):
+            if indexes[0] == 20:
+                raise outage
+            return {indexes[0]: rejected}
+
+        with mock.patch.object(graph_mailer, "_send_batch", side_effect=send_batch):
+            results = graph_mailer.send_html_email_batch(self.messages)
+
+        self.assertEqual(len(results), 45)
+        self.assertIs(results[0], rejected)
+        self.assertEqual(results[1:20], [None] * 19)
+        self.assertEqual(results[20:40], [outage] * 20)
+        self.assertIs(results[40], rejected)
+        self.assertEqual(results[41:], [None] * 4)
+
+    def test_open_circuit_marks_messages_failed(self):
+        refused = graph_mailer.GraphMailerCircuitOpenError(30)
+        with (
+            mock.patch.object(graph_mailer._breaker, "before_call", side_effect=refused),
+            mock.patch.object(graph_mailer, "_send_batch") as send_batch,
+        ):
+            results = graph_mailer.send_html_email_batch(self.messages)
+        send_batch.assert_not_called()
+        self.assertEqual(results, [refused] * 45)
+
+
+class _ProcessLocal:
+    # Stands in for the per-process refresh lock, so threads contend like
+    # separate worker processes and only the shared cache lock serializes them.
+    def acquire(self, blocking=True):
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@override_settings(**GRAPH_SETTINGS, GRAPH_TOKEN_REFRESH_MARGIN_SECONDS=300)
+class AccessTokenTests(SimpleTestCase):
+    def setUp(self):
+        graph_mailer._shared_cache().clear()
+        graph_mailer._local_token = None
+        self.addCleanup(setattr, graph_mailer, "_local_token", None)
+        self.fetches = 0
+        self.fetch_lock = threading.Lock()
+
+    def token_endpoint(self, *args, **kwargs):
+        with self.fetch_lock:
+            self.fetches += 1
+            number = self.fetches
+        time.sleep(0.2)
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"access_token": f"tok-{number}", "expires_in": 3600}
+        return response
+
+    def store(self, access_token: str, expires_in: float) -> None:
+        token = graph_mailer._Token(access_token=access_token, expires_at=time.time() + expires_in)
+        graph_mailer._shared_cache().set(graph_mailer._TOKEN_CACHE_KEY, token, timeout=None)
+
+    def run_concurrently(self, count: int = 8) -> list[str]:
+        results: list[str] = []
+        results_lock = threading.Lock()
+
+        def worker():
+            token = graph_mailer._get_access_token()
+            with results_lock:
+                results.append(token)
+
+        with (
+            mock.patch.object(graph_mailer, "_refresh_lock", _ProcessLocal()),
+            mock.patch.object(graph_mailer, "_request_with_retry", side_effect=self.token_endpoint),
+        ):
+            threads = [threading.Thread(target=worker) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return results
+
+    def test_fresh_token_is_reused(self):
+        self.store("current", 3000)
+        with mock.patch.object(graph_mailer, "_request_with_retry", side_effect=self.token_endpoint):
+            self.assertEqual(graph_mailer._get_access_token(), "current")
+        self.assertEqual(self.fetches, 0)
+
+    def test_token_inside_the_margin_is_refreshed_proactively(self):
+        self.store("current", 100)
+        with mock.patch.object(graph_mailer, "_request_with_retry", side_effect=self.token_endpoint):
+            self.assertEqual(graph_mailer._get_access_token(), "tok-1")
+            self.assertEqual(graph_mailer._get_access_token(), "tok-1")
+        self.assertEqual(self.fetches, 1)
+
+    def test_failed_proactive_refresh_keeps_the_current_token(self):
+        self.store("current", 100)
+        failure = graph_mailer.GraphMailerHttpError(503, "Unavailable")
+        with mock.patch.object(graph_mailer, "_fetch_access_token", side_effect=failure):
+            self.assertEqual(graph_mailer._get_access_token(), "current")
+
+    def test_expired_token_is_fetched_once_under_contention(self):
+        results = self.run_concurrently()
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(results, ["tok-1"] * 8)
+
+    def test_proactive_refresh_is_single_flight_and_nobody_waits(self):
+        self.store("current", 100)
+        results = self.run_concurrently()
+        self.assertEqual(self.fetches, 1)
+        # Callers that lost the race were served the current token right away.
+        self.assertIn("current", results)
+        self.assertLessEqual(set(results), {"current", "tok-1"})
+
+
+@override_settings(
+    **GRAPH_SETTINGS,
+    GRAPH_BREAKER_FAILURE_THRESHOLD=3,
+    GRAPH_BREAKER_RESET_SECONDS=60,
+    GRAPH_BREAKER_HALF_OPEN_SUCCESSES=2,
+)
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        graph_mailer._shared_cache().clear()
+        self.breaker = graph_mailer._CircuitBreaker()
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_trips_after_threshold_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        with self.assertRaises(graph_mailer.GraphMailerCircuitOpenError) as ctx:
+            self.breaker.before_call()
+        self.assertGreater(ctx.exception.retry_in, 0)
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot["state"], snapshot["trips"], snapshot["rejected"]), ("open", 1, 1))
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.snapshot()["consecutive_failures"], 1)
+
+    def test_success_while_closed_skips_the_lock(self):
+        with mock.patch.object(graph_mailer, "_shared_lock") as lock:
+            for _ in range(3):
+                self.breaker.record_success()
+        lock.assert_not_called()
+        self.assertEqual(self.breaker.snapshot()["successes"], 3)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.trip()
+        with override_settings(GRAPH_BREAKER_RESET_SECONDS=0):
+            self.breaker.before_call()
+            self.assertEqual(self.breaker.snapshot()["state"], "half_open")
+            with self.assertRaises(graph_mailer.GraphMailerCircuitOpenError):
+                self.breaker.before_call()
+
+    def test_successful_probes_close_the_circuit(self):
+        self.trip()
+        with override_settings(GRAPH_BREAKER_RESET_SECONDS=0):
+            self.breaker.before_call()
+            self.breaker.record_success()
+            self.assertEqual(self.breaker.snapshot()["state"], "half_open")
+            self.breaker.before_call()
+            self.breaker.record_success()
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot["state"], snapshot["consecutive_failures"]), ("closed", 0))
+        self.breaker.before_call()
+
+    def test_failed_probe_reopens_the_circuit(self):
+        self.trip()
+        with override_settings(GRAPH_BREAKER_RESET_SECONDS=0):
+            self.breaker.before_call()
+        self.breaker.record_failure()
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot["state"], snapshot["trips"]), ("open", 2))
+        with self.assertRaises(graph_mailer.GraphMailerCircuitOpenError):
+            self.breaker.before_call()
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "response-cache-test"},
+    },
+    RESPONSE_CACHE_ENABLED=True,
+)
+class ResponseCacheTests(TestCase):
+    url = "/api/catalog-items/"
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw")
+        self.item = CatalogItem.objects.create(owner=self.user, name="Widget")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_read_is_a_hit(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_write_invalidates_cached_reads(self):
+        first = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogItem.objects.create(owner=self.user, name="Gadget")
+        second = self.client.get(self.url)
+        self.assertEqual(second["X-Cache"], "MISS")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(second.json()["count"], 2)
+
+    def test_generation_is_bumped_only_on_commit(self):
+        before = get_generations([CatalogItem])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.item.name = "Widget v2"
+            self.item.save()
+            self.assertEqual(get_generations([CatalogItem]), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_generations([CatalogItem]), before)
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+
+@override_settings(**GRAPH_SETTINGS, GRAPH_DISPATCH_MAX_DEFER_SECONDS=60)
+@mock.patch.object(mail_dispatch, "_MIN_DEFER_SECONDS", 0.01)
+class MailDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.dispatcher = mail_dispatch.MailDispatcher(max_workers=1, max_queue=10)
+        self.addCleanup(self.dispatcher.shutdown, wait=False)
+        self.sent: list[str] = []
+
+    def submit(self, to_email: str):
+        return self.dispatcher.submit(to_email=to_email, subject="Hi", html_body="<p>hi</p>")
+
+    def fake_send(self, outage_for: set[str], *, retry_in: float = 0.0):
+        def send(*, to_email, subject, html_body):
+            if to_email in outage_for:
+                raise graph_mailer.GraphMailerCircuitOpenError(retry_in)
+            self.sent.append(to_email)
+
+        return send
+
+    def test_held_message_does_not_block_the_pool(self):
+        outage = {"held@example.com"}
+        with mock.patch.object(mail_dispatch, "send_html_email", self.fake_send(outage, retry_in=0.2)):
+            held = self.submit("held@example.com")
+            other = self.submit("other@example.com")
+            # One worker: the second message only goes out if the first isn't sleeping on it.
+            other.result(timeout=1)
+            self.assertFalse(held.done())
+            self.assertEqual(self.dispatcher.deferred(), 1)
+            outage.clear()
+            held.result(timeout=2)
+        self.assertEqual(self.sent, ["other@example.com", "held@example.com"])
+        self.assertEqual(self.dispatcher.deferred(), 0)
+        self.assertEqual(self.dispatcher.queued(), 0)
+
+    @override_settings(GRAPH_DISPATCH_MAX_DEFER_SECONDS=0.2)
+    def test_message_fails_once_held_past_the_limit(self):
+        outage = {"held@example.com"}
+        with mock.patch.object(mail_dispatch, "send_html_email", self.fake_send(outage)):
+            future = self.submit("held@example.com")
+            with self.assertRaises(graph_mailer.GraphMailerCircuitOpenError):
+                future.result(timeout=2)
+        self.assertEqual(self.sent, [])
+        self.assertEqual(self.dispatcher.queued(), 0)
+
+    def test_shutdown_gives_held_messages_a_last_try(self):
+        outage = {"held@example.com", "still-down@example.com"}
+        with mock.patch.object(mail_dispatch, "send_html_email", self.fake_send(outage, retry_in=60)):
+            held = self.submit("held@example.com")
+            still_down = self.submit("still-down@example.com")
+            deadline = time.monotonic() + 2
+            while self.dispatcher.deferred() < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            outage.discard("held@example.com")
+            started = time.monotonic()
+            self.dispatcher.shutdown(wait=True)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertIsNone(held.result(timeout=0))
+        self.assertIsInstance(still_down.exception(timeout=0), graph_mailer.GraphMailerCircuitOpenError)
+        self.assertEqual(self.sent, ["held@example.com"])
+        self.assertEqual(self.dispatcher.queued(), 0)
+
+    def test_full_queue_rejects_new_mail(self):
+        dispatcher = mail_dispatch.MailDispatcher(max_workers=1, max_queue=1)
+        with mock.patch.object(mail_dispatch, "send_html_email", self.fake_send({"held@example.com"}, retry_in=60)):
+            dispatcher.submit(to_email="held@example.com", subject="Hi", html_body="")
+            with self.assertRaises(mail_dispatch.MailQueueFullError):
+                dispatcher.submit(to_email="other@example.com", subject="Hi", html_body="")
+            dispatcher.shutdown(wait=True)
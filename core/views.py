@@ -1,8 +1,24 @@
 from __future__ import annotations
 
 from django.http import JsonResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.permissions import IsAdminRole
+from core.graph_mailer import breaker_snapshot
+from core.mail_dispatch import dispatcher_stats
 
 
 def health(_request):
     return JsonResponse({"status": "ok"})
 
+
+class MailHealthView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    def get(self, request):
+        return Response(
+            {"circuit": breaker_snapshot(), "dispatcher": dispatcher_stats()},
+            status=status.HTTP_200_OK,
+        )
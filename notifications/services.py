@@ -3,8 +3,10 @@ from __future__ import annotations
 import logging
 
 from django.conf import settings
+from django.db import transaction
 
-from core.graph_mailer import GraphMailerConfigError, GraphMailerError, send_html_email
+from core.graph_mailer import GraphMailerConfigError, GraphMailerError
+from core.mail_dispatch import dispatch_html_email
 
 from .models import Notification
 
@@ -42,16 +44,21 @@ def notify_user(
                 send_email = False
 
     if send_email:
-        try:
-            subject = title
-            html = f"""
-            <p>{body}</p>
-            {"<p><a href='" + link + "'>Open</a></p>" if link else ""}
-            """
-            send_html_email(to_email=recipient.email, subject=subject, html_body=html)
-        except (GraphMailerConfigError, GraphMailerError) as exc:
-            logger.warning("Failed to send notification email: %s", exc)
-        except Exception:
-            logger.exception("Unexpected error sending notification email")
+        subject = title
+        html = f"""
+        <p>{body}</p>
+        {"<p><a href='" + link + "'>Open</a></p>" if link else ""}
+        """
+
+        def _queue_email() -> None:
+            try:
+                dispatch_html_email(to_email=recipient.email, subject=subject, html_body=html)
+            except (GraphMailerConfigError, GraphMailerError) as exc:
+                logger.warning("Failed to queue notification email: %s", exc)
+            except Exception:
+                logger.exception("Unexpected error queueing notification email")
+
+        # Don't mail about notifications that get rolled back with the caller's transaction.
+        transaction.on_commit(_queue_email)
 
     return notification
@@ -65,6 +65,7 @@ INSTALLED_APPS = [
     'transfers.apps.TransfersConfig',
     'bills.apps.BillsConfig',
     'feedback.apps.FeedbackConfig',
+    'reports.apps.ReportsConfig',
 ]
 
 MIDDLEWARE = [
@@ -185,13 +186,114 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "core.exceptions.exception_handler",
 }
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "procurement-tool",
+# Directory for file-based caches shared by every worker process on the host.
+CACHE_DIR = Path(os.getenv("DJANGO_CACHE_DIR", str(BASE_DIR / "var" / "cache")))
+
+# Default cache, shared by all workers: `file` (single host), `db` (needs
+# `python manage.py createcachetable`), `redis` (needs REDIS_URL and the `redis`
+# package) or `locmem` (per process; tests/dev only). Defaults to redis when
+# REDIS_URL is set and the client is installed, otherwise file.
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+
+def _redis_available() -> bool:
+    if not REDIS_URL:
+        return False
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cache_config(backend: str, *, name: str, timeout: int | None) -> dict:
+    if backend == "redis":
+        if not _redis_available():
+            raise RuntimeError(f"Cache '{name}' is set to redis but REDIS_URL is empty or the redis package is missing.")
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": f"procurement:{name}",
+            "TIMEOUT": timeout,
+        }
+    if backend == "db":
+        return {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": f"{name}_cache",
+            "TIMEOUT": timeout,
+            "OPTIONS": {"MAX_ENTRIES": 50000},
+        }
+    if backend == "locmem":
+        return {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"procurement-tool-{name}",
+            "TIMEOUT": timeout,
+        }
+    return {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(CACHE_DIR / name),
+        "TIMEOUT": timeout,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
+
+
+DJANGO_CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "redis" if _redis_available() else "file").lower()
+
+GRAPH_CACHE_BACKEND = (os.getenv("GRAPH_CACHE_BACKEND") or ("redis" if _redis_available() else "db")).lower()
+
+CACHES = {
+    "default": _cache_config(DJANGO_CACHE_BACKEND, name="default", timeout=300),
+    # Cross-process state for core.graph_mailer (access token, refresh lock,
+    # throttle and circuit breaker). Its locks need an atomic `cache.add`, so it
+    # defaults to redis, else the database (table created by `migrate`); `file`
+    # is only safe with a single worker process (see core.checks).
+    "graph": _cache_config(GRAPH_CACHE_BACKEND, name="graph", timeout=None),
 }
 
+# GET response cache for hot read endpoints (core.response_cache). Entries are
+# keyed by per-model generation counters, so writes invalidate immediately.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_TIMEOUT_SECONDS = int(os.getenv("RESPONSE_CACHE_TIMEOUT_SECONDS", "300"))
+# Models whose post_save/post_delete bump their cache generation. The type-ahead
+# index (searches.suggest) reads the same counters, which is why BomItem is here
+# although no cached view depends on it.
+RESPONSE_CACHE_MODELS = [
+    "accounts.User",
+    "profiles.Profile",
+    "boms.BomTemplate",
+    "boms.BomItem",
+    "catalog.CatalogItem",
+    "transfers.PartnerCompany",
+]
+
+# Overdue / upcoming delivery reports (purchase_orders.deliveries) are cached this long.
+DELIVERIES_CACHE_SECONDS = int(os.getenv("DELIVERIES_CACHE_SECONDS", "60"))
+
+# Spend rollups (reports.services): incremental refreshes re-read rows updated up
+# to this many seconds before the last watermark, to catch late commits.
+SPEND_ROLLUP_LAG_SECONDS = int(os.getenv("SPEND_ROLLUP_LAG_SECONDS", "300"))
+
+# Bill three-way match (bills.services): allowed difference between billed and
+# received/ordered value, whichever of the two is larger.
+BILL_MATCH_TOLERANCE_PERCENT = float(os.getenv("BILL_MATCH_TOLERANCE_PERCENT", "1.0"))
+BILL_MATCH_TOLERANCE_AMOUNT = float(os.getenv("BILL_MATCH_TOLERANCE_AMOUNT", "0.01"))
+
+# Asset balances (assets.ledger): materialized balances only cover ledger entries
+# older than this many seconds, so entries from late commits aren't skipped.
+ASSET_BALANCE_LAG_SECONDS = int(os.getenv("ASSET_BALANCE_LAG_SECONDS", "300"))
+
+# Chunked attachment uploads (attachments.uploads): partial files live here until
+# finalized (keep it on the same filesystem as MEDIA_ROOT so finalize can hard-link it).
+ATTACHMENT_UPLOAD_DIR = Path(os.getenv("ATTACHMENT_UPLOAD_DIR", str(BASE_DIR / "var" / "uploads")))
+ATTACHMENT_UPLOAD_MAX_BYTES = int(os.getenv("ATTACHMENT_UPLOAD_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+ATTACHMENT_UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("ATTACHMENT_UPLOAD_CHUNK_MAX_BYTES", str(16 * 1024 * 1024)))
+ATTACHMENT_UPLOAD_EXPIRY_HOURS = int(os.getenv("ATTACHMENT_UPLOAD_EXPIRY_HOURS", "24"))
+
+# Type-ahead index (searches.suggest): per-process entry cap per kind, and the
+# age after which an index is rebuilt from the database in the background.
+SUGGEST_INDEX_MAX_ENTRIES = int(os.getenv("SUGGEST_INDEX_MAX_ENTRIES", "50000"))
+SUGGEST_INDEX_MAX_AGE_SECONDS = int(os.getenv("SUGGEST_INDEX_MAX_AGE_SECONDS", "900"))
+
 # Microsoft Graph mail settings (read by core.graph_mailer)
 GRAPH_TENANT_ID = os.getenv("GRAPH_TENANT_ID", "")
 GRAPH_CLIENT_ID = os.getenv("GRAPH_CLIENT_ID", "")
@@ -201,6 +303,25 @@ GRAPH_SAVE_TO_SENT_ITEMS = os.getenv("GRAPH_SAVE_TO_SENT_ITEMS", "0") == "1"
 GRAPH_TIMEOUT_SECONDS = int(os.getenv("GRAPH_TIMEOUT_SECONDS", "30"))
 GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", "3"))
 GRAPH_RETRY_BACKOFF_SECONDS = float(os.getenv("GRAPH_RETRY_BACKOFF_SECONDS", "1.0"))
+GRAPH_CACHE_ALIAS = "graph"
+# Endpoint overrides, e.g. for `manage.py fake_graph_server` (local load testing).
+GRAPH_LOGIN_BASE_URL = os.getenv("GRAPH_LOGIN_BASE_URL", "https://login.microsoftonline.com")
+GRAPH_API_BASE_URL = os.getenv("GRAPH_API_BASE_URL", "https://graph.microsoft.com/v1.0")
+# Refresh the access token this many seconds before it expires.
+GRAPH_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("GRAPH_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+# Background delivery (core.mail_dispatch). Graph allows 4 concurrent requests
+# per mailbox; Exchange Online allows 30 messages/minute per sender.
+GRAPH_DISPATCH_WORKERS = int(os.getenv("GRAPH_DISPATCH_WORKERS", "4"))
+GRAPH_DISPATCH_QUEUE_SIZE = int(os.getenv("GRAPH_DISPATCH_QUEUE_SIZE", "1000"))
+GRAPH_SEND_RATE_PER_SECOND = float(os.getenv("GRAPH_SEND_RATE_PER_SECOND", "0.5"))
+GRAPH_SEND_BURST = int(os.getenv("GRAPH_SEND_BURST", "10"))
+GRAPH_MAX_PAUSE_SECONDS = int(os.getenv("GRAPH_MAX_PAUSE_SECONDS", "300"))
+GRAPH_DISPATCH_MAX_DEFER_SECONDS = int(os.getenv("GRAPH_DISPATCH_MAX_DEFER_SECONDS", "900"))
+# Circuit breaker: trip after N consecutive outage failures, stay open for
+# RESET seconds, close after M successful half-open probes.
+GRAPH_BREAKER_FAILURE_THRESHOLD = int(os.getenv("GRAPH_BREAKER_FAILURE_THRESHOLD", "5"))
+GRAPH_BREAKER_RESET_SECONDS = int(os.getenv("GRAPH_BREAKER_RESET_SECONDS", "30"))
+GRAPH_BREAKER_HALF_OPEN_SUCCESSES = int(os.getenv("GRAPH_BREAKER_HALF_OPEN_SUCCESSES", "2"))
 
 # In-app notifications can optionally be mirrored to email (best-effort).
 NOTIFICATIONS_SEND_EMAIL = os.getenv("NOTIFICATIONS_SEND_EMAIL", "0") == "1"
@@ -19,11 +19,12 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from core.views import health
+from core.views import MailHealthView, health
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/health/", health, name="health"),
+    path("api/health/mail/", MailHealthView.as_view(), name="health-mail"),
     path("api/", include("accounts.urls")),
     path("api/", include("profiles.urls")),
     path("api/", include("notifications.urls")),
@@ -36,6 +37,7 @@ urlpatterns = [
     path("api/", include("transfers.urls")),
     path("api/", include("bills.urls")),
     path("api/", include("feedback.urls")),
+    path("api/", include("reports.urls")),
 ]
 
 if settings.DEBUG:
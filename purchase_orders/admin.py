@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import PurchaseOrder, PurchaseOrderItem
+from .models import PurchaseOrder, PurchaseOrderItem, PurchaseOrderNumberCounter
 
 
 class PurchaseOrderItemInline(admin.TabularInline):
@@ -22,3 +22,9 @@ class PurchaseOrderAdmin(admin.ModelAdmin):
 class PurchaseOrderItemAdmin(admin.ModelAdmin):
     list_display = ("id", "purchase_order", "name", "quantity", "received_quantity", "eta_date")
     search_fields = ("name", "purchase_order__po_number")
+
+
+@admin.register(PurchaseOrderNumberCounter)
+class PurchaseOrderNumberCounterAdmin(admin.ModelAdmin):
+    list_display = ("id", "prefix", "day", "last_value")
+    list_filter = ("prefix",)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from boms.models import BomCollaborator, BomItem
+from boms.permissions import has_role
+
+from .models import PurchaseOrder, PurchaseOrderItem
+
+MAX_ITEMS = 1000
+
+# PO lines that don't count as ordered yet (or any more).
+_NOT_LIVE = (PurchaseOrder.Status.DRAFT, PurchaseOrder.Status.CANCELED)
+
+_COLUMNS = (
+    "source",
+    "item_id",
+    "item_name",
+    "item_vendor",
+    "item_quantity",
+    "item_received",
+    "item_eta",
+    "parent_id",
+    "reference",
+)
+
+
+def _row_columns(*, source: str, vendor, parent: str, reference: str) -> dict:
+    # Same aliases, types and order on both sides of the UNION.
+    return {
+        "source": Value(source, output_field=CharField()),
+        "item_id": F("id"),
+        "item_name": F("name"),
+        "item_vendor": vendor,
+        "item_quantity": F("quantity"),
+        "item_received": F("received_quantity"),
+        "item_eta": F("eta_date"),
+        "parent_id": F(parent),
+        "reference": F(reference),
+    }
+
+
+def _open_in_range(qs, *, start: date | None, end: date):
+    qs = qs.filter(ordered_at__isnull=False, received_quantity__lt=F("quantity"), eta_date__lte=end)
+    if start is not None:
+        qs = qs.filter(eta_date__gte=start)
+    return qs
+
+
+def _delivery_rows(user, *, start: date | None, end: date, vendor: str):
+    po_items = _open_in_range(
+        PurchaseOrderItem.objects.exclude(purchase_order__status__in=_NOT_LIVE), start=start, end=end
+    )
+    # BOM items that are on a live PO are reported through the PO line instead;
+    # "live" must mean the same on both sides, or items on a draft PO vanish.
+    on_po = PurchaseOrderItem.objects.filter(bom_item=OuterRef("pk")).exclude(
+        purchase_order__status__in=_NOT_LIVE
+    )
+    bom_items = _open_in_range(BomItem.objects.exclude(Exists(on_po)), start=start, end=end)
+
+    if not (has_role(user, "admin") or has_role(user, "procurement")):
+        po_items = po_items.filter(Q(purchase_order__created_by=user) | Q(purchase_order__bom__owner=user))
+        bom_items = bom_items.filter(
+            Q(bom__owner=user) | Exists(BomCollaborator.objects.filter(bom=OuterRef("bom"), user=user))
+        )
+
+    po_vendor = Coalesce(NullIf("vendor", Value("")), "purchase_order__vendor_name", output_field=CharField())
+    if vendor:
+        po_items = po_items.annotate(_vendor=po_vendor).filter(_vendor__iexact=vendor)
+        bom_items = bom_items.filter(vendor__iexact=vendor)
+
+    po_columns = _row_columns(
+        source="po", vendor=po_vendor, parent="purchase_order_id", reference="purchase_order__po_number"
+    )
+    po_rows = po_items.annotate(**po_columns).values(*_COLUMNS)
+    bom_rows = bom_items.annotate(
+        **_row_columns(source="bom", vendor=F("vendor"), parent="bom_id", reference="bom__title")
+    ).values(*_COLUMNS)
+    return po_rows.union(bom_rows, all=True).order_by("item_eta", "source", "item_id")[: MAX_ITEMS + 1]
+
+
+def _group_by_vendor(rows: list[dict], today: date) -> list[dict]:
+    vendors: dict[str, dict] = {}
+    for row in rows:
+        name = row["item_vendor"] or ""
+        group = vendors.setdefault(name, {"vendor": name, "item_count": 0, "earliest_eta": None, "items": []})
+        eta = row["item_eta"]
+        group["item_count"] += 1
+        if group["earliest_eta"] is None:
+            group["earliest_eta"] = eta.isoformat()
+        group["items"].append(
+            {
+                "source": row["source"],
+                "id": row["item_id"],
+                "name": row["item_name"],
+                "quantity": str(row["item_quantity"]),
+                "received_quantity": str(row["item_received"]),
+                "outstanding_quantity": str(row["item_quantity"] - row["item_received"]),
+                "eta_date": eta.isoformat(),
+                "days_late": max((today - eta).days, 0),
+                "purchase_order_id": row["parent_id"] if row["source"] == "po" else None,
+                "bom_id": row["parent_id"] if row["source"] == "bom" else None,
+                "reference": row["reference"],
+            }
+        )
+    return sorted(vendors.values(), key=lambda group: (group["earliest_eta"], group["vendor"].lower()))
+
+
+def delivery_report(user, *, kind: str, days: int = 14, vendor: str = "") -> dict:
+    """
+    Open (ordered, not fully received) PO and BOM lines grouped by vendor.
+
+    `kind` is "overdue" (ETA before today) or "upcoming" (ETA today .. today + days).
+    Both item tables are read with one UNION query over their eta_date indexes.
+    Reports are cached per caller scope for DELIVERIES_CACHE_SECONDS.
+    """
+    today = timezone.localdate()
+    if kind == "overdue":
+        days = 0
+        start, end = None, today - timedelta(days=1)
+    else:
+        start, end = today, today + timedelta(days=days)
+
+    privileged = has_role(user, "admin") or has_role(user, "procurement")
+    scope = "all" if privileged else f"user:{user.pk}"
+    key = f"deliveries:{kind}:{scope}:{today.isoformat()}:{days}:{vendor.lower()}"
+    timeout = int(getattr(settings, "DELIVERIES_CACHE_SECONDS", 60))
+    if timeout > 0:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    rows = list(_delivery_rows(user, start=start, end=end, vendor=vendor))
+    truncated = len(rows) > MAX_ITEMS
+    rows = rows[:MAX_ITEMS]
+    report = {
+        "kind": kind,
+        "as_of": today.isoformat(),
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat(),
+        "item_count": len(rows),
+        "truncated": truncated,
+        "vendors": _group_by_vendor(rows, today),
+    }
+    if timeout > 0:
+        cache.set(key, report, timeout=timeout)
+    return report
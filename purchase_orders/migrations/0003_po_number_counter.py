@@ -0,0 +1,26 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase_orders', '0002_purchaseorderitem_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderNumberCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=30)),
+                ('day', models.DateField()),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='purchaseordernumbercounter',
+            constraint=models.UniqueConstraint(fields=('prefix', 'day'), name='uniq_po_number_counter_prefix_day'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boms', '0005_updated_at_index'),
+        ('purchase_orders', '0003_po_number_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['updated_at'], name='purchase_or_updated_dabb30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorderitem',
+            index=models.Index(fields=['updated_at'], name='purchase_or_updated_4022c2_idx'),
+        ),
+    ]
@@ -31,6 +31,7 @@ class PurchaseOrder(models.Model):
         indexes = [
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["vendor_name"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     def __str__(self) -> str:
@@ -65,6 +66,7 @@ class PurchaseOrderItem(models.Model):
         indexes = [
             models.Index(fields=["purchase_order", "name"]),
             models.Index(fields=["eta_date"]),
+            models.Index(fields=["updated_at"]),
         ]
 
     @property
@@ -75,3 +77,25 @@ class PurchaseOrderItem(models.Model):
         return f"PO Item {self.pk} ({self.name})"
 
 # Create your models here.
+
+
+class PurchaseOrderNumberCounter(models.Model):
+    """
+    Last allocated PO number per (prefix, day); see services.reserve_po_numbers.
+
+    On PostgreSQL numbers come from a per-(prefix, day) sequence instead and this
+    row records the seed the sequence started from, and its final value once
+    the sequence of a past day has been dropped.
+    """
+
+    prefix = models.CharField(max_length=30)
+    day = models.DateField()
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["prefix", "day"], name="uniq_po_number_counter_prefix_day"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.prefix}{self.day:%Y%m%d} @ {self.last_value}"
@@ -70,6 +70,57 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "created_by", "status", "created_at", "updated_at")
 
 
+class PurchaseOrderListSerializer(serializers.ModelSerializer):
+    """
+    List representation: item aggregates annotated by the queryset, no nested items.
+    """
+
+    item_count = serializers.IntegerField(read_only=True)
+    quantity_total = serializers.DecimalField(max_digits=16, decimal_places=3, read_only=True)
+    received_total = serializers.DecimalField(max_digits=16, decimal_places=3, read_only=True)
+    received_percent = serializers.SerializerMethodField()
+    subtotal = serializers.DecimalField(max_digits=20, decimal_places=4, read_only=True)
+    tax_total = serializers.DecimalField(max_digits=20, decimal_places=4, read_only=True)
+    total = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PurchaseOrder
+        fields = (
+            "id",
+            "bom",
+            "created_by",
+            "status",
+            "po_number",
+            "vendor_name",
+            "currency",
+            "notes",
+            "data",
+            "item_count",
+            "quantity_total",
+            "received_total",
+            "received_percent",
+            "subtotal",
+            "tax_total",
+            "total",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+    def get_received_percent(self, obj):
+        quantity = obj.quantity_total or Decimal("0")
+        if quantity <= 0:
+            return None
+        percent = (obj.received_total or Decimal("0")) * 100 / quantity
+        return str(percent.quantize(Decimal("0.1")))
+
+    def get_total(self, obj):
+        if obj.subtotal is None:
+            return None
+        total = obj.subtotal + (obj.tax_total or Decimal("0"))
+        return str(total.quantize(Decimal("0.0001")))
+
+
 class CreatePurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
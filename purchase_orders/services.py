@@ -1,29 +1,320 @@
 from __future__ import annotations
 
+import hashlib
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
 from django.conf import settings
+from django.db import IntegrityError, ProgrammingError, connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from .models import PurchaseOrder, PurchaseOrderItem
+from boms.models import Bom, BomItem
+from boms.services import log_event, recompute_bom_status
+from catalog.models import PriceObservation
+from catalog.prices import record_prices
+
+from .models import PurchaseOrder, PurchaseOrderItem, PurchaseOrderNumberCounter
+
+# Sequences this process has already created (PostgreSQL only).
+_known_sequences: set[str] = set()
 
 
-def generate_po_number(po: PurchaseOrder) -> str:
-    prefix = getattr(settings, "PO_NUMBER_PREFIX", "PO-")
+def format_po_number(prefix: str, day: date, value: int) -> str:
     padding = int(getattr(settings, "PO_NUMBER_PADDING", 5))
-    date_part = po.created_at.strftime("%Y%m%d") if po.created_at else timezone.now().strftime("%Y%m%d")
-    return f"{prefix}{date_part}-{po.id:0{padding}d}"
+    return f"{prefix}{day:%Y%m%d}-{value:0{padding}d}"
+
+
+def _existing_max(prefix: str, day: date) -> int:
+    # Seeds a new (prefix, day) range past numbers issued before the counter
+    # existed (those used the PO id as suffix) or typed in by hand.
+    head = f"{prefix}{day:%Y%m%d}-"
+    highest = 0
+    for number in PurchaseOrder.objects.filter(po_number__startswith=head).values_list("po_number", flat=True):
+        suffix = number[len(head):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _sequence_name(prefix: str, day: date) -> str:
+    digest = hashlib.sha1(f"{prefix}|{day:%Y%m%d}".encode("utf-8")).hexdigest()[:16]
+    return f"po_number_seq_{digest}"
+
+
+def _sequence_exists(name: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        return cursor.fetchone()[0] is not None
+
+
+def _retire_sequences(before: date) -> None:
+    # Sequences of past days are dropped once nothing allocates from them any
+    # more; their final value is kept on the counter row, which also seeds the
+    # sequence again should a number for that day ever be requested.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'S' AND relname LIKE %s", ["po_number_seq_%"])
+        existing = {row[0] for row in cursor.fetchall()}
+    if not existing:
+        return
+    for counter in PurchaseOrderNumberCounter.objects.filter(day__lt=before):
+        name = _sequence_name(counter.prefix, counter.day)
+        if name not in existing:
+            continue
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"SELECT last_value, is_called FROM {name}")
+                last_value, is_called = cursor.fetchone()
+                cursor.execute(f"DROP SEQUENCE {name}")
+        except ProgrammingError:
+            # Another worker retired it first.
+            continue
+        used = last_value if is_called else last_value - 1
+        PurchaseOrderNumberCounter.objects.filter(pk=counter.pk, last_value__lt=used).update(last_value=used)
+
+
+def _create_sequence(name: str, prefix: str, day: date) -> None:
+    counter = PurchaseOrderNumberCounter.objects.filter(prefix=prefix, day=day).first()
+    seed = max(_existing_max(prefix, day), counter.last_value if counter else 0)
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {name} START WITH {seed + 1}")
+            if counter is None:
+                PurchaseOrderNumberCounter.objects.create(prefix=prefix, day=day, last_value=seed)
+    except IntegrityError:
+        # A concurrent transaction created the sequence (or counter row) and
+        # committed first, which is what the catalog conflict waited for.
+        pass
+    if day == timezone.localdate():
+        _retire_sequences(day - timedelta(days=1))
+    # DDL is transactional: if the caller rolls back, the sequence goes with
+    # it, so it only counts as created once that transaction has committed.
+    transaction.on_commit(lambda: _known_sequences.add(name))
+
+
+def _reserve_from_sequence(prefix: str, day: date, count: int) -> list[int]:
+    name = _sequence_name(prefix, day)
+    if name not in _known_sequences:
+        _create_sequence(name, prefix, day)
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [name, count])
+                return sorted(row[0] for row in cursor.fetchall())
+    except ProgrammingError:
+        if _sequence_exists(name):
+            raise
+    # Dropped since this process cached it (retired, or created by a
+    # transaction that rolled back); create it again and retry once.
+    _known_sequences.discard(name)
+    _create_sequence(name, prefix, day)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [name, count])
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _reserve_from_counter(prefix: str, day: date, count: int) -> list[int]:
+    counters = PurchaseOrderNumberCounter.objects.filter(prefix=prefix, day=day)
+    with transaction.atomic():
+        # UPDATE first: it takes the row (or, on SQLite, database) write lock
+        # before anything is read, so concurrent callers queue up here.
+        if not counters.update(last_value=F("last_value") + count):
+            try:
+                with transaction.atomic():
+                    PurchaseOrderNumberCounter.objects.create(
+                        prefix=prefix, day=day, last_value=_existing_max(prefix, day) + count
+                    )
+            except IntegrityError:
+                counters.update(last_value=F("last_value") + count)
+        last = counters.values_list("last_value", flat=True).get()
+    return list(range(last - count + 1, last + 1))
+
+
+def reserve_po_numbers(count: int, *, prefix: str | None = None, day: date | None = None) -> list[str]:
+    """
+    Allocate `count` unused PO numbers from the (prefix, day) range, in order.
+
+    Numbers come from a database sequence on PostgreSQL and from a locked
+    counter row elsewhere, so they are known before the PO row is inserted.
+    If the caller's transaction rolls back, a sequence leaves a gap while the
+    counter row rolls back with it and hands the same numbers out again;
+    either way no number ends up on two POs.
+    """
+    if count <= 0:
+        return []
+    prefix = getattr(settings, "PO_NUMBER_PREFIX", "PO-") if prefix is None else prefix
+    day = day or timezone.localdate()
+    if connection.vendor == "postgresql":
+        values = _reserve_from_sequence(prefix, day, count)
+    else:
+        values = _reserve_from_counter(prefix, day, count)
+    return [format_po_number(prefix, day, value) for value in values]
+
+
+def allocate_po_number(**kwargs) -> str:
+    return reserve_po_numbers(1, **kwargs)[0]
 
 
 def recompute_po_status(po: PurchaseOrder) -> None:
+    """
+    Derive PARTIAL / RECEIVED from one aggregate over the PO's items.
+    """
     if po.status == PurchaseOrder.Status.CANCELED:
         return
-    items = list(po.items.all())
-    if not items:
+    counts = po.items.aggregate(
+        total=Count("id"),
+        full=Count("id", filter=Q(received_quantity__gte=F("quantity"))),
+        started=Count("id", filter=Q(received_quantity__gt=0)),
+    )
+    if not counts["total"]:
         return
-    if all(i.is_fully_received for i in items):
-        po.status = PurchaseOrder.Status.RECEIVED
-        po.save(update_fields=["status"])
-        return
-    if any(i.received_quantity > 0 for i in items):
-        po.status = PurchaseOrder.Status.PARTIAL
-        po.save(update_fields=["status"])
+    if counts["full"] == counts["total"]:
+        new_status = PurchaseOrder.Status.RECEIVED
+    elif counts["started"]:
+        new_status = PurchaseOrder.Status.PARTIAL
+    else:
         return
+    if po.status != new_status:
+        po.status = new_status
+        po.save(update_fields=["status", "updated_at"])
+
+
+def receive_po_items(*, po: PurchaseOrder, lines: list[dict]) -> list[PurchaseOrderItem]:
+    """
+    Add received quantities to PO lines and recompute the PO status.
+
+    Lines are `{item_id, quantity_received}`; unknown ids are skipped and repeated
+    ids are summed. The PO row is locked for the transaction so concurrent
+    receipts on the same PO serialize, and quantities are applied as F()
+    increments in one bulk UPDATE. Returns the updated items, re-read.
+    """
+    quantities: dict[int, Decimal] = {}
+    for line in lines:
+        quantities[line["item_id"]] = quantities.get(line["item_id"], Decimal("0")) + line["quantity_received"]
+
+    now = timezone.now()
+    with transaction.atomic():
+        locked = PurchaseOrder.objects.select_for_update().get(pk=po.pk)
+        items = list(PurchaseOrderItem.objects.filter(purchase_order=locked, id__in=quantities).only("id"))
+        for item in items:
+            item.received_quantity = F("received_quantity") + quantities[item.id]
+            item.received_at = now
+            item.updated_at = now
+        PurchaseOrderItem.objects.bulk_update(items, ["received_quantity", "received_at", "updated_at"])
+        recompute_po_status(locked)
+        po.status = locked.status
+        return list(PurchaseOrderItem.objects.filter(id__in=[item.id for item in items]).order_by("id"))
+
+
+@dataclass
+class GeneratedPurchaseOrders:
+    purchase_orders: list[PurchaseOrder]
+    item_count: int
+
+
+def unordered_bom_items(bom: Bom):
+    """
+    BOM items not yet on a purchase order (lines on canceled POs don't count).
+    """
+    on_po = PurchaseOrderItem.objects.filter(bom_item=OuterRef("pk")).exclude(
+        purchase_order__status=PurchaseOrder.Status.CANCELED
+    )
+    return bom.items.exclude(Exists(on_po))
+
+
+def generate_purchase_orders(
+    *, bom: Bom, actor, item_ids: list[int] | None = None, eta_date: date | None = None, notes: str = ""
+) -> GeneratedPurchaseOrders:
+    """
+    Create one draft PO per (vendor, currency) from the BOM's unordered items.
+
+    The BOM row is locked while the unordered items are read, so repeating the
+    request never orders an item twice. All POs and lines are written with
+    bulk_create in one transaction, PO numbers come from one reserved block,
+    and the BOM items get `ordered_at` (and `eta_date`, if given) in a single
+    UPDATE.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Concurrent generations for the same BOM queue on its row, so the
+        # second one only sees the items the first left unordered.
+        Bom.objects.select_for_update().only("id").get(pk=bom.pk)
+        items = unordered_bom_items(bom).order_by("vendor", "currency", "id")
+        if item_ids:
+            items = items.filter(id__in=item_ids)
+
+        groups: dict[tuple[str, str], list[BomItem]] = {}
+        for item in items:
+            groups.setdefault((item.vendor.strip(), item.currency.strip()), []).append(item)
+        if not groups:
+            return GeneratedPurchaseOrders(purchase_orders=[], item_count=0)
+
+        numbers = reserve_po_numbers(len(groups))
+        orders = PurchaseOrder.objects.bulk_create(
+            [
+                PurchaseOrder(
+                    bom=bom,
+                    created_by=actor,
+                    status=PurchaseOrder.Status.DRAFT,
+                    po_number=number,
+                    vendor_name=vendor,
+                    currency=currency,
+                    notes=notes,
+                    data={"generated_from_bom": bom.id},
+                )
+                for number, (vendor, currency) in zip(numbers, groups)
+            ]
+        )
+        lines = [
+            PurchaseOrderItem(
+                purchase_order=po,
+                bom_item=item,
+                name=item.name,
+                description=item.description,
+                quantity=item.quantity,
+                unit=item.unit,
+                currency=item.currency,
+                unit_price=item.unit_price,
+                tax_percent=item.tax_percent,
+                vendor=item.vendor,
+                category=item.category,
+                link=item.link,
+                notes=item.notes,
+                ordered_at=now,
+                eta_date=eta_date or item.eta_date,
+            )
+            for po, group in zip(orders, groups.values())
+            for item in group
+        ]
+        PurchaseOrderItem.objects.bulk_create(lines)
+
+        # Items marked ordered by hand before keep their original timestamp.
+        stamp = {"ordered_at": Coalesce("ordered_at", Value(now)), "updated_at": now}
+        if eta_date:
+            stamp["eta_date"] = eta_date
+        BomItem.objects.filter(id__in=[line.bom_item_id for line in lines]).update(**stamp)
+
+        # bulk_create skips the price-history post_save receiver.
+        record_prices(
+            {
+                "name": line.name,
+                "vendor": line.vendor,
+                "currency": line.currency,
+                "unit_price": line.unit_price,
+                "tax_percent": line.tax_percent,
+                "source": PriceObservation.Source.PO,
+                "source_id": line.id,
+            }
+            for line in lines
+        )
+        log_event(
+            bom=bom,
+            actor=actor,
+            event_type="bom.purchase_orders_generated",
+            data={"purchase_order_ids": [po.id for po in orders], "count": len(lines)},
+        )
+        recompute_bom_status(bom)
+    return GeneratedPurchaseOrders(purchase_orders=orders, item_count=len(lines))
@@ -1,3 +1,297 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assets import services as asset_services
+from assets.models import Asset, AssetLedgerEntry
+from assets.services import convert_po_items_to_assets
+from boms.models import Bom, BomItem
+
+from . import services
+from .models import PurchaseOrder, PurchaseOrderItem, PurchaseOrderNumberCounter
+from .services import generate_purchase_orders, receive_po_items, reserve_po_numbers
+
+DAY = date(2026, 1, 15)
+
+
+class PoNumberTests(TestCase):
+    def test_numbers_follow_existing_ones(self):
+        user = get_user_model().objects.create_user("owner@example.com", "pw")
+        bom = Bom.objects.create(owner=user, title="Rig")
+        PurchaseOrder.objects.create(bom=bom, created_by=user, po_number="PO-20260115-00007")
+        self.assertEqual(
+            reserve_po_numbers(2, prefix="PO-", day=DAY), ["PO-20260115-00008", "PO-20260115-00009"]
+        )
+
+    def test_rolled_back_reservation_is_not_issued_twice(self):
+        self.assertEqual(reserve_po_numbers(1, prefix="PO-", day=DAY), ["PO-20260115-00001"])
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                rolled_back = reserve_po_numbers(2, prefix="PO-", day=DAY)
+                raise RuntimeError
+        after = reserve_po_numbers(2, prefix="PO-", day=DAY)
+        self.assertNotIn("PO-20260115-00001", after)
+        self.assertEqual(len(set(after)), 2)
+        if connection.vendor != "postgresql":
+            # The counter row rolled back with the caller, so the numbers come round again.
+            self.assertEqual(after, rolled_back)
+
+
+class GeneratePurchaseOrdersTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw")
+        self.bom = Bom.objects.create(owner=self.user, title="Rig")
+        for name, vendor in [("Bolt", "Acme"), ("Nut", "Acme"), ("Gear", "Globex")]:
+            BomItem.objects.create(bom=self.bom, name=name, vendor=vendor, currency="USD")
+
+    def test_one_po_per_vendor(self):
+        result = generate_purchase_orders(bom=self.bom, actor=self.user)
+        self.assertEqual(result.item_count, 3)
+        self.assertEqual(sorted(po.vendor_name for po in result.purchase_orders), ["Acme", "Globex"])
+        self.assertFalse(BomItem.objects.filter(bom=self.bom, ordered_at__isnull=True).exists())
+
+    def test_repeating_the_request_orders_nothing_twice(self):
+        generate_purchase_orders(bom=self.bom, actor=self.user)
+        again = generate_purchase_orders(bom=self.bom, actor=self.user)
+        self.assertEqual((again.purchase_orders, again.item_count), ([], 0))
+        self.assertEqual(PurchaseOrder.objects.filter(bom=self.bom).count(), 2)
+        self.assertEqual(PurchaseOrderItem.objects.filter(purchase_order__bom=self.bom).count(), 3)
+
+    def test_items_on_canceled_pos_are_ordered_again(self):
+        first = generate_purchase_orders(bom=self.bom, actor=self.user)
+        PurchaseOrder.objects.filter(pk__in=[po.pk for po in first.purchase_orders]).update(
+            status=PurchaseOrder.Status.CANCELED
+        )
+        self.assertEqual(generate_purchase_orders(bom=self.bom, actor=self.user).item_count, 3)
+
+
+class ReceivePoItemsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw")
+        bom = Bom.objects.create(owner=self.user, title="Rig")
+        self.po = PurchaseOrder.objects.create(
+            bom=bom, created_by=self.user, status=PurchaseOrder.Status.SENT, po_number="PO-1"
+        )
+        self.bolt = PurchaseOrderItem.objects.create(purchase_order=self.po, name="Bolt", quantity=Decimal("4"))
+        self.nut = PurchaseOrderItem.objects.create(purchase_order=self.po, name="Nut", quantity=Decimal("2"))
+
+    def test_repeated_lines_are_summed_and_status_follows(self):
+        receive_po_items(
+            po=self.po,
+            lines=[
+                {"item_id": self.bolt.id, "quantity_received": Decimal("1")},
+                {"item_id": self.bolt.id, "quantity_received": Decimal("1")},
+            ],
+        )
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.status, PurchaseOrder.Status.PARTIAL)
+        self.bolt.refresh_from_db()
+        self.assertEqual(self.bolt.received_quantity, Decimal("2"))
+
+        receive_po_items(
+            po=self.po,
+            lines=[
+                {"item_id": self.bolt.id, "quantity_received": Decimal("2")},
+                {"item_id": self.nut.id, "quantity_received": Decimal("2")},
+            ],
+        )
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.status, PurchaseOrder.Status.RECEIVED)
+
+    def test_received_items_become_assets_once(self):
+        items = receive_po_items(po=self.po, lines=[{"item_id": self.bolt.id, "quantity_received": Decimal("4")}])
+        self.assertEqual(convert_po_items_to_assets(items=items, actor=self.user), 1)
+        self.assertEqual(convert_po_items_to_assets(items=items, actor=self.user), 0)
+        asset = Asset.objects.get(source_po_item=self.bolt)
+        self.assertEqual(asset.quantity, Decimal("4"))
+        self.assertEqual(AssetLedgerEntry.objects.filter(asset=asset).count(), 1)
+
+    def test_count_excludes_assets_inserted_by_a_concurrent_receipt(self):
+        items = receive_po_items(
+            po=self.po,
+            lines=[
+                {"item_id": self.bolt.id, "quantity_received": Decimal("4")},
+                {"item_id": self.nut.id, "quantity_received": Decimal("2")},
+            ],
+        )
+        # Simulate the other receipt landing between the existence check and the insert.
+        original = asset_services._coerce_decimal
+        raced = []
+
+        def racing_coerce(value):
+            if not raced:
+                raced.append(Asset.objects.create(source_po_item=self.nut, name="Nut", quantity=Decimal("2")))
+            return original(value)
+
+        with mock.patch.object(asset_services, "_coerce_decimal", racing_coerce):
+            self.assertEqual(convert_po_items_to_assets(items=items, actor=self.user), 1)
+        self.assertEqual(Asset.objects.filter(source_po_item__purchase_order=self.po).count(), 2)
+        # Only the asset this call inserted gets its RECEIVED entry from here.
+        self.assertEqual(
+            list(AssetLedgerEntry.objects.values_list("asset__source_po_item", "quantity")),
+            [(self.bolt.id, Decimal("4"))],
+        )
+
+
+@override_settings(DELIVERIES_CACHE_SECONDS=0)
+class DeliveryReportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user("owner@example.com", "pw")
+        self.admin = User.objects.create_superuser("admin@example.com", "pw")
+        self.today = timezone.localdate()
+        self.bom = Bom.objects.create(owner=self.owner, title="Rig", status=Bom.Status.APPROVED)
+        self.late = self.bom_item("Bolt", "Acme", -3)
+        self.soon = self.bom_item("Nut", "Globex", 5)
+        self.bom_item("Gear", "Acme", 30)
+        other = Bom.objects.create(owner=self.admin, title="Other")
+        BomItem.objects.create(
+            bom=other, name="Cog", vendor="Acme", ordered_at=timezone.now(), eta_date=self.today - timedelta(days=1)
+        )
+
+    def bom_item(self, name, vendor, days):
+        return BomItem.objects.create(
+            bom=self.bom,
+            name=name,
+            vendor=vendor,
+            quantity=Decimal("2"),
+            ordered_at=timezone.now(),
+            eta_date=self.today + timedelta(days=days),
+        )
+
+    def report(self, user, kind, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(f"/api/deliveries/{kind}/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def names(self, report):
+        return sorted(item["name"] for group in report["vendors"] for item in group["items"])
+
+    def test_overdue_and_upcoming_windows(self):
+        overdue = self.report(self.admin, "overdue")
+        self.assertEqual(self.names(overdue), ["Bolt", "Cog"])
+        self.assertEqual(overdue["vendors"][0]["items"][0]["days_late"], 3)
+        self.assertEqual(self.names(self.report(self.admin, "upcoming")), ["Nut"])
+        self.assertEqual(self.names(self.report(self.admin, "upcoming", days=30)), ["Gear", "Nut"])
+
+    def test_vendor_filter(self):
+        self.assertEqual(self.names(self.report(self.admin, "overdue", vendor="acme")), ["Bolt", "Cog"])
+        self.assertEqual(self.names(self.report(self.admin, "overdue", vendor="Globex")), [])
+
+    def test_non_privileged_user_sees_own_boms_only(self):
+        self.assertEqual(self.names(self.report(self.owner, "overdue")), ["Bolt"])
+
+    def test_item_on_a_draft_po_stays_in_the_report(self):
+        generate_purchase_orders(bom=self.bom, actor=self.admin, item_ids=[self.late.id])
+        self.assertEqual(self.names(self.report(self.owner, "overdue")), ["Bolt"])
+        po = PurchaseOrder.objects.get(bom=self.bom)
+        po.status = PurchaseOrder.Status.SENT
+        po.save()
+        report = self.report(self.owner, "overdue")
+        self.assertEqual(self.names(report), ["Bolt"])
+        self.assertEqual(report["vendors"][0]["items"][0]["source"], "po")
+
+
+class PurchaseOrderListTests(TestCase):
+    url = "/api/purchase-orders/"
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser("admin@example.com", "pw")
+        bom = Bom.objects.create(owner=self.admin, title="Rig")
+        self.bolts = PurchaseOrder.objects.create(bom=bom, created_by=self.admin, po_number="PO-1", vendor_name="Acme")
+        self.line(self.bolts, "Bolt", "10", "1.50", "20", received="3", category="Fasteners")
+        self.line(self.bolts, "Washer", "5", "0.20", None, received="9", category="Fasteners")
+        self.line(self.bolts, "Sample", "1", None, None)
+        self.chips = PurchaseOrder.objects.create(bom=bom, created_by=self.admin, po_number="PO-2", vendor_name="Globex")
+        self.line(self.chips, "Chip", "3", "7", "10", category="Electronics")
+        self.empty = PurchaseOrder.objects.create(bom=bom, created_by=self.admin, po_number="PO-3")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def line(self, po, name, quantity, unit_price, tax_percent, *, received="0", category=""):
+        PurchaseOrderItem.objects.create(
+            purchase_order=po,
+            name=name,
+            quantity=Decimal(quantity),
+            unit_price=Decimal(unit_price) if unit_price else None,
+            tax_percent=Decimal(tax_percent) if tax_percent else None,
+            received_quantity=Decimal(received),
+            category=category,
+        )
+
+    def rows(self, **params) -> dict[str, dict]:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {row["po_number"]: row for row in response.json()["results"]}
+
+    def test_summary_aggregates_match_the_expanded_items(self):
+        summary = self.rows()
+        expanded = self.rows(expand="items")
+        self.assertNotIn("items", summary["PO-1"])
+        for number, row in summary.items():
+            items = expanded[number]["items"]
+            self.assertEqual(row["item_count"], len(items))
+            priced = [i for i in items if i["unit_price"] is not None]
+            subtotal = sum((Decimal(i["quantity"]) * Decimal(i["unit_price"]) for i in priced), Decimal("0"))
+            tax = sum(
+                (Decimal(i["quantity"]) * Decimal(i["unit_price"]) * Decimal(i["tax_percent"] or 0) / 100 for i in priced),
+                Decimal("0"),
+            )
+            if priced:
+                self.assertEqual(Decimal(row["subtotal"]), subtotal)
+                self.assertEqual(Decimal(row["total"]), subtotal + tax)
+
+        bolts = summary["PO-1"]
+        self.assertEqual((bolts["subtotal"], bolts["tax_total"], bolts["total"]), ("16.0000", "3.0000", "19.0000"))
+        # Over-receipt of washers counts as fully received, not beyond.
+        self.assertEqual((bolts["quantity_total"], bolts["received_total"]), ("16.000", "8.000"))
+        self.assertEqual(bolts["received_percent"], "50.0")
+        self.assertEqual(summary["PO-2"]["received_percent"], "0.0")
+
+        empty = summary["PO-3"]
+        self.assertEqual(empty["item_count"], 0)
+        self.assertIsNone(empty["received_percent"])
+        self.assertIsNone(empty["total"])
+
+    def test_summary_list_is_one_query_per_page(self):
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_category_filter_matches_any_item_once(self):
+        self.assertEqual(list(self.rows(category="fast")), ["PO-1"])
+        self.assertEqual(self.rows(category="fast")["PO-1"]["item_count"], 3)
+        self.assertEqual(list(self.rows(category="electronics", expand="items")), ["PO-2"])
+        self.assertEqual(self.rows(category="Hydraulics"), {})
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "sequences are PostgreSQL only")
+class PoNumberSequenceTests(TransactionTestCase):
+    def test_sequence_created_in_rolled_back_transaction_is_recreated(self):
+        name = services._sequence_name("RB-", DAY)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                reserve_po_numbers(1, prefix="RB-", day=DAY)
+                raise RuntimeError
+        self.assertNotIn(name, services._known_sequences)
+        self.assertFalse(services._sequence_exists(name))
+        self.assertEqual(reserve_po_numbers(1, prefix="RB-", day=DAY), ["RB-20260115-00001"])
+        self.assertIn(name, services._known_sequences)
+
+    def test_retired_sequence_resumes_from_its_final_value(self):
+        name = services._sequence_name("DR-", DAY)
+        reserve_po_numbers(3, prefix="DR-", day=DAY)
+        services._retire_sequences(date(2026, 1, 16))
+        self.assertFalse(services._sequence_exists(name))
+        self.assertEqual(PurchaseOrderNumberCounter.objects.get(prefix="DR-", day=DAY).last_value, 3)
+        self.assertEqual(reserve_po_numbers(1, prefix="DR-", day=DAY), ["DR-20260115-00004"])
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from rest_framework.routers import DefaultRouter
 
-from .views import PurchaseOrderViewSet
+from .views import DeliveriesViewSet, PurchaseOrderViewSet
 
 
 router = DefaultRouter()
 router.register(r"purchase-orders", PurchaseOrderViewSet, basename="purchase-orders")
+router.register(r"deliveries", DeliveriesViewSet, basename="deliveries")
 
 urlpatterns = router.urls
 
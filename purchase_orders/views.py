@@ -3,8 +3,9 @@ from __future__ import annotations
 from datetime import datetime, time
 from decimal import Decimal
 
-from django.db import models, transaction
-from django.db.models import Q
+from django.db import models
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Prefetch, Q, Sum, Value
+from django.db.models.functions import Least
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import permissions, status, viewsets
@@ -14,16 +15,18 @@ from rest_framework.response import Response
 from boms.permissions import has_role
 from core.pagination import StandardResultsSetPagination
 
+from .deliveries import delivery_report
 from .models import PurchaseOrder, PurchaseOrderItem
 from .permissions import IsProcurementStrict
 from .serializers import (
     CreatePurchaseOrderItemSerializer,
     CreatePurchaseOrderSerializer,
     PurchaseOrderItemSerializer,
+    PurchaseOrderListSerializer,
     PurchaseOrderSerializer,
     ReceiveItemsSerializer,
 )
-from .services import generate_po_number, recompute_po_status
+from .services import allocate_po_number, receive_po_items
 
 
 def _parse_dt(value: str | None, *, end_of_day: bool = False):
@@ -43,6 +46,28 @@ def _parse_dt(value: str | None, *, end_of_day: bool = False):
         dt = timezone.make_aware(dt)
     return dt
 
+_MONEY = DecimalField(max_digits=20, decimal_places=4)
+_QTY = DecimalField(max_digits=16, decimal_places=3)
+
+
+def _with_item_totals(qs):
+    """
+    Annotate per-PO item aggregates in the list query itself (one GROUP BY)
+    instead of serializing nested items.
+    """
+    line_total = ExpressionWrapper(F("items__quantity") * F("items__unit_price"), output_field=_MONEY)
+    # Scale by 0.01 rather than dividing by 100: SQLite stores whole-number
+    # decimals as integers and would truncate the division.
+    tax_rate = ExpressionWrapper(F("items__tax_percent") * Value(Decimal("0.01")), output_field=_MONEY)
+    return qs.annotate(
+        item_count=Count("items"),
+        quantity_total=Sum("items__quantity", output_field=_QTY),
+        received_total=Sum(Least("items__received_quantity", "items__quantity"), output_field=_QTY),
+        subtotal=Sum(line_total, output_field=_MONEY),
+        tax_total=Sum(ExpressionWrapper(line_total * tax_rate, output_field=_MONEY), output_field=_MONEY),
+    )
+
+
 class PurchaseOrderViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = StandardResultsSetPagination
@@ -77,7 +102,9 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
 
         category = params.get("category")
         if category:
-            qs = qs.filter(items__category__icontains=category)
+            qs = qs.filter(
+                Exists(PurchaseOrderItem.objects.filter(purchase_order=OuterRef("pk"), category__icontains=category))
+            )
 
         search_term = params.get("search") or params.get("q")
         if search_term:
@@ -97,18 +124,25 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         if updated_to:
             qs = qs.filter(updated_at__lte=updated_to)
 
-        return qs.distinct().order_by("-updated_at")
+        if self._list_summary():
+            qs = _with_item_totals(qs)
+        else:
+            qs = qs.prefetch_related(Prefetch("items", queryset=PurchaseOrderItem.objects.order_by("id")))
+        return qs.order_by("-updated_at")
+
+    def _list_summary(self) -> bool:
+        return self.action == "list" and self.request.query_params.get("expand") != "items"
 
     def get_serializer_class(self):
         if self.action == "create":
             return CreatePurchaseOrderSerializer
+        if self._list_summary():
+            return PurchaseOrderListSerializer
         return PurchaseOrderSerializer
 
     def perform_create(self, serializer):
-        po = serializer.save(created_by=self.request.user, status=PurchaseOrder.Status.DRAFT)
-        if not po.po_number:
-            po.po_number = generate_po_number(po)
-            po.save(update_fields=["po_number"])
+        po_number = serializer.validated_data.get("po_number") or allocate_po_number()
+        serializer.save(created_by=self.request.user, status=PurchaseOrder.Status.DRAFT, po_number=po_number)
 
     @action(detail=True, methods=["post"], url_path="items")
     def add_item(self, request, pk=None):
@@ -124,14 +158,14 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         if po.status == PurchaseOrder.Status.CANCELED:
             return Response({"detail": "PO is canceled."}, status=status.HTTP_400_BAD_REQUEST)
         po.status = PurchaseOrder.Status.SENT
-        po.save(update_fields=["status"])
+        po.save(update_fields=["status", "updated_at"])
         return Response(PurchaseOrderSerializer(po).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], url_path="cancel")
     def cancel(self, request, pk=None):
         po: PurchaseOrder = self.get_object()
         po.status = PurchaseOrder.Status.CANCELED
-        po.save(update_fields=["status"])
+        po.save(update_fields=["status", "updated_at"])
         return Response(PurchaseOrderSerializer(po).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], url_path="receive")
@@ -141,25 +175,33 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         lines = serializer.validated_data["lines"]
 
-        with transaction.atomic():
-            updated_ids: list[int] = []
-            for line in lines:
-                item_id = line["item_id"]
-                qty: Decimal = line["quantity_received"]
-                item = po.items.filter(id=item_id).first()
-                if not item:
-                    continue
-                item.received_quantity = item.received_quantity + qty
-                item.received_at = timezone.now()
-                item.save(update_fields=["received_quantity", "received_at"])
-                updated_ids.append(item.id)
-
-            recompute_po_status(po)
-
-        if updated_ids:
+        items = receive_po_items(po=po, lines=lines)
+        updated_ids = [item.id for item in items]
+        if items:
             from assets.services import convert_po_items_to_assets
 
-            items = list(po.items.filter(id__in=updated_ids))
             convert_po_items_to_assets(items=items, actor=request.user)
 
         return Response({"detail": "Receipt recorded.", "item_ids": updated_ids}, status=status.HTTP_200_OK)
+
+
+class DeliveriesViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _report(self, request, kind: str) -> Response:
+        params = request.query_params
+        try:
+            days = int(params.get("days") or 14)
+        except ValueError:
+            return Response({"detail": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(0, min(days, 365))
+        vendor = (params.get("vendor") or "").strip()
+        return Response(delivery_report(request.user, kind=kind, days=days, vendor=vendor))
+
+    @action(detail=False, methods=["get"], url_path="overdue")
+    def overdue(self, request):
+        return self._report(request, "overdue")
+
+    @action(detail=False, methods=["get"], url_path="upcoming")
+    def upcoming(self, request):
+        return self._report(request, "upcoming")
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.contrib import admin
+
+from .models import ReportWatermark, SpendRollup
+
+
+@admin.register(SpendRollup)
+class SpendRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "vendor", "currency", "project", "source", "amount", "tax_amount", "line_count")
+    list_filter = ("source", "currency")
+    search_fields = ("vendor", "project")
+
+
+@admin.register(ReportWatermark)
+class ReportWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "value", "updated_at")
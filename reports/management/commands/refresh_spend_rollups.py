@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from reports.services import refresh_spend_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the spend rollup tables from bills, PO items and BOM items changed since the last run. "
+        "Run it from cron; --full rebuilds everything."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Reprocess every source row.")
+
+    def handle(self, *args, **options):
+        result = refresh_spend_rollups(full=options["full"])
+        summary = result.as_dict()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Spend rollups refreshed ({mode}): {facts_written} facts written, {facts_removed} removed, "
+                "{days_recomputed} days recomputed".format(mode="full" if summary["full"] else "incremental", **summary)
+            )
+        )
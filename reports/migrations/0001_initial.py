@@ -0,0 +1,70 @@
+# Generated by Django 5.0.10 on 2026-10-19 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SpendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('vendor', models.CharField(blank=True, max_length=200)),
+                ('currency', models.CharField(blank=True, max_length=20)),
+                ('project', models.CharField(blank=True, max_length=200)),
+                ('source', models.CharField(choices=[('BILL', 'Bill'), ('PO', 'Purchase order item'), ('BOM', 'BOM item')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('tax_amount', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SpendFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('BILL', 'Bill'), ('PO', 'Purchase order item'), ('BOM', 'BOM item')], max_length=10)),
+                ('source_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('vendor', models.CharField(blank=True, max_length=200)),
+                ('currency', models.CharField(blank=True, max_length=20)),
+                ('project', models.CharField(blank=True, max_length=200)),
+                ('amount', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('tax_amount', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='reports_spe_day_1e98b1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='spendfact',
+            constraint=models.UniqueConstraint(fields=('source', 'source_id'), name='uniq_spend_fact_source'),
+        ),
+        migrations.AddIndex(
+            model_name='spendrollup',
+            index=models.Index(fields=['day', 'source'], name='reports_spe_day_9f8170_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spendrollup',
+            index=models.Index(fields=['vendor', 'day'], name='reports_spe_vendor_c8f0de_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='spendrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'vendor', 'currency', 'project', 'source'), name='uniq_spend_rollup_key'),
+        ),
+    ]
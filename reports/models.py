@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class SpendSource(models.TextChoices):
+    BILL = "BILL", "Bill"
+    PO = "PO", "Purchase order item"
+    BOM = "BOM", "BOM item"
+
+
+class SpendFact(models.Model):
+    """
+    The spend one source row currently contributes to the rollup.
+
+    Kept so an incremental refresh knows which rollup keys a changed or deleted
+    row used to count towards.
+    """
+
+    source = models.CharField(max_length=10, choices=SpendSource.choices)
+    source_id = models.BigIntegerField()
+    day = models.DateField()
+    vendor = models.CharField(max_length=200, blank=True)
+    currency = models.CharField(max_length=20, blank=True)
+    project = models.CharField(max_length=200, blank=True)
+    amount = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    tax_amount = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "source_id"], name="uniq_spend_fact_source"),
+        ]
+        indexes = [models.Index(fields=["day"])]
+
+    def __str__(self) -> str:
+        return f"{self.source} {self.source_id} @ {self.day}"
+
+
+class SpendTombstone(models.Model):
+    """
+    A deleted source row whose fact the next refresh must drop.
+
+    Written by a post_delete hook (reports.signals), so incremental refreshes
+    don't have to anti-join every fact against its source table.
+    """
+
+    source = models.CharField(max_length=10, choices=SpendSource.choices)
+    source_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.source} {self.source_id} deleted @ {self.deleted_at}"
+
+
+class SpendRollup(models.Model):
+    day = models.DateField()
+    vendor = models.CharField(max_length=200, blank=True)
+    currency = models.CharField(max_length=20, blank=True)
+    project = models.CharField(max_length=200, blank=True)
+    source = models.CharField(max_length=10, choices=SpendSource.choices)
+    amount = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    tax_amount = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    line_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "vendor", "currency", "project", "source"], name="uniq_spend_rollup_key"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["day", "source"]),
+            models.Index(fields=["vendor", "day"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.vendor or '-'} {self.currency} {self.source}: {self.amount}"
+
+
+class ReportWatermark(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.value}"
@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from bills.models import Bill
+from boms.models import BomItem
+from purchase_orders.models import PurchaseOrder, PurchaseOrderItem
+
+from .models import ReportWatermark, SpendFact, SpendRollup, SpendSource, SpendTombstone
+
+SPEND_WATERMARK = "spend_rollup"
+MAX_ROWS = 5000
+GROUP_BY_FIELDS = ("day", "week", "month", "year", "vendor", "currency", "project", "source")
+
+_CHUNK = 2000
+_PLACES = Decimal("0.0001")
+_FACT_FIELDS = ("day", "vendor", "currency", "project", "amount", "tax_amount")
+_PERIODS = {"week": TruncWeek, "month": TruncMonth, "year": TruncYear}
+
+# Ordered spend: PO lines plus BOM items not on a PO, which never overlap.
+# Bills describe the same purchases again, so they are only reported on their own.
+COMMITTED_SOURCES = (SpendSource.PO, SpendSource.BOM)
+
+
+@dataclass
+class SpendRefreshResult:
+    full: bool
+    since: datetime | None
+    facts_written: int = 0
+    facts_removed: int = 0
+    days: set[date] = field(default_factory=set)
+
+    def as_dict(self) -> dict:
+        return {
+            "full": self.full,
+            "since": self.since.isoformat() if self.since else None,
+            "facts_written": self.facts_written,
+            "facts_removed": self.facts_removed,
+            "days_recomputed": len(self.days),
+        }
+
+
+def _day(value) -> date:
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(_PLACES)
+
+
+def _bill_facts(ids: list[int]) -> dict[int, dict]:
+    rows = Bill.objects.filter(
+        id__in=ids,
+        amount__isnull=False,
+        status__in=[Bill.Status.SUBMITTED, Bill.Status.APPROVED, Bill.Status.PAID],
+    ).values(
+        "id",
+        "amount",
+        "vendor_name",
+        "currency",
+        "paid_at",
+        "approved_at",
+        "created_at",
+        "purchase_order__vendor_name",
+        "purchase_order__currency",
+        "bom__project",
+        "purchase_order__bom__project",
+    )
+    return {
+        row["id"]: {
+            "day": _day(row["paid_at"] or row["approved_at"] or row["created_at"]),
+            "vendor": row["vendor_name"] or row["purchase_order__vendor_name"] or "",
+            "currency": row["currency"] or row["purchase_order__currency"] or "",
+            "project": row["bom__project"] or row["purchase_order__bom__project"] or "",
+            "amount": _money(row["amount"]),
+            "tax_amount": _money(0),
+        }
+        for row in rows
+    }
+
+
+def _line_amounts(row: dict) -> tuple[Decimal, Decimal]:
+    amount = _money(row["quantity"] * row["unit_price"])
+    tax = _money(amount * row["tax_percent"] / 100) if row["tax_percent"] else _money(0)
+    return amount, tax
+
+
+def _po_facts(ids: list[int]) -> dict[int, dict]:
+    rows = (
+        PurchaseOrderItem.objects.filter(id__in=ids, unit_price__isnull=False)
+        .exclude(purchase_order__status__in=[PurchaseOrder.Status.DRAFT, PurchaseOrder.Status.CANCELED])
+        .values(
+            "id",
+            "quantity",
+            "unit_price",
+            "tax_percent",
+            "vendor",
+            "currency",
+            "ordered_at",
+            "purchase_order__created_at",
+            "purchase_order__vendor_name",
+            "purchase_order__currency",
+            "purchase_order__bom__project",
+        )
+    )
+    facts = {}
+    for row in rows:
+        amount, tax = _line_amounts(row)
+        facts[row["id"]] = {
+            "day": _day(row["ordered_at"] or row["purchase_order__created_at"]),
+            "vendor": row["vendor"] or row["purchase_order__vendor_name"] or "",
+            "currency": row["currency"] or row["purchase_order__currency"] or "",
+            "project": row["purchase_order__bom__project"] or "",
+            "amount": amount,
+            "tax_amount": tax,
+        }
+    return facts
+
+
+def _bom_facts(ids: list[int]) -> dict[int, dict]:
+    # Items on a live PO are counted through the PO line.
+    on_po = PurchaseOrderItem.objects.filter(bom_item=OuterRef("pk")).exclude(
+        purchase_order__status=PurchaseOrder.Status.CANCELED
+    )
+    rows = (
+        BomItem.objects.filter(id__in=ids, ordered_at__isnull=False, unit_price__isnull=False)
+        .exclude(Exists(on_po))
+        .values("id", "quantity", "unit_price", "tax_percent", "vendor", "currency", "ordered_at", "bom__project")
+    )
+    facts = {}
+    for row in rows:
+        amount, tax = _line_amounts(row)
+        facts[row["id"]] = {
+            "day": _day(row["ordered_at"]),
+            "vendor": row["vendor"],
+            "currency": row["currency"],
+            "project": row["bom__project"],
+            "amount": amount,
+            "tax_amount": tax,
+        }
+    return facts
+
+
+def _changed_bill_ids(since: datetime) -> set[int]:
+    ids: set[int] = set()
+    for lookup in ("updated_at__gt", "bom__updated_at__gt", "purchase_order__updated_at__gt"):
+        ids.update(Bill.objects.filter(**{lookup: since}).values_list("id", flat=True))
+    return ids
+
+
+def _changed_po_item_ids(since: datetime) -> set[int]:
+    ids: set[int] = set()
+    for lookup in ("updated_at__gt", "purchase_order__updated_at__gt", "purchase_order__bom__updated_at__gt"):
+        ids.update(PurchaseOrderItem.objects.filter(**{lookup: since}).values_list("id", flat=True))
+    return ids
+
+
+def _changed_bom_item_ids(since: datetime) -> set[int]:
+    ids: set[int] = set()
+    # The last two catch items that moved onto (or off) a purchase order.
+    for lookup in (
+        "updated_at__gt",
+        "bom__updated_at__gt",
+        "purchaseorderitem__updated_at__gt",
+        "purchaseorderitem__purchase_order__updated_at__gt",
+    ):
+        ids.update(BomItem.objects.filter(**{lookup: since}).values_list("id", flat=True))
+    return ids
+
+
+_SOURCES: dict[str, tuple] = {
+    SpendSource.BILL: (Bill, _bill_facts, _changed_bill_ids),
+    SpendSource.PO: (PurchaseOrderItem, _po_facts, _changed_po_item_ids),
+    SpendSource.BOM: (BomItem, _bom_facts, _changed_bom_item_ids),
+}
+
+
+def _chunks(ids: Iterable[int]) -> Iterator[list[int]]:
+    chunk: list[int] = []
+    for value in ids:
+        chunk.append(value)
+        if len(chunk) >= _CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _sync_facts(source: str, builder: Callable[[list[int]], dict], ids: list[int], result: SpendRefreshResult) -> None:
+    new = builder(ids)
+    old = {fact.source_id: fact for fact in SpendFact.objects.filter(source=source, source_id__in=ids)}
+
+    stale = [source_id for source_id in old if source_id not in new]
+    if stale:
+        result.days.update(old[source_id].day for source_id in stale)
+        result.facts_removed += SpendFact.objects.filter(source=source, source_id__in=stale).delete()[0]
+
+    to_write = []
+    for source_id, values in new.items():
+        previous = old.get(source_id)
+        if previous is not None and all(getattr(previous, name) == values[name] for name in _FACT_FIELDS):
+            continue
+        if previous is not None:
+            result.days.add(previous.day)
+        result.days.add(values["day"])
+        to_write.append(SpendFact(source=source, source_id=source_id, **values))
+    if to_write:
+        SpendFact.objects.bulk_create(
+            to_write,
+            update_conflicts=True,
+            unique_fields=["source", "source_id"],
+            update_fields=list(_FACT_FIELDS),
+        )
+        result.facts_written += len(to_write)
+
+
+def _drop_orphaned_facts(source: str, model, result: SpendRefreshResult) -> None:
+    # Full rebuilds only: also catches rows removed without post_delete (raw SQL).
+    orphans = SpendFact.objects.filter(source=source).exclude(Exists(model.objects.filter(pk=OuterRef("source_id"))))
+    result.days.update(orphans.values_list("day", flat=True).distinct())
+    result.facts_removed += orphans.delete()[0]
+
+
+def _drop_deleted_facts(result: SpendRefreshResult) -> None:
+    # Deleted source rows leave no updated_at trace; their tombstones say which facts to drop.
+    tombstones = list(SpendTombstone.objects.values_list("id", "source", "source_id"))
+    by_source: dict[str, list[int]] = {}
+    for _, source, source_id in tombstones:
+        by_source.setdefault(source, []).append(source_id)
+    for source, source_ids in by_source.items():
+        for chunk in _chunks(source_ids):
+            facts = SpendFact.objects.filter(source=source, source_id__in=chunk)
+            result.days.update(facts.values_list("day", flat=True).distinct())
+            result.facts_removed += facts.delete()[0]
+    for chunk in _chunks([row[0] for row in tombstones]):
+        SpendTombstone.objects.filter(id__in=chunk).delete()
+
+
+def _rebuild_rollup_days(days: Iterable[date]) -> None:
+    for chunk in _chunks(sorted(days)):
+        SpendRollup.objects.filter(day__in=chunk).delete()
+        rows = (
+            SpendFact.objects.filter(day__in=chunk)
+            .values("day", "vendor", "currency", "project", "source")
+            .annotate(total_amount=Sum("amount"), total_tax=Sum("tax_amount"), lines=Count("id"))
+            .order_by()
+        )
+        SpendRollup.objects.bulk_create(
+            [
+                SpendRollup(
+                    day=row["day"],
+                    vendor=row["vendor"],
+                    currency=row["currency"],
+                    project=row["project"],
+                    source=row["source"],
+                    amount=row["total_amount"],
+                    tax_amount=row["total_tax"],
+                    line_count=row["lines"],
+                )
+                for row in rows
+            ],
+            batch_size=_CHUNK,
+        )
+
+
+def refresh_spend_rollups(*, full: bool = False) -> SpendRefreshResult:
+    """
+    Bring SpendFact / SpendRollup up to date with bills, PO items and BOM items.
+
+    Incremental runs only look at rows whose own (or parent's) `updated_at` is
+    after the stored watermark minus SPEND_ROLLUP_LAG_SECONDS, so writes that
+    committed late are still picked up; reprocessing a row is harmless. Only
+    the days whose facts changed are re-aggregated. Deleted rows are found
+    through their SpendTombstone. The first run, or `full=True`, processes
+    everything and also sweeps facts whose source row is gone.
+    """
+    started = timezone.now()
+    with transaction.atomic():
+        watermark, _ = ReportWatermark.objects.get_or_create(name=SPEND_WATERMARK)
+        watermark = ReportWatermark.objects.select_for_update().get(pk=watermark.pk)
+        full = full or watermark.value is None
+        since = None if full else watermark.value - timedelta(seconds=settings.SPEND_ROLLUP_LAG_SECONDS)
+        result = SpendRefreshResult(full=full, since=since)
+
+        for source, (model, builder, changed_ids) in _SOURCES.items():
+            if full:
+                ids = model.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=_CHUNK)
+            else:
+                ids = sorted(changed_ids(since))
+            for chunk in _chunks(ids):
+                _sync_facts(source, builder, chunk, result)
+            if full:
+                _drop_orphaned_facts(source, model, result)
+        _drop_deleted_facts(result)
+
+        if full:
+            SpendRollup.objects.all().delete()
+            result.days.update(SpendFact.objects.values_list("day", flat=True).distinct())
+        _rebuild_rollup_days(result.days)
+
+        watermark.value = started
+        watermark.save(update_fields=["value", "updated_at"])
+    return result
+
+
+def spend_summary(
+    *,
+    date_from: date,
+    date_to: date,
+    group_by: list[str],
+    source: str = "",
+    vendor: str = "",
+    currency: str = "",
+    project: str = "",
+) -> dict:
+    """
+    Sum rollup rows in [date_from, date_to] grouped by `group_by`.
+
+    Amounts are never added across currencies, so currency is always part of
+    the grouping. Without `source` the committed (PO + BOM) spend is summed;
+    bills are only included when asked for with `source=BILL`, since a billed
+    PO would otherwise count twice.
+    """
+    qs = SpendRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    qs = qs.filter(source=source) if source else qs.filter(source__in=COMMITTED_SOURCES)
+    if vendor:
+        qs = qs.filter(vendor__iexact=vendor)
+    if currency:
+        qs = qs.filter(currency__iexact=currency)
+    if project:
+        qs = qs.filter(project__iexact=project)
+
+    columns = [name for name in GROUP_BY_FIELDS if name in group_by or name == "currency"]
+    periods = {name: _PERIODS[name]("day") for name in columns if name in _PERIODS}
+    if periods:
+        qs = qs.annotate(**periods)
+    ordering = [name for name in columns if name in periods or name == "day"]
+    rows = list(
+        qs.values(*columns)
+        .annotate(amount_total=Sum("amount"), tax_total=Sum("tax_amount"), line_count=Sum("line_count"))
+        .order_by(*ordering, "-amount_total")[: MAX_ROWS + 1]
+    )
+
+    results = []
+    for row in rows[:MAX_ROWS]:
+        item = {name: row[name].isoformat() if isinstance(row[name], date) else row[name] for name in columns}
+        item.update(
+            {
+                "amount": str(row["amount_total"]),
+                "tax_amount": str(row["tax_total"]),
+                "total": str(row["amount_total"] + row["tax_total"]),
+                "line_count": row["line_count"],
+            }
+        )
+        results.append(item)
+
+    watermark = ReportWatermark.objects.filter(name=SPEND_WATERMARK).values_list("value", flat=True).first()
+    return {
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "sources": [source] if source else list(COMMITTED_SOURCES),
+        "group_by": columns,
+        "refreshed_at": watermark.isoformat() if watermark else None,
+        "truncated": len(rows) > MAX_ROWS,
+        "rows": results,
+    }
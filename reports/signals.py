@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from bills.models import Bill
+from boms.models import BomItem
+from purchase_orders.models import PurchaseOrderItem
+
+from .models import SpendSource, SpendTombstone
+
+_SOURCE_BY_MODEL = {Bill: SpendSource.BILL, PurchaseOrderItem: SpendSource.PO, BomItem: SpendSource.BOM}
+
+
+@receiver(post_delete, sender=Bill)
+@receiver(post_delete, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=BomItem)
+def record_spend_tombstone(sender, instance, **kwargs):
+    # Covers cascades (a deleted PO or BOM) too; rolled back with the delete.
+    SpendTombstone.objects.create(source=_SOURCE_BY_MODEL[sender], source_id=instance.pk)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from bills.models import Bill
+from boms.models import Bom, BomItem
+from purchase_orders.models import PurchaseOrder, PurchaseOrderItem
+
+from .models import SpendFact, SpendSource, SpendTombstone
+from .services import refresh_spend_rollups, spend_summary
+
+
+class SpendSummaryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("owner@example.com", "pw")
+        self.now = timezone.now()
+        bom = Bom.objects.create(owner=self.user, title="Rig", project="P1")
+        po = PurchaseOrder.objects.create(
+            bom=bom, created_by=self.user, status=PurchaseOrder.Status.SENT, po_number="PO-1", vendor_name="Acme"
+        )
+        PurchaseOrderItem.objects.create(
+            purchase_order=po, name="Bolt", quantity=1, unit_price=Decimal("100"), vendor="Acme", ordered_at=self.now
+        )
+        Bill.objects.create(
+            purchase_order=po,
+            vendor_name="Acme",
+            amount=Decimal("100"),
+            status=Bill.Status.APPROVED,
+            approved_at=self.now,
+            created_by=self.user,
+        )
+        BomItem.objects.create(
+            bom=bom, name="Nut", quantity=1, unit_price=Decimal("50"), vendor="Acme", ordered_at=self.now
+        )
+        refresh_spend_rollups()
+
+    def _summary(self, **kwargs):
+        today = timezone.localdate()
+        return spend_summary(date_from=today, date_to=today, group_by=["month", "vendor"], **kwargs)
+
+    def test_default_counts_a_billed_po_once(self):
+        rows = self._summary()["rows"]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(Decimal(rows[0]["amount"]), Decimal("150"))
+
+    def test_bills_are_reported_on_their_own(self):
+        rows = self._summary(source=SpendSource.BILL)["rows"]
+        self.assertEqual(Decimal(rows[0]["amount"]), Decimal("100"))
+
+    def test_incremental_refresh_matches_full_rebuild(self):
+        BomItem.objects.filter(name="Nut").update(unit_price=Decimal("70"), updated_at=timezone.now())
+        refresh_spend_rollups()
+        incremental = self._summary()["rows"]
+        refresh_spend_rollups(full=True)
+        self.assertEqual(incremental, self._summary()["rows"])
+        self.assertEqual(Decimal(incremental[0]["amount"]), Decimal("170"))
+
+    def test_deleted_row_is_dropped_without_a_full_sweep(self):
+        BomItem.objects.filter(name="Nut").delete()
+        self.assertEqual(SpendTombstone.objects.count(), 1)
+        result = refresh_spend_rollups()
+        self.assertFalse(result.full)
+        self.assertEqual(result.facts_removed, 1)
+        self.assertFalse(SpendFact.objects.filter(source=SpendSource.BOM).exists())
+        self.assertFalse(SpendTombstone.objects.exists())
+        self.assertEqual(Decimal(self._summary()["rows"][0]["amount"]), Decimal("100"))
+
+    def test_cascaded_delete_is_dropped(self):
+        PurchaseOrder.objects.all().delete()
+        refresh_spend_rollups()
+        self.assertEqual(Decimal(self._summary()["rows"][0]["amount"]), Decimal("50"))
+        self.assertFalse(SpendFact.objects.filter(source=SpendSource.PO).exists())
+
+
+class SpendViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin@example.com", "pw"))
+
+    def test_impossible_date_is_a_bad_request(self):
+        response = self.client.get("/api/reports/spend/", {"from": "2024-02-30"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/spend/", {"to": "2024-13-01"}).status_code, 400)
+
+    def test_valid_range_is_ok(self):
+        response = self.client.get("/api/reports/spend/", {"from": "2024-01-01", "to": "2024-02-29"})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from rest_framework.routers import DefaultRouter
+
+from .views import ReportsViewSet
+
+
+router = DefaultRouter()
+router.register(r"reports", ReportsViewSet, basename="reports")
+
+urlpatterns = router.urls
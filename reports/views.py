@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from boms.permissions import has_role
+
+from .models import SpendSource
+from .services import GROUP_BY_FIELDS, spend_summary
+
+
+class ReportsViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=False, methods=["get"], url_path="spend")
+    def spend(self, request):
+        if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        params = request.query_params
+
+        today = timezone.localdate()
+        try:
+            date_to = parse_date(params.get("to") or "") if params.get("to") else today
+            date_from = parse_date(params.get("from") or "") if params.get("from") else date_to - timedelta(days=365)
+        except ValueError:
+            # Well-formed but impossible, e.g. 2024-02-30.
+            date_from = date_to = None
+        if date_from is None or date_to is None:
+            return Response({"detail": "from/to must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if date_from > date_to:
+            return Response({"detail": "from must not be after to."}, status=status.HTTP_400_BAD_REQUEST)
+
+        group_by = [name.strip() for name in (params.get("group_by") or "month,vendor").split(",") if name.strip()]
+        unknown = sorted(set(group_by) - set(GROUP_BY_FIELDS))
+        if unknown:
+            return Response(
+                {"detail": f"Unknown group_by: {', '.join(unknown)}.", "allowed": list(GROUP_BY_FIELDS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        source = (params.get("source") or "").strip().upper()
+        if source and source not in SpendSource.values:
+            return Response(
+                {"detail": "Unknown source.", "allowed": list(SpendSource.values)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            spend_summary(
+                date_from=date_from,
+                date_to=date_to,
+                group_by=group_by,
+                source=source,
+                vendor=(params.get("vendor") or "").strip(),
+                currency=(params.get("currency") or "").strip(),
+                project=(params.get("project") or "").strip(),
+            )
+        )
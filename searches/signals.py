@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from boms.models import Bom, BomItem
+from catalog.models import CatalogItem
+from profiles.models import Profile
+
+from .suggest import get_suggest_service
+
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def _after_commit(func, *args) -> None:
+    # The type-ahead index is best-effort; never let it break a write.
+    def run() -> None:
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Suggest index update failed")
+
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=User)
+def suggest_user_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _after_commit(get_suggest_service().user_changed, instance)
+
+
+@receiver(post_delete, sender=User)
+def suggest_user_deleted(sender, instance, **kwargs):
+    _after_commit(get_suggest_service().user_removed, instance.id)
+
+
+@receiver(post_save, sender=Profile)
+def suggest_profile_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _after_commit(get_suggest_service().user_changed, instance.user)
+
+
+@receiver(post_save, sender=CatalogItem)
+def suggest_catalog_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _after_commit(get_suggest_service().catalog_changed, instance)
+
+
+@receiver(post_delete, sender=CatalogItem)
+def suggest_catalog_deleted(sender, instance, **kwargs):
+    _after_commit(get_suggest_service().catalog_removed, instance.id)
+
+
+# Fields of a BomItem the type-ahead index depends on.
+_ITEM_INDEX_FIELDS = {"name", "bom"}
+
+
+def _remember_item_fields(instance) -> None:
+    # Deferred fields aren't in __dict__; None means "unknown, ask the database".
+    values = instance.__dict__
+    if "name" in values and "bom_id" in values:
+        instance._suggest_loaded = (values["name"], values["bom_id"])
+    else:
+        instance._suggest_loaded = None
+
+
+@receiver(post_init, sender=BomItem)
+def suggest_item_loaded(sender, instance, **kwargs):
+    if instance.pk is not None:
+        _remember_item_fields(instance)
+
+
+@receiver(pre_save, sender=BomItem)
+def suggest_item_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._suggest_previous = None
+    if raw or instance.pk is None or (update_fields is not None and not _ITEM_INDEX_FIELDS & set(update_fields)):
+        return
+    previous = getattr(instance, "_suggest_loaded", None)
+    if previous is None:
+        # Built by hand or loaded with name/bom deferred: nothing to compare against.
+        previous = BomItem.objects.filter(pk=instance.pk).values_list("name", "bom_id").first()
+    instance._suggest_previous = previous
+
+
+@receiver(post_save, sender=BomItem)
+def suggest_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    service = get_suggest_service()
+    previous = getattr(instance, "_suggest_previous", None)
+    _remember_item_fields(instance)
+    if created:
+        _after_commit(service.item_name_added, instance.name, instance.bom.owner_id)
+        return
+    if previous is not None and previous != (instance.name, instance.bom_id):
+        old_name, old_bom_id = previous
+        if old_bom_id == instance.bom_id:
+            old_owner_id = owner_id = instance.bom.owner_id
+        else:
+            owners = dict(Bom.objects.filter(pk__in=[old_bom_id, instance.bom_id]).values_list("id", "owner_id"))
+            old_owner_id, owner_id = owners.get(old_bom_id), owners.get(instance.bom_id)
+        if (old_name, old_owner_id) != (instance.name, owner_id):
+            if old_owner_id is not None:
+                _after_commit(service.item_name_removed, old_name, old_owner_id)
+            _after_commit(service.item_name_added, instance.name, owner_id)
+            return
+    # Nothing the index shows changed; just accept the generation bump.
+    _after_commit(service.item_name_unchanged)
+
+
+@receiver(post_delete, sender=BomItem)
+def suggest_item_deleted(sender, instance, **kwargs):
+    try:
+        owner_id = instance.bom.owner_id
+    except Exception:
+        return
+    _after_commit(get_suggest_service().item_name_removed, instance.name, owner_id)
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Count
+
+from core.response_cache import get_generations
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[\W_]+")
+
+KIND_USERS = "users"
+KIND_CATALOG = "catalog"
+KIND_ITEMS = "items"
+KINDS = (KIND_USERS, KIND_CATALOG, KIND_ITEMS)
+
+
+def _normalize(value: str) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def _words(text: str) -> list[str]:
+    return [w for w in _WORD_RE.split(text) if w]
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class _Entry:
+    key: str
+    label: str
+    text: str
+    payload: dict
+    # Who may see the entry: None = everyone, otherwise owner id -> reference count.
+    owners: dict[int, int] | None = None
+    grams: set[str] = field(default_factory=set)
+
+
+class PrefixIndex:
+    """
+    Bounded in-memory substring index (word prefixes for 1-2 chars, trigrams above).
+
+    Entries are kept in LRU order: adding or returning an entry refreshes it, and
+    the least recently used entries are evicted once `max_entries` is exceeded.
+    Not thread-safe on its own; SuggestService serialises access.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._postings: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> _Entry | None:
+        return self._entries.get(key)
+
+    def put(self, entry: _Entry) -> None:
+        self.remove(entry.key)
+        words = _words(entry.text)
+        grams = _trigrams(entry.text)
+        for word in words:
+            grams |= {"^" + word[:1], "^" + word[:2]}
+        entry.grams = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(entry.key)
+        self._entries[entry.key] = entry
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self.remove(oldest)
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in entry.grams:
+            keys = self._postings.get(gram)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._postings[gram]
+
+    def search(self, query: str, *, limit: int, visible) -> list[_Entry]:
+        query = _normalize(query)
+        if not query:
+            return []
+        if len(query) < 3:
+            candidates = self._postings.get("^" + query, set())
+        else:
+            grams = sorted(_trigrams(query), key=lambda g: len(self._postings.get(g, ())))
+            candidates = set(self._postings.get(grams[0], set()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self._postings.get(gram, set())
+
+        matches: list[tuple[int, str, _Entry]] = []
+        for key in candidates:
+            entry = self._entries[key]
+            if query not in entry.text or not visible(entry):
+                continue
+            # Rank: whole-text prefix, then word prefix, then substring.
+            if entry.text.startswith(query):
+                rank = 0
+            elif any(word.startswith(query) for word in _words(entry.text)):
+                rank = 1
+            else:
+                rank = 2
+            matches.append((rank, entry.label.lower(), entry))
+        matches.sort(key=lambda m: (m[0], m[1]))
+        results = [m[2] for m in matches[:limit]]
+        for entry in results:
+            self._entries.move_to_end(entry.key)
+        return results
+
+
+class SuggestService:
+    """
+    Process-local type-ahead over users, catalog item names and distinct BOM item names.
+
+    Kept current by model signals in this process (see searches.signals). Changes
+    made by other worker processes are noticed through the shared cache generation
+    counters (core.response_cache); a stale index is rebuilt in the background
+    while the old one keeps answering.
+    """
+
+    _SOURCES = {
+        KIND_USERS: ("accounts.user", "profiles.profile"),
+        KIND_CATALOG: ("catalog.catalogitem",),
+        KIND_ITEMS: ("boms.bomitem",),
+    }
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._indexes: dict[str, PrefixIndex] = {}
+        self._generations: dict[str, dict[str, int]] = {}
+        self._built_at: dict[str, float] = {}
+        self._rebuilding: set[str] = set()
+        self._checked_at = 0.0
+        # user id -> roles, so permission checks don't need the profile row.
+        self._roles: dict[int, frozenset[str]] = {}
+
+    # --- configuration -------------------------------------------------
+    def _max_entries(self) -> int:
+        return int(getattr(settings, "SUGGEST_INDEX_MAX_ENTRIES", 50000))
+
+    def _max_age(self) -> float:
+        return float(getattr(settings, "SUGGEST_INDEX_MAX_AGE_SECONDS", 900))
+
+    def _models(self, kind: str):
+        from django.apps import apps
+
+        return [apps.get_model(label) for label in self._SOURCES[kind]]
+
+    # --- building ------------------------------------------------------
+    def _build(self, kind: str) -> tuple[PrefixIndex, dict[int, frozenset[str]]]:
+        from boms.models import BomItem
+        from catalog.models import CatalogItem
+
+        index = PrefixIndex(self._max_entries())
+        roles: dict[int, frozenset[str]] = {}
+        if kind == KIND_USERS:
+            users = get_user_model().objects.select_related("profile").order_by("-last_login", "email")
+            for user in users.iterator(chunk_size=2000):
+                roles[user.id] = _user_role_set(user)
+                entry = _user_entry(user)
+                if entry is not None:
+                    index.put(entry)
+        elif kind == KIND_CATALOG:
+            rows = CatalogItem.objects.order_by("updated_at").values_list("id", "owner_id", "name", "vendor_name", "category")
+            for row in rows.iterator(chunk_size=2000):
+                index.put(_catalog_entry(*row))
+        else:
+            rows = (
+                BomItem.objects.values_list("name", "bom__owner_id")
+                .annotate(uses=Count("id"))
+                .order_by()
+            )
+            for name, owner_id, uses in rows.iterator(chunk_size=2000):
+                _add_item_name(index, name, owner_id, uses)
+        return index, roles
+
+    def _install(self, kind: str, generations: dict[str, int]) -> None:
+        index, roles = self._build(kind)
+        with self._lock:
+            self._indexes[kind] = index
+            self._generations[kind] = generations
+            self._built_at[kind] = time.monotonic()
+            if kind == KIND_USERS:
+                self._roles = roles
+        logger.info("Suggest index %s built with %s entries", kind, len(index))
+
+    def _rebuild_in_background(self, kind: str) -> None:
+        with self._lock:
+            if kind in self._rebuilding:
+                return
+            self._rebuilding.add(kind)
+
+        def run() -> None:
+            try:
+                self._install(kind, get_generations(self._models(kind)))
+            except Exception:
+                logger.exception("Suggest index %s rebuild failed", kind)
+            finally:
+                with self._lock:
+                    self._rebuilding.discard(kind)
+                connections.close_all()
+
+        threading.Thread(target=run, name=f"suggest-rebuild-{kind}", daemon=True).start()
+
+    def _ensure(self, kind: str) -> PrefixIndex:
+        if kind not in self._indexes:
+            with self._lock:
+                if kind not in self._indexes:
+                    self._install(kind, get_generations(self._models(kind)))
+            return self._indexes[kind]
+
+        now = time.monotonic()
+        if now - self._checked_at >= 1.0:
+            self._checked_at = now
+            for other in list(self._indexes):
+                try:
+                    current = get_generations(self._models(other))
+                except Exception:
+                    logger.exception("Suggest generation check failed")
+                    break
+                too_old = now - self._built_at.get(other, 0.0) > self._max_age()
+                if current != self._generations.get(other) or too_old:
+                    self._rebuild_in_background(other)
+        return self._indexes[kind]
+
+    def _seen(self, kind: str) -> None:
+        # Our own change has been applied incrementally, and its commit bumped
+        # one counter by at most one. Accept that, but nothing more: a larger
+        # step means another process wrote too, and _ensure must rebuild.
+        known = self._generations.get(kind)
+        if kind not in self._indexes or known is None:
+            return
+        current = get_generations(self._models(kind))
+        steps = [current[label] - known.get(label, current[label]) for label in current]
+        if all(step in (0, 1) for step in steps) and sum(steps) <= 1:
+            self._generations[kind] = current
+
+    # --- incremental updates (called from signals) ---------------------
+    def user_changed(self, user) -> None:
+        with self._lock:
+            if KIND_USERS not in self._indexes:
+                return
+            index = self._indexes[KIND_USERS]
+            self._roles[user.id] = _user_role_set(user)
+            entry = _user_entry(user)
+            if entry is None:
+                index.remove(f"user:{user.id}")
+            else:
+                index.put(entry)
+            self._seen(KIND_USERS)
+
+    def user_removed(self, user_id: int) -> None:
+        with self._lock:
+            if KIND_USERS not in self._indexes:
+                return
+            self._indexes[KIND_USERS].remove(f"user:{user_id}")
+            self._roles.pop(user_id, None)
+            self._seen(KIND_USERS)
+
+    def catalog_changed(self, item) -> None:
+        with self._lock:
+            if KIND_CATALOG not in self._indexes:
+                return
+            self._indexes[KIND_CATALOG].put(
+                _catalog_entry(item.id, item.owner_id, item.name, item.vendor_name, item.category)
+            )
+            self._seen(KIND_CATALOG)
+
+    def catalog_removed(self, item_id: int) -> None:
+        with self._lock:
+            if KIND_CATALOG not in self._indexes:
+                return
+            self._indexes[KIND_CATALOG].remove(f"catalog:{item_id}")
+            self._seen(KIND_CATALOG)
+
+    def item_name_added(self, name: str, owner_id: int) -> None:
+        with self._lock:
+            if KIND_ITEMS not in self._indexes:
+                return
+            _add_item_name(self._indexes[KIND_ITEMS], name, owner_id, 1)
+            self._seen(KIND_ITEMS)
+
+    def item_name_unchanged(self) -> None:
+        with self._lock:
+            self._seen(KIND_ITEMS)
+
+    def item_name_removed(self, name: str, owner_id: int) -> None:
+        with self._lock:
+            if KIND_ITEMS not in self._indexes:
+                return
+            index = self._indexes[KIND_ITEMS]
+            entry = index.get(_item_key(name))
+            if entry is not None and entry.owners is not None:
+                remaining = entry.owners.get(owner_id, 0) - 1
+                if remaining > 0:
+                    entry.owners[owner_id] = remaining
+                else:
+                    entry.owners.pop(owner_id, None)
+                if not entry.owners:
+                    index.remove(entry.key)
+            self._seen(KIND_ITEMS)
+
+    # --- querying ------------------------------------------------------
+    def roles_for(self, user) -> frozenset[str]:
+        self._ensure(KIND_USERS)
+        cached = self._roles.get(user.id)
+        return cached if cached is not None else _user_role_set(user)
+
+    def suggest(self, user, kind: str, query: str, *, limit: int = 10) -> list[dict]:
+        index = self._ensure(kind)
+        roles = self.roles_for(user) if kind != KIND_USERS else frozenset()
+        privileged = "admin" in roles or "procurement" in roles
+
+        def visible(entry: _Entry) -> bool:
+            if entry.owners is None or privileged:
+                return True
+            return user.id in entry.owners
+
+        with self._lock:
+            return [dict(entry.payload) for entry in index.search(query, limit=limit, visible=visible)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {kind: len(index) for kind, index in self._indexes.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._generations.clear()
+            self._built_at.clear()
+            self._roles.clear()
+
+
+def _user_role_set(user) -> frozenset[str]:
+    from core.roles import user_roles
+
+    return frozenset(user_roles(user))
+
+
+def _user_entry(user) -> _Entry | None:
+    if not user.is_active:
+        return None
+    profile = getattr(user, "profile", None)
+    display_name = getattr(profile, "display_name", "") or ""
+    full_name = " ".join(p for p in (user.first_name, user.last_name) if p)
+    label = display_name or full_name or user.email
+    return _Entry(
+        key=f"user:{user.id}",
+        label=label,
+        text=_normalize(" ".join(p for p in (user.email, display_name, full_name) if p)),
+        payload={"id": user.id, "email": user.email, "display_name": display_name, "label": label},
+    )
+
+
+def _catalog_entry(item_id: int, owner_id: int, name: str, vendor_name: str, category: str) -> _Entry:
+    return _Entry(
+        key=f"catalog:{item_id}",
+        label=name,
+        text=_normalize(name),
+        payload={"id": item_id, "name": name, "vendor_name": vendor_name, "category": category},
+        owners={owner_id: 1},
+    )
+
+
+def _item_key(name: str) -> str:
+    return f"item:{_normalize(name)}"
+
+
+def _add_item_name(index: PrefixIndex, name: str, owner_id: int, uses: int) -> None:
+    if not _normalize(name):
+        return
+    entry = index.get(_item_key(name))
+    if entry is None:
+        entry = _Entry(
+            key=_item_key(name), label=name, text=_normalize(name), payload={"name": name}, owners={}
+        )
+    entry.owners[owner_id] = entry.owners.get(owner_id, 0) + uses
+    index.put(entry)
+
+
+_service: SuggestService | None = None
+_service_lock = threading.Lock()
+
+
+def get_suggest_service() -> SuggestService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = SuggestService()
+    return _service
@@ -1,3 +1,137 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from boms.models import Bom, BomItem
+from core.response_cache import bump_generation
+
+from .suggest import KIND_ITEMS, PrefixIndex, _add_item_name, get_suggest_service
+
+LOCAL_CACHE = {
+    **settings.CACHES,
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "suggest-test"},
+}
+
+
+class BomItemSuggestSignalTests(TestCase):
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user("owner@example.com", "pw")
+        bom = Bom.objects.create(owner=self.owner, title="Rig")
+        self.item_id = BomItem.objects.create(bom=bom, name="Valve").pk
+
+    def _suggest_queries(self, save):
+        # Queries the suggest receivers add: reading the item's previous name/owner or its BOM.
+        item = BomItem.objects.get(pk=self.item_id)
+        with CaptureQueriesContext(connection) as ctx:
+            save(item)
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+
+    def test_saving_other_fields_reads_nothing_for_the_index(self):
+        def save(item):
+            item.notes = "spare"
+            item.save(update_fields=["notes"])
+
+        self.assertFalse([sql for sql in self._suggest_queries(save) if "boms_bom" in sql])
+
+    def test_saving_without_update_fields_reads_nothing_for_the_index(self):
+        def save(item):
+            item.notes = "spare"
+            item.save()
+
+        self.assertFalse([sql for sql in self._suggest_queries(save) if "boms_bom" in sql])
+
+    def test_renaming_only_reads_the_owner(self):
+        def save(item):
+            item.name = "Ball valve"
+            item.save()
+
+        queries = [sql for sql in self._suggest_queries(save) if "boms_bom" in sql]
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("boms_bomitem", queries[0])
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def test_whole_prefix_ranks_before_word_prefix_before_substring(self):
+        index = PrefixIndex(max_entries=100)
+        for name in ("Safetyvalve", "Check valve", "Valve cap", "Ball valve", "Valve"):
+            _add_item_name(index, name, owner_id=1, uses=1)
+        labels = [entry.label for entry in index.search("valve", limit=10, visible=lambda entry: True)]
+        self.assertEqual(labels, ["Valve", "Valve cap", "Ball valve", "Check valve", "Safetyvalve"])
+        short = [entry.label for entry in index.search("va", limit=10, visible=lambda entry: True)]
+        self.assertEqual(short, ["Valve", "Valve cap", "Ball valve", "Check valve"])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        index = PrefixIndex(max_entries=2)
+        for name in ("Alpha", "Beta"):
+            _add_item_name(index, name, owner_id=1, uses=1)
+        index.search("alpha", limit=1, visible=lambda entry: True)
+        _add_item_name(index, "Gamma", owner_id=1, uses=1)
+        self.assertIsNotNone(index.get("item:alpha"))
+        self.assertIsNone(index.get("item:beta"))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ItemSuggestTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.service = get_suggest_service()
+        self.service.reset()
+        self.addCleanup(self.service.reset)
+        self.owner = User.objects.create_user("owner@example.com", "pw")
+        self.other = User.objects.create_user("other@example.com", "pw")
+        self.buyer = User.objects.create_user("buyer@example.com", "pw")
+        self.buyer.profile.roles = ["procurement"]
+        self.buyer.profile.save()
+        self.bom = Bom.objects.create(owner=self.owner, title="Rig")
+        self.item = BomItem.objects.create(bom=self.bom, name="Pressure valve")
+        self.client = APIClient()
+        rebuild = mock.patch.object(type(self.service), "_rebuild_in_background")
+        self.rebuild = rebuild.start()
+        self.addCleanup(rebuild.stop)
+
+    def names(self, user, query: str) -> list[str]:
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/suggest/", {"type": "items", "q": query})
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.json()["results"]]
+
+    def check_generations(self) -> None:
+        self.service._checked_at = 0.0
+        self.service._ensure(KIND_ITEMS)
+
+    def test_item_names_are_visible_to_their_owner_and_procurement(self):
+        self.assertEqual(self.names(self.owner, "valve"), ["Pressure valve"])
+        self.assertEqual(self.names(self.other, "valve"), [])
+        self.assertEqual(self.names(self.buyer, "valve"), ["Pressure valve"])
+
+    def test_local_changes_update_the_index_without_a_rebuild(self):
+        self.names(self.owner, "valve")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = "Relief valve"
+            self.item.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            BomItem.objects.create(bom=Bom.objects.create(owner=self.other, title="Other"), name="Gate valve")
+        self.assertEqual(self.names(self.owner, "valve"), ["Relief valve"])
+        self.assertEqual(self.names(self.other, "valve"), ["Gate valve"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        self.assertEqual(self.names(self.owner, "valve"), [])
+        self.check_generations()
+        self.rebuild.assert_not_called()
+
+    def test_change_from_another_process_triggers_a_rebuild(self):
+        self.names(self.owner, "valve")
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_generation(BomItem)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = "Relief valve"
+            self.item.save()
+        self.check_generations()
+        self.rebuild.assert_called_once_with(KIND_ITEMS)
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import SearchHistoryViewSet
+from .views import SearchHistoryViewSet, SuggestView
 
 
 router = DefaultRouter()
 router.register(r"search/history", SearchHistoryViewSet, basename="search-history")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("suggest/", SuggestView.as_view(), name="suggest"),
+    *router.urls,
+]
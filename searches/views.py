@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.pagination import StandardResultsSetPagination
 
 from .models import SearchHistory
 from .serializers import CreateSearchHistorySerializer, SearchHistorySerializer
+from .suggest import KINDS, get_suggest_service
 
 
 class SearchHistoryViewSet(viewsets.ModelViewSet):
@@ -29,3 +31,25 @@ class SearchHistoryViewSet(viewsets.ModelViewSet):
 
     def update(self, request, *args, **kwargs):
         return Response({"detail": "Not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class SuggestView(APIView):
+    """
+    Type-ahead served from the in-process index (no database query per keystroke).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        kind = (request.query_params.get("type") or "users").strip().lower()
+        if kind not in KINDS:
+            return Response({"detail": f"type must be one of: {', '.join(KINDS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        query = (request.query_params.get("q") or "").strip()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except (TypeError, ValueError):
+            limit = 10
+        if not query:
+            return Response({"type": kind, "results": []}, status=status.HTTP_200_OK)
+        results = get_suggest_service().suggest(request.user, kind, query, limit=limit)
+        return Response({"type": kind, "results": results}, status=status.HTTP_200_OK)
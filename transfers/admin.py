@@ -3,9 +3,23 @@ from __future__ import annotations
 from django.contrib import admin
 
 from .models import PartnerCompany, Transfer, TransferItem
+from .services import delete_transfer
 
 
-class TransferItemInline(admin.TabularInline):
+class ReadOnlyItemsMixin:
+    # Transfer lines hold asset reservations, which only the services in
+    # transfers.services keep in step; the admin just shows them.
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class TransferItemInline(ReadOnlyItemsMixin, admin.TabularInline):
     model = TransferItem
     extra = 0
 
@@ -21,8 +35,17 @@ class TransferAdmin(admin.ModelAdmin):
     list_display = ("id", "partner", "status", "created_by", "updated_at")
     list_filter = ("status",)
     inlines = [TransferItemInline]
+    # Status changes move reservations; use the API's cancel/complete actions.
+    readonly_fields = ("status", "approved_by", "approved_at", "completed_at")
+
+    def delete_model(self, request, obj):
+        delete_transfer(transfer_id=obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        for transfer_id in queryset.values_list("pk", flat=True):
+            delete_transfer(transfer_id=transfer_id)
 
 
 @admin.register(TransferItem)
-class TransferItemAdmin(admin.ModelAdmin):
+class TransferItemAdmin(ReadOnlyItemsMixin, admin.ModelAdmin):
     list_display = ("id", "transfer", "asset", "quantity")
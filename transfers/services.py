@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from assets.ledger import append_entries
+from assets.models import Asset, AssetLedgerEntry
+from assets.services import adjust_reservations, apply_transfer_quantities
+
+from .models import Transfer, TransferItem
+
+# Transfers whose items hold an AssetReservation.
+OPEN_STATUSES = (Transfer.Status.DRAFT, Transfer.Status.SUBMITTED, Transfer.Status.APPROVED)
+
+
+class TransferStateError(Exception):
+    pass
+
+
+def _quantities_by_asset(items) -> dict[int, Decimal]:
+    quantities: dict[int, Decimal] = {}
+    for item in items:
+        quantities[item.asset_id] = quantities.get(item.asset_id, Decimal("0")) + item.quantity
+    return quantities
+
+
+def _lock_open_transfer(transfer_id: int) -> Transfer:
+    transfer = Transfer.objects.select_for_update().get(pk=transfer_id)
+    if transfer.status not in OPEN_STATUSES:
+        raise TransferStateError(f"Transfer is {transfer.status.lower()}.")
+    return transfer
+
+
+def add_transfer_item(*, transfer_id: int, asset_id: int, quantity: Decimal, notes: str = "") -> TransferItem:
+    """
+    Add a line to an open transfer and reserve its quantity on the asset.
+
+    The asset row is locked while availability (quantity minus transferred and
+    reserved) is checked, so two transfers can't reserve the same units.
+    """
+    with transaction.atomic():
+        transfer = _lock_open_transfer(transfer_id)
+        asset = Asset.objects.select_for_update(of=("self",)).select_related("reservation").get(pk=asset_id)
+        if asset.available_quantity < quantity:
+            raise TransferStateError("Not enough available quantity.")
+        item = TransferItem.objects.create(transfer=transfer, asset=asset, quantity=quantity, notes=notes)
+        adjust_reservations({asset.id: quantity})
+    return item
+
+
+def remove_transfer_item(*, transfer_id: int, item_id: int) -> None:
+    """
+    Delete a line from an open transfer and release its reservation.
+    """
+    with transaction.atomic():
+        transfer = _lock_open_transfer(transfer_id)
+        item = TransferItem.objects.get(pk=item_id, transfer=transfer)
+        item.delete()
+        adjust_reservations({item.asset_id: -item.quantity})
+
+
+def release_transfer(transfer: Transfer) -> None:
+    """
+    Release the reservations of an open transfer (before cancel or delete).
+    """
+    if transfer.status in OPEN_STATUSES:
+        quantities = _quantities_by_asset(TransferItem.objects.filter(transfer=transfer).only("asset_id", "quantity"))
+        adjust_reservations({asset_id: -qty for asset_id, qty in quantities.items()})
+
+
+def delete_transfer(*, transfer_id: int) -> None:
+    """
+    Delete a transfer, releasing its reservations first if it is still open.
+
+    The transfer row is locked so a concurrent item change or completion
+    can't slip in between the release and the delete.
+    """
+    with transaction.atomic():
+        transfer = Transfer.objects.select_for_update().get(pk=transfer_id)
+        release_transfer(transfer)
+        transfer.delete()
+
+
+def cancel_transfer(*, transfer_id: int) -> tuple[Transfer, bool]:
+    with transaction.atomic():
+        transfer = Transfer.objects.select_for_update().get(pk=transfer_id)
+        if transfer.status == Transfer.Status.CANCELED:
+            return transfer, False
+        if transfer.status == Transfer.Status.COMPLETED:
+            raise TransferStateError("Completed transfers cannot be canceled.")
+        release_transfer(transfer)
+        transfer.status = Transfer.Status.CANCELED
+        transfer.save(update_fields=["status", "updated_at"])
+    return transfer, True
+
+
+def complete_transfer(*, transfer_id: int, actor=None) -> tuple[Transfer, bool]:
+    """
+    Complete a transfer and move its quantities onto the assets.
+
+    The transfer, its items and their assets are locked by one SELECT ... FOR
+    UPDATE, on-hand quantity is checked under that lock, and the increments go
+    out as one bulk UPDATE; the transfer's reservations are released and one
+    TRANSFERRED ledger entry per item is appended in the same transaction.
+    The asset counters and reservations, not the ledger, are what availability
+    is checked against; `check_asset_ledger` reports any drift between them.
+    Completing an already completed transfer changes
+    nothing; returns (transfer, changed).
+    """
+    with transaction.atomic():
+        items = list(
+            TransferItem.objects.select_for_update()
+            .select_related("transfer", "asset")
+            .filter(transfer_id=transfer_id)
+            .order_by("asset_id", "id")
+        )
+        transfer = items[0].transfer if items else Transfer.objects.select_for_update().get(pk=transfer_id)
+        if transfer.status == Transfer.Status.COMPLETED:
+            return transfer, False
+        if transfer.status == Transfer.Status.CANCELED:
+            raise TransferStateError("Transfer is canceled.")
+
+        quantities = _quantities_by_asset(items)
+        assets = {item.asset_id: item.asset for item in items}
+        short = sorted(asset_id for asset_id, qty in quantities.items() if assets[asset_id].on_hand_quantity < qty)
+        if short:
+            raise TransferStateError(f"Not enough available quantity for assets: {', '.join(map(str, short))}.")
+
+        if quantities:
+            apply_transfer_quantities(quantities=quantities)
+            adjust_reservations({asset_id: -qty for asset_id, qty in quantities.items()})
+            append_entries(
+                AssetLedgerEntry(
+                    asset_id=item.asset_id,
+                    kind=AssetLedgerEntry.Kind.TRANSFERRED,
+                    quantity=-item.quantity,
+                    source_type="transfer_item",
+                    source_id=item.id,
+                    created_by=actor,
+                )
+                for item in items
+            )
+        transfer.status = Transfer.Status.COMPLETED
+        transfer.completed_at = timezone.now()
+        transfer.save(update_fields=["status", "completed_at", "updated_at"])
+    return transfer, True
@@ -1,3 +1,144 @@
-from django.test import TestCase
+from __future__ import annotations
 
-# Create your tests here.
+import io
+from decimal import Decimal
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+
+from assets.ledger import find_ledger_drift
+from assets.models import Asset, AssetLedgerEntry, AssetReservation
+from assets.services import find_reservation_drift, rebuild_reservations, record_asset_created
+
+from .models import PartnerCompany, Transfer, TransferItem
+from .services import (
+    TransferStateError,
+    add_transfer_item,
+    cancel_transfer,
+    complete_transfer,
+    remove_transfer_item,
+)
+
+
+class TransferAccountingTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser("admin@example.com", "pw")
+        self.partner = PartnerCompany.objects.create(name="Partner")
+        self.asset = Asset.objects.create(name="Scope", quantity=Decimal("10"))
+
+    def _transfer(self) -> Transfer:
+        return Transfer.objects.create(partner=self.partner, created_by=self.user)
+
+    def _asset(self) -> Asset:
+        return Asset.objects.select_related("reservation").get(pk=self.asset.pk)
+
+    def test_items_reserve_and_release_quantity(self):
+        transfer = self._transfer()
+        item = add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("4"))
+        self.assertEqual(self._asset().available_quantity, Decimal("6"))
+        with self.assertRaises(TransferStateError):
+            add_transfer_item(transfer_id=self._transfer().pk, asset_id=self.asset.pk, quantity=Decimal("7"))
+        remove_transfer_item(transfer_id=transfer.pk, item_id=item.pk)
+        self.assertEqual(self._asset().available_quantity, Decimal("10"))
+
+    def test_cancel_releases_reservations(self):
+        transfer = self._transfer()
+        add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("4"))
+        self.assertEqual(cancel_transfer(transfer_id=transfer.pk)[1], True)
+        self.assertEqual(cancel_transfer(transfer_id=transfer.pk)[1], False)
+        self.assertEqual(self._asset().reserved_quantity, Decimal("0"))
+
+    def test_complete_moves_quantity_once(self):
+        transfer = self._transfer()
+        add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("4"))
+        add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("6"))
+
+        _, changed = complete_transfer(transfer_id=transfer.pk, actor=self.user)
+        self.assertTrue(changed)
+        _, changed = complete_transfer(transfer_id=transfer.pk, actor=self.user)
+        self.assertFalse(changed)
+
+        asset = self._asset()
+        self.assertEqual(asset.transferred_quantity, Decimal("10"))
+        self.assertEqual(asset.reserved_quantity, Decimal("0"))
+        self.assertEqual(asset.status, Asset.Status.TRANSFERRED)
+        entries = AssetLedgerEntry.objects.filter(asset=asset, kind=AssetLedgerEntry.Kind.TRANSFERRED)
+        self.assertEqual(sorted(entries.values_list("quantity", flat=True)), [Decimal("-6"), Decimal("-4")])
+        with self.assertRaises(TransferStateError):
+            cancel_transfer(transfer_id=transfer.pk)
+
+    def test_counters_agree_with_the_ledger(self):
+        record_asset_created(self.asset)
+        done = self._transfer()
+        add_transfer_item(transfer_id=done.pk, asset_id=self.asset.pk, quantity=Decimal("3"))
+        complete_transfer(transfer_id=done.pk, actor=self.user)
+        add_transfer_item(transfer_id=self._transfer().pk, asset_id=self.asset.pk, quantity=Decimal("2"))
+        self.assertEqual(find_ledger_drift(), [])
+        self.assertEqual(find_reservation_drift(), [])
+        call_command("check_asset_ledger", stdout=io.StringIO())
+
+        Asset.objects.filter(pk=self.asset.pk).update(transferred_quantity=Decimal("4"))
+        AssetReservation.objects.filter(asset=self.asset).update(reserved_quantity=Decimal("5"))
+        self.assertEqual(
+            [(row["field"], row["recorded"], row["expected"]) for row in find_ledger_drift()],
+            [("transferred_quantity", Decimal("4"), Decimal("3"))],
+        )
+        self.assertEqual(
+            [(row["field"], row["recorded"], row["expected"]) for row in find_reservation_drift()],
+            [("reserved_quantity", Decimal("5"), Decimal("2"))],
+        )
+        with self.assertRaises(CommandError):
+            call_command("check_asset_ledger", stdout=io.StringIO())
+
+    def test_complete_without_items_only_changes_status(self):
+        transfer, changed = complete_transfer(transfer_id=self._transfer().pk)
+        self.assertTrue(changed)
+        self.assertEqual(transfer.status, Transfer.Status.COMPLETED)
+        self.assertIsNotNone(transfer.completed_at)
+        self.assertFalse(AssetLedgerEntry.objects.filter(kind=AssetLedgerEntry.Kind.TRANSFERRED).exists())
+
+    def test_canceled_transfer_cannot_be_completed(self):
+        transfer = self._transfer()
+        add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("4"))
+        cancel_transfer(transfer_id=transfer.pk)
+        with self.assertRaises(TransferStateError):
+            complete_transfer(transfer_id=transfer.pk)
+        self.assertEqual(self._asset().transferred_quantity, Decimal("0"))
+
+    def test_complete_rejects_more_than_on_hand(self):
+        transfer = self._transfer()
+        add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("4"))
+        Asset.objects.filter(pk=self.asset.pk).update(transferred_quantity=Decimal("8"))
+        with self.assertRaises(TransferStateError):
+            complete_transfer(transfer_id=transfer.pk)
+        self.assertEqual(Transfer.objects.get(pk=transfer.pk).status, Transfer.Status.DRAFT)
+
+    def test_rebuild_matches_incremental_reservations(self):
+        add_transfer_item(transfer_id=self._transfer().pk, asset_id=self.asset.pk, quantity=Decimal("3"))
+        add_transfer_item(transfer_id=self._transfer().pk, asset_id=self.asset.pk, quantity=Decimal("2"))
+        before = self._asset().reserved_quantity
+        rebuild_reservations()
+        self.assertEqual(self._asset().reserved_quantity, before)
+        self.assertEqual(before, Decimal("5"))
+
+    def test_api_delete_releases_reservations(self):
+        transfer = self._transfer()
+        add_transfer_item(transfer_id=transfer.pk, asset_id=self.asset.pk, quantity=Decimal("4"))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.delete(f"/api/transfers/{transfer.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Transfer.objects.filter(pk=transfer.pk).exists())
+        self.assertEqual(self._asset().available_quantity, Decimal("10"))
+
+    def test_admin_cannot_edit_transfer_lines(self):
+        request = RequestFactory().get("/admin/")
+        request.user = self.user
+        item_admin = site._registry[TransferItem]
+        self.assertFalse(item_admin.has_add_permission(request))
+        self.assertFalse(item_admin.has_change_permission(request))
+        self.assertFalse(item_admin.has_delete_permission(request))
+        self.assertIn("status", site._registry[Transfer].get_readonly_fields(request))
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from decimal import Decimal
 
-from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -10,9 +10,9 @@ from rest_framework.response import Response
 
 from boms.permissions import has_role
 from core.pagination import StandardResultsSetPagination
+from core.response_cache import CachedResponseMixin
 
 from assets.models import Asset
-from assets.services import apply_transfer_quantities
 
 from .models import PartnerCompany, Transfer, TransferItem
 from .permissions import IsProcurementOrAdmin
@@ -23,13 +23,23 @@ from .serializers import (
     TransferItemSerializer,
     TransferSerializer,
 )
+from .services import (
+    TransferStateError,
+    add_transfer_item,
+    cancel_transfer,
+    complete_transfer,
+    delete_transfer,
+    remove_transfer_item,
+)
 
 
-class PartnerCompanyViewSet(viewsets.ModelViewSet):
+class PartnerCompanyViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = StandardResultsSetPagination
     queryset = PartnerCompany.objects.all().order_by("name")
     serializer_class = PartnerCompanySerializer
+    cache_models = (PartnerCompany,)
+    cache_scope = "global"
 
     def get_permissions(self):
         if self.action in {"create", "update", "partial_update", "destroy"}:
@@ -43,7 +53,9 @@ class TransferViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        qs = Transfer.objects.select_related("partner", "created_by", "approved_by")
+        qs = Transfer.objects.select_related("partner", "created_by", "approved_by").prefetch_related(
+            Prefetch("items", queryset=TransferItem.objects.select_related("asset__reservation").order_by("id"))
+        )
         if not (has_role(user, "admin") or has_role(user, "procurement")):
             qs = qs.filter(created_by=user)
         return qs.order_by("-updated_at")
@@ -58,6 +70,9 @@ class TransferViewSet(viewsets.ModelViewSet):
             raise permissions.PermissionDenied("Not allowed.")
         serializer.save(created_by=self.request.user, status=Transfer.Status.DRAFT)
 
+    def perform_destroy(self, instance):
+        delete_transfer(transfer_id=instance.pk)
+
     @action(detail=True, methods=["post"], url_path="items")
     def add_item(self, request, pk=None):
         transfer: Transfer = self.get_object()
@@ -69,11 +84,31 @@ class TransferViewSet(viewsets.ModelViewSet):
         qty: Decimal = serializer.validated_data["quantity"]
         if qty <= 0:
             return Response({"detail": "Quantity must be positive."}, status=status.HTTP_400_BAD_REQUEST)
-        if asset.available_quantity < qty:
-            return Response({"detail": "Not enough available quantity."}, status=status.HTTP_400_BAD_REQUEST)
-        item = TransferItem.objects.create(transfer=transfer, **serializer.validated_data)
+        try:
+            item = add_transfer_item(
+                transfer_id=transfer.pk,
+                asset_id=asset.pk,
+                quantity=qty,
+                notes=serializer.validated_data.get("notes", ""),
+            )
+        except TransferStateError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        item = TransferItem.objects.select_related("asset__reservation").get(pk=item.pk)
         return Response(TransferItemSerializer(item).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["delete"], url_path="items/(?P<item_id>[^/.]+)")
+    def remove_item(self, request, pk=None, item_id=None):
+        transfer: Transfer = self.get_object()
+        if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
+            return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            remove_transfer_item(transfer_id=transfer.pk, item_id=int(item_id))
+        except (ValueError, TransferItem.DoesNotExist):
+            return Response({"detail": "Item not found."}, status=status.HTTP_404_NOT_FOUND)
+        except TransferStateError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=True, methods=["post"], url_path="submit")
     def submit(self, request, pk=None):
         transfer: Transfer = self.get_object()
@@ -99,14 +134,13 @@ class TransferViewSet(viewsets.ModelViewSet):
         transfer: Transfer = self.get_object()
         if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
             return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
-        items = list(transfer.items.select_related("asset"))
-        with transaction.atomic():
-            apply_transfer_quantities(
-                assets_and_qty=[(item.asset, Decimal(str(item.quantity))) for item in items]
-            )
-            transfer.status = Transfer.Status.COMPLETED
-            transfer.completed_at = timezone.now()
-            transfer.save(update_fields=["status", "completed_at"])
+        try:
+            _, changed = complete_transfer(transfer_id=transfer.pk, actor=request.user)
+        except TransferStateError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if changed:
+            # Re-read with the prefetch so the response shows the updated assets.
+            transfer = self.get_queryset().get(pk=transfer.pk)
         return Response(TransferSerializer(transfer).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], url_path="cancel")
@@ -114,6 +148,10 @@ class TransferViewSet(viewsets.ModelViewSet):
         transfer: Transfer = self.get_object()
         if not (has_role(request.user, "admin") or has_role(request.user, "procurement")):
             return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
-        transfer.status = Transfer.Status.CANCELED
-        transfer.save(update_fields=["status"])
+        try:
+            _, changed = cancel_transfer(transfer_id=transfer.pk)
+        except TransferStateError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if changed:
+            transfer = self.get_queryset().get(pk=transfer.pk)
         return Response(TransferSerializer(transfer).data, status=status.HTTP_200_OK)